@@ -1 +1,7 @@
-from .system_manager import SystemManager
\ No newline at end of file
+from .system_manager import SystemManager
+from .importer import BulkImporter, ImportReport, write_rejects
+from .api_server import ApiServer, AsyncReadWriteLock
+from .federation import FederatedManager
+from .query import Query
+from .replication import EventPublisher, Replica, ReplicaStorage
+from .rendering import RecordRenderer
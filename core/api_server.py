@@ -0,0 +1,344 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qs, urlsplit
+
+from model.department import Department
+from model.patient import Patient
+from model.staff import Staff
+from telemetry import to_prometheus
+from .query import Query
+from .system_manager import SystemManager
+
+
+class AsyncReadWriteLock:
+    """
+    Asyncio lock that admits many readers at once or a single writer.
+    Waiting writers block new readers, so writes are never starved.
+    """
+
+    def __init__(self) -> None:
+        """Initializes an unlocked lock."""
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @asynccontextmanager
+    async def read(self):
+        """Holds the lock in shared mode."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._writer and not self._waiting_writers)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @asynccontextmanager
+    async def write(self):
+        """Holds the lock in exclusive mode."""
+        async with self._condition:
+            self._waiting_writers += 1
+            await self._condition.wait_for(lambda: not self._writer and not self._readers)
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+class HttpError(Exception):
+    """An error answered with the given HTTP status code."""
+
+    def __init__(self, status: int, message: str) -> None:
+        """Initializes the error with its HTTP status and message."""
+        super().__init__(message)
+        self.status = status
+
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Content Too Large", 500: "Internal Server Error"}
+
+
+def record_to_dict(department: Department, record) -> dict:
+    """Converts a patient or staff member to its JSON representation."""
+    data = {'id': record.record_id, 'name': record.name, 'age': record.age,
+            'department': department.name}
+    if isinstance(record, Patient):
+        data['medical_record'] = record.medical_record
+    else:
+        data['position'] = record.position
+    return data
+
+
+class ApiServer:
+    """
+    HTTP/JSON service exposing the hospital over asyncio.
+
+    Reads run concurrently in worker threads under a shared lock; writes
+    take the lock exclusively, so they are serialized.
+
+    Routes:
+        GET    /departments                 POST /departments
+        GET    /patients | /staff           POST /patients | /staff
+        GET    /patients/search?q=NAME      GET  /staff/search?q=NAME
+               (add &fuzzy=1 to also match names a few typos away)
+        GET    /patients/ID | /staff/ID     DELETE /patients/ID | /staff/ID
+        GET    /statistics                  GET  /metrics (Prometheus text)
+        GET    /records/search?q=TEXT[&department=NAME][&k=10] (ranked medical records)
+        GET    /patients/query | /staff/query (filters: department=A,B min_age max_age
+               position prefix; sort, desc=1, offset, limit; the plan is returned too)
+    """
+
+    MAX_PAGE = 1000
+    MAX_BODY = 1 << 20      # Bytes; larger request bodies are refused
+
+    def __init__(self, manager: SystemManager, storage) -> None:
+        """
+        Initializes the server.
+
+        Args:
+            manager: SystemManager wrapping the hospital to serve.
+            storage: Repository that persists every change.
+        """
+        # Input validation
+        if not isinstance(manager, SystemManager):
+            raise TypeError("Manager must be a SystemManager object!")
+
+        self.manager: SystemManager = manager
+        self.hospital = manager.hospital
+        self.storage = storage
+        self.lock = AsyncReadWriteLock()
+        self.server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> None:
+        """Starts listening for connections."""
+        self.server = await asyncio.start_server(self._serve_client, host, port)
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 8080) -> None:
+        """Starts the server and runs until cancelled."""
+        await self.start(host, port)
+        async with self.server:
+            await self.server.serve_forever()
+
+    @property
+    def port(self) -> int:
+        """Returns the port the server listens on."""
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _serve_client(self, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+        """Handles the requests of one keep-alive connection."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                lines = head.decode('latin-1').split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        key, value = line.split(":", 1)
+                        headers[key.strip().lower()] = value.strip()
+                # A refused body is left unread, so the connection is closed after the answer
+                length = headers.get('content-length', '0') or '0'
+                if not length.isdigit():
+                    status, payload = 400, {'error': f"Invalid Content-Length: {length}"}
+                    keep_alive = False
+                elif int(length) > self.MAX_BODY:
+                    status, payload = 413, {'error': f"Request body is larger than "
+                                                     f"{self.MAX_BODY} bytes"}
+                    keep_alive = False
+                else:
+                    length = int(length)
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.handle(method, target, body)
+                    keep_alive = (headers.get('connection', '').lower() != 'close'
+                                  and version == 'HTTP/1.1')
+                # Plain strings are sent as text (the metrics), everything else as JSON
+                if isinstance(payload, str):
+                    content_type = "text/plain; version=0.0.4"
+                    data = payload.encode('utf-8')
+                else:
+                    content_type = "application/json"
+                    data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    .encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def handle(self, method: str, target: str, body: bytes) -> tuple[int, object]:
+        """
+        Routes one request.
+
+        Returns:
+            (HTTP status, JSON-serializable payload)
+        """
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+        loop = asyncio.get_running_loop()
+        try:
+            if method == "GET":
+                async with self.lock.read():
+                    return 200, await loop.run_in_executor(None, self._get, parts, query)
+            if method in ("POST", "DELETE"):
+                data = json.loads(body or b"{}") if method == "POST" else None
+                async with self.lock.write():
+                    return await loop.run_in_executor(None, self._change, method, parts, data)
+            raise HttpError(405, f"Method {method} not allowed")
+        except HttpError as e:
+            return e.status, {'error': str(e)}
+        except PermissionError as e:
+            return 403, {'error': str(e)}
+        except (ValueError, TypeError, KeyError) as e:
+            return 400, {'error': str(e)}
+        except Exception as e:  # Keep the connection alive on unexpected errors
+            return 500, {'error': str(e)}
+
+    def _find(self, kind: str, record_id: str):
+        """Returns the (department, record) of a patient or staff ID."""
+        try:
+            found = self.hospital.get_record(int(record_id))
+        except ValueError:
+            raise HttpError(400, f"Invalid ID: {record_id}") from None
+        expected = Patient if kind == 'patients' else Staff
+        if found is None or not isinstance(found[1], expected):
+            label = 'patient' if kind == 'patients' else 'staff member'
+            raise HttpError(404, f"No {label} with ID {record_id}")
+        return found
+
+    def _department(self, name: str) -> Department:
+        """Returns the first department with the given name."""
+        for dept in self.hospital.departments:
+            if dept.name == name:
+                return dept
+        raise HttpError(404, f"No department named '{name}'")
+
+    def _get(self, parts: list[str], query: dict):
+        """Answers a read-only request."""
+        if parts == ['departments']:
+            return [{'name': dept.name, 'patients': dept.stats.patient_count,
+                     'staff': dept.stats.staff_count} for dept in self.hospital.departments]
+        if parts == ['statistics']:
+            return self.manager.get_statistics()
+        if parts == ['metrics']:
+            return to_prometheus()
+        if parts == ['records', 'search']:
+            text = query.get('q', '').strip()
+            if not text:
+                raise HttpError(400, "Query parameter 'q' is required")
+            department = query.get('department')
+            department = self._department(department) if department else None
+            k = min(int(query.get('k', 10)), self.MAX_PAGE)
+            results = self.storage.search_records(self.hospital, text, department, k)
+            return [dict(record_to_dict(dept, patient), score=round(score, 4))
+                    for dept, patient, score in results]
+        if not parts or parts[0] not in ('patients', 'staff'):
+            raise HttpError(404, "Not found")
+
+        kind = parts[0]
+        if len(parts) == 1:
+            offset = int(query.get('offset', 0))
+            limit = min(int(query.get('limit', 100)), self.MAX_PAGE)
+            department = query.get('department')
+            if kind == 'patients':
+                entries = self.manager.iter_patients(department, query.get('sort'), offset, limit)
+                total = self.manager.count_patients(department)
+            else:
+                entries = self.manager.iter_staff(department, query.get('sort'), offset, limit)
+                total = self.manager.count_staff(department)
+            return {'total': total, 'offset': offset,
+                    'items': [record_to_dict(dept, record) for dept, record in entries]}
+        if parts[1:] == ['query']:
+            return self._query(kind, query)
+        if parts[1:] == ['search']:
+            name = query.get('q', '').strip()
+            if not name:
+                raise HttpError(400, "Query parameter 'q' is required")
+            if query.get('fuzzy') == '1':
+                search = (self.storage.fuzzy_search_patients if kind == 'patients'
+                          else self.storage.fuzzy_search_staff)
+                limit = min(int(query.get('limit', 100)), self.MAX_PAGE)
+                return [dict(record_to_dict(dept, record), distance=distance)
+                        for dept, record, distance in search(self.hospital, name, limit)]
+            search = self.storage.search_patients if kind == 'patients' else self.storage.search_staff
+            return [record_to_dict(dept, record) for dept, record in search(self.hospital, name)]
+        if len(parts) == 2:
+            return record_to_dict(*self._find(kind, parts[1]))
+        raise HttpError(404, "Not found")
+
+    def _query(self, kind: str, params: dict) -> dict:
+        """Answers a structured query over patients or staff."""
+        query = Query(self.hospital, kind)
+        if params.get('department'):
+            query.department(*(name.strip() for name in params['department'].split(',')))
+        if 'min_age' in params or 'max_age' in params:
+            low, high = params.get('min_age'), params.get('max_age')
+            query.age_between(None if low is None else int(low), None if high is None else int(high))
+        if params.get('position'):
+            query.position(params['position'])
+        if params.get('prefix'):
+            query.name_prefix(params['prefix'])
+        if params.get('sort'):
+            query.order_by(params['sort'], params.get('desc') == '1')
+        query.offset(int(params.get('offset', 0)))
+        query.limit(min(int(params.get('limit', 100)), self.MAX_PAGE))
+        return {'plan': query.explain().splitlines(),
+                'items': [record_to_dict(dept, record) for dept, record in query.run()]}
+
+    def _change(self, method: str, parts: list[str], data: dict | None):
+        """Applies a write request through the storage repository."""
+        if method == "POST" and parts == ['departments']:
+            name = str(data['name']).strip()
+            if not name:
+                raise ValueError("Department name cannot be empty!")
+            self.storage.add_department(self.hospital, Department(name))
+            return 201, {'name': name}
+
+        if parts[:1] not in (['patients'], ['staff']):
+            raise HttpError(404, "Not found")
+        kind = parts[0]
+
+        if method == "POST" and len(parts) == 1:
+            department = self._department(data['department'])
+            name = str(data['name']).strip()
+            if not name:
+                raise ValueError("Name cannot be empty!")
+            if kind == 'patients':
+                record = Patient(name, data['age'], str(data.get('medical_record', '')))
+                self.storage.add_patient(self.hospital, department, record, quiet=True)
+            else:
+                record = Staff(name, data['age'], str(data['position']))
+                self.storage.add_staff_member(self.hospital, department, record, quiet=True)
+            return 201, record_to_dict(department, record)
+
+        if method == "DELETE" and len(parts) == 2:
+            department, record = self._find(kind, parts[1])
+            if kind == 'patients':
+                self.storage.delete_patient(self.hospital, department, record)
+            else:
+                self.storage.delete_staff_member(self.hospital, department, record)
+            return 200, record_to_dict(department, record)
+
+        raise HttpError(405, f"{method} is not supported on this route")
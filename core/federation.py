@@ -0,0 +1,180 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from model.hospital import Hospital
+from model.statistics import Statistics
+from storage.json_storage import JsonStorage
+from .api_server import record_to_dict
+
+
+# Shards loaded by this process, by data file path. In a worker process it
+# holds the shards assigned to that worker, which stay loaded between calls.
+_shards: dict[str, Hospital] = {}
+
+
+def journal_path(path: str) -> str:
+    """Returns the journal file that belongs to a shard's data file."""
+    return os.path.splitext(path)[0] + ".journal"
+
+
+def _shard(path: str) -> Hospital:
+    """Returns a shard, loading it on first use."""
+    hospital = _shards.get(path)
+    if hospital is None:
+        storage = JsonStorage(path, journal_path(path))
+        try:
+            hospital = storage.load()
+        finally:
+            storage.close()
+        _shards[path] = hospital
+    return hospital
+
+
+def _load(paths: list[str]) -> list[dict]:
+    """Loads shards and returns a short summary of each."""
+    return [{'path': path, 'hospital': hospital.name,
+             'patients': hospital.stats.patient_count, 'staff': hospital.stats.staff_count}
+            for path, hospital in zip(paths, map(_shard, paths))]
+
+
+def _search(paths: list[str], kind: str, name: str, limit: int | None) -> list[list[dict]]:
+    """Searches shards by name and returns the hits of each as plain dictionaries."""
+    results = []
+    for hospital in map(_shard, paths):
+        found = hospital.search_patients(name) if kind == 'patients' else hospital.search_staff(name)
+        results.append([dict(hospital=hospital.name, **record_to_dict(dept, record))
+                        for dept, record in found[:limit]])
+    return results
+
+
+def _statistics(paths: list[str]) -> list[tuple]:
+    """
+    Returns (name, location, statistics, [(department name, statistics)])
+    for each shard. The aggregates are small and merge exactly.
+    """
+    return [(hospital.name, hospital.location, hospital.stats,
+             [(dept.name, dept.stats) for dept in hospital.departments])
+            for hospital in map(_shard, paths)]
+
+
+class FederatedManager:
+    """
+    Runs network-wide queries over many hospitals, one data file per shard.
+
+    Shards are spread over worker processes and stay loaded there: each
+    worker is its own single-process pool, so a shard is always queried by
+    the process that loaded it. Searches and statistics are sent to every
+    worker at once and the partial results are merged here.
+    """
+
+    def __init__(self, paths: list[str], workers: int | None = None) -> None:
+        """
+        Initializes the manager.
+
+        Args:
+            paths: JSON data files of the hospitals, one per shard.
+            workers: Number of worker processes; the number of CPUs if None,
+                and 0 to load every shard in this process.
+        """
+        # Input validation
+        if not isinstance(paths, list) or not all(isinstance(path, str) for path in paths):
+            raise TypeError("Shard paths must be a list of strings!")
+        if not paths:
+            raise ValueError("At least one shard is required!")
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if not isinstance(workers, int) or workers < 0:
+            raise ValueError("workers must be a non-negative integer!")
+
+        self.paths: list[str] = paths
+        self.workers: int = min(workers, len(paths))
+        # Shard i belongs to worker i % workers
+        groups = max(self.workers, 1)
+        self._groups: list[list[str]] = [paths[i::groups] for i in range(groups)]
+        self._executors = [ProcessPoolExecutor(max_workers=1) for _ in range(self.workers)]
+
+    def _fan_out(self, function, *args) -> list:
+        """
+        Runs function(shard paths, *args) on every worker.
+
+        Returns:
+            One result per shard, in shard order.
+        """
+        if not self._executors:
+            return function(self.paths, *args)
+        futures = [executor.submit(function, group, *args)
+                   for executor, group in zip(self._executors, self._groups)]
+        results = {}
+        for group, future in zip(self._groups, futures):
+            results.update(zip(group, future.result()))
+        return [results[path] for path in self.paths]
+
+    def load(self) -> list[dict]:
+        """
+        Loads every shard in parallel.
+
+        Returns:
+            One {'path', 'hospital', 'patients', 'staff'} summary per shard.
+        """
+        return self._fan_out(_load)
+
+    def search_patients(self, name: str, limit: int | None = None) -> list[dict]:
+        """
+        Finds patients anywhere in the network whose name contains the text.
+
+        Returns:
+            Patient dictionaries in shard order, each with the 'hospital'
+            it belongs to.
+        """
+        hits = [hit for shard in self._fan_out(_search, 'patients', name, limit) for hit in shard]
+        return hits[:limit]
+
+    def search_staff(self, name: str, limit: int | None = None) -> list[dict]:
+        """
+        Finds staff members anywhere in the network whose name contains the text.
+
+        Takes the same arguments as search_patients().
+        """
+        hits = [hit for shard in self._fan_out(_search, 'staff', name, limit) for hit in shard]
+        return hits[:limit]
+
+    def get_statistics(self) -> dict:
+        """
+        Returns network-wide statistics.
+
+        The result has the same aggregates as Hospital.statistics(), plus a
+        summary per hospital and totals per specialty (department name)
+        across all hospitals.
+        """
+        total = Statistics()
+        hospitals = []
+        specialties: dict[str, Statistics] = {}
+        shards_per_specialty: dict[str, int] = {}
+        for name, location, stats, departments in self._fan_out(_statistics):
+            total.merge(stats)
+            hospitals.append({'hospital': name, 'location': location,
+                              'patients': stats.patient_count, 'staff': stats.staff_count})
+            for dept_name in {dept_name for dept_name, _ in departments}:
+                shards_per_specialty[dept_name] = shards_per_specialty.get(dept_name, 0) + 1
+            for dept_name, dept_stats in departments:
+                specialties.setdefault(dept_name, Statistics()).merge(dept_stats)
+
+        summary = total.as_dict()
+        summary['hospitals'] = hospitals
+        summary['specialties'] = [
+            dict(name=name, hospitals=shards_per_specialty[name], **stats.as_dict())
+            for name, stats in sorted(specialties.items())
+        ]
+        return summary
+
+    def close(self) -> None:
+        """Stops the worker processes."""
+        for executor in self._executors:
+            executor.shutdown()
+        self._executors = []
+
+    def __enter__(self) -> "FederatedManager":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,191 @@
+import csv
+import json
+import os
+import time
+
+from model.department import Department
+from model.hospital import Hospital
+from model.patient import Patient
+from model.staff import Staff
+
+
+class ImportReport:
+    """
+    Outcome of a bulk import: counts, rejected rows and throughput.
+    """
+
+    def __init__(self) -> None:
+        """Initializes an empty report."""
+        self.rows: int = 0
+        self.accepted: int = 0
+        self.rejected: list[tuple[int, str]] = []   # (line number, reason)
+        self.seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """Returns the import throughput."""
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        """Returns a one-line human readable summary."""
+        return (f"{self.rows} rows: {self.accepted} imported, {len(self.rejected)} rejected "
+                f"in {self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s)")
+
+
+class BulkImporter:
+    """
+    Streams patient and staff rows from CSV or JSONL feeds into a hospital.
+
+    Each row needs `department`, `name` and `age`, plus either
+    `medical_record` (patient) or `position` (staff). An optional `type`
+    column ('patient' or 'staff') makes the kind explicit. Valid rows are
+    stored in batches through the storage repository; invalid rows are
+    reported instead of stopping the import.
+    """
+
+    MAX_AGE = 150
+
+    def __init__(self, hospital: Hospital, storage, batch_size: int = 5000,
+                 create_departments: bool = False) -> None:
+        """
+        Initializes the importer.
+
+        Args:
+            hospital: Hospital receiving the records.
+            storage: Repository used to store the records.
+            batch_size: Number of valid rows stored together.
+            create_departments: Create unknown departments instead of
+                rejecting their rows.
+        """
+        # Input validation
+        if not isinstance(hospital, Hospital):
+            raise TypeError("Hospital must be a Hospital object!")
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError("batch_size must be a positive integer!")
+
+        self.hospital: Hospital = hospital
+        self.storage = storage
+        self.batch_size: int = batch_size
+        self.create_departments: bool = create_departments
+        # Route rows by department name (first department wins on duplicates)
+        self._departments: dict[str, Department] = {}
+        for dept in reversed(hospital.departments):
+            self._departments[dept.name] = dept
+
+    @staticmethod
+    def _rows(path: str, fmt: str):
+        """Yields (line number, row dict) from a CSV or JSONL file."""
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            if fmt == 'csv':
+                reader = csv.DictReader(f)
+                for row in reader:
+                    yield reader.line_num, row
+            else:
+                for line_no, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        row = e
+                    yield line_no, row
+
+    def _department(self, name: str) -> Department:
+        """Returns the department a row is routed to."""
+        department = self._departments.get(name)
+        if department is None:
+            if not self.create_departments:
+                raise ValueError(f"unknown department '{name}'")
+            department = Department(name)
+            self.storage.add_department(self.hospital, department)
+            self._departments[name] = department
+        return department
+
+    def _parse(self, row) -> tuple[Department, Patient | Staff]:
+        """
+        Validates one row and builds its record.
+
+        Raises:
+            ValueError: With the reason the row is rejected.
+        """
+        if isinstance(row, Exception):
+            raise ValueError(f"malformed JSON ({row.msg})")
+        if not isinstance(row, dict):
+            raise ValueError("row is not an object")
+
+        name = str(row.get('name') or '').strip()
+        if not name:
+            raise ValueError("missing name")
+        try:
+            age = int(row.get('age'))
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid age {row.get('age')!r}") from None
+        if not 0 <= age <= self.MAX_AGE:
+            raise ValueError(f"age {age} out of range")
+
+        kind = str(row.get('type') or '').strip().lower()
+        if not kind:
+            kind = 'staff' if row.get('position') and not row.get('medical_record') else 'patient'
+        if kind == 'patient':
+            record = Patient(name, age, str(row.get('medical_record') or '').strip())
+        elif kind == 'staff':
+            position = str(row.get('position') or '').strip()
+            if not position:
+                raise ValueError("missing position")
+            record = Staff(name, age, position)
+        else:
+            raise ValueError(f"unknown type '{kind}'")
+
+        department = str(row.get('department') or '').strip()
+        if not department:
+            raise ValueError("missing department")
+        return self._department(department), record
+
+    def import_file(self, path: str, fmt: str | None = None) -> ImportReport:
+        """
+        Imports every row of a CSV or JSONL file.
+
+        Args:
+            path: Path of the feed.
+            fmt: 'csv' or 'jsonl'; guessed from the file extension if None.
+
+        Returns:
+            An ImportReport with counts, rejected rows and throughput.
+        """
+        if fmt is None:
+            fmt = 'csv' if os.path.splitext(path)[1].lower() == '.csv' else 'jsonl'
+        if fmt not in ('csv', 'jsonl'):
+            raise ValueError("Format must be 'csv' or 'jsonl'!")
+
+        report = ImportReport()
+        start = time.perf_counter()
+        batch = []
+        for line_no, row in self._rows(path, fmt):
+            report.rows += 1
+            try:
+                batch.append(self._parse(row))
+            except ValueError as e:
+                report.rejected.append((line_no, str(e)))
+                continue
+
+            if len(batch) >= self.batch_size:
+                self.storage.add_many(self.hospital, batch)
+                report.accepted += len(batch)
+                batch = []
+
+        if batch:
+            self.storage.add_many(self.hospital, batch)
+            report.accepted += len(batch)
+
+        # Persist once for the whole feed
+        self.storage.save(self.hospital)
+        report.seconds = time.perf_counter() - start
+        return report
+
+
+def write_rejects(report: ImportReport, path: str) -> None:
+    """Writes the rejected rows of an import to a CSV file."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['line', 'reason'])
+        writer.writerows(report.rejected)
@@ -0,0 +1,245 @@
+import heapq
+from itertools import islice
+
+from model.hospital import Hospital
+
+
+# Sort keys over (department, record) pairs accepted by Query and the listings
+SORT_KEYS = {
+    'name': lambda entry: entry[1].name.lower(),
+    'age': lambda entry: entry[1].age,
+    'id': lambda entry: entry[1].record_id,
+}
+
+
+class Query:
+    """
+    Composable query over a hospital's patients or staff.
+
+        Query(hospital).department("Cardiology").age_between(40, 60).run()
+        Query(hospital, 'staff').position("Nurse").age_between(None, 29).order_by("age").run()
+
+    Filters are combined with AND. Each department is answered from its
+    most selective secondary index (age range, name prefix or position),
+    and the other filters are checked on the records that index returns.
+    When the results are ordered by an indexed field and that index is
+    used, records stream out already sorted and a limit stops early.
+    explain() describes the plan.
+    """
+
+    def __init__(self, hospital: Hospital, kind: str = 'patients') -> None:
+        """
+        Initializes a query matching every record of one kind.
+
+        Args:
+            hospital: Hospital to query.
+            kind: 'patients' or 'staff'.
+        """
+        # Input validation
+        if not isinstance(hospital, Hospital):
+            raise TypeError("Hospital must be a Hospital object!")
+        if kind not in ('patients', 'staff'):
+            raise ValueError("kind must be 'patients' or 'staff'!")
+
+        self.hospital: Hospital = hospital
+        self.kind: str = kind
+        self._departments: set[str] | None = None
+        self._ages: tuple[int | None, int | None] | None = None
+        self._position: str | None = None
+        self._prefix: str | None = None
+        self._order: str | None = None
+        self._descending: bool = False
+        self._offset: int = 0
+        self._limit: int | None = None
+
+    def department(self, *names: str) -> "Query":
+        """
+        Only matches records of the departments with these names
+        (case-insensitive).
+
+        Raises:
+            ValueError: If the hospital has no department with one of the names.
+        """
+        # Input validation
+        if not all(isinstance(name, str) for name in names):
+            raise TypeError("Department names must be strings!")
+        known = {dept.name.lower() for dept in self.hospital.departments}
+        for name in names:
+            if name.lower() not in known:
+                raise ValueError(f"{name} is not a department of {self.hospital.name}!")
+        self._departments = {name.lower() for name in names}
+        return self
+
+    def age_between(self, low: int | None = None, high: int | None = None) -> "Query":
+        """Only matches records with low <= age <= high; None leaves a side open."""
+        if low is not None and high is not None and low > high:
+            raise ValueError("Lowest age must not be above the highest!")
+        self._ages = (low, high)
+        return self
+
+    def position(self, position: str) -> "Query":
+        """Only matches staff members with this position."""
+        if self.kind != 'staff':
+            raise ValueError("Only staff members have a position!")
+        self._position = position
+        return self
+
+    def name_prefix(self, prefix: str) -> "Query":
+        """Only matches records whose name starts with the prefix (case-insensitive)."""
+        self._prefix = prefix.lower()
+        return self
+
+    def order_by(self, field: str, descending: bool = False) -> "Query":
+        """Sorts the results by 'name', 'age' or 'id'."""
+        if field not in SORT_KEYS:
+            raise ValueError(f"order_by must be one of {', '.join(SORT_KEYS)}!")
+        self._order = field
+        self._descending = descending
+        return self
+
+    def offset(self, offset: int) -> "Query":
+        """Skips the first results."""
+        if offset < 0:
+            raise ValueError("Offset must not be negative!")
+        self._offset = offset
+        return self
+
+    def limit(self, limit: int | None) -> "Query":
+        """Returns at most this many results."""
+        if limit is not None and limit < 0:
+            raise ValueError("Limit must not be negative!")
+        self._limit = limit
+        return self
+
+    def _indexes(self, dept) -> dict:
+        """Returns the department's secondary indexes for the queried kind."""
+        return dept.patient_indexes if self.kind == 'patients' else dept.staff_indexes
+
+    def _accesses(self, dept) -> list[tuple[int, str, str]]:
+        """
+        Returns the ways of reading one department, as
+        (estimated records, index field, description), cheapest first.
+        """
+        indexes = self._indexes(dept)
+        total = len(getattr(dept, self.kind))
+        options = []
+        if self._position is not None:
+            options.append((indexes['position'].count(self._position), 'position',
+                            f"position index = {self._position!r}"))
+        if self._ages is not None:
+            low, high = self._ages
+            options.append((indexes['age'].count(low, high), 'age',
+                            f"age index [{'-inf' if low is None else low}, "
+                            f"{'inf' if high is None else high}]"))
+        if self._prefix is not None:
+            options.append((indexes['name'].count_prefix(self._prefix), 'name',
+                            f"name index prefix {self._prefix!r}"))
+        if not options:
+            # Nothing to narrow down: read in the requested order if it is indexed
+            if self._order in indexes:
+                options.append((total, self._order, f"full {self._order} index"))
+            else:
+                options.append((total, 'scan', "full scan"))
+        options.sort(key=lambda option: option[0])
+        return options
+
+    def _read(self, dept, field: str) -> list:
+        """Reads the records of one department through the chosen index."""
+        indexes = self._indexes(dept)
+        if field == 'position':
+            return indexes['position'].get(self._position)
+        if field == 'age':
+            if self._ages is None:
+                return indexes['age'].range()
+            return indexes['age'].range(*self._ages)
+        if field == 'name':
+            return indexes['name'].prefix(self._prefix or "")
+        return list(getattr(dept, self.kind))
+
+    def _matches(self, record, field: str) -> bool:
+        """Checks the filters that the index used did not already apply."""
+        if field != 'position' and self._position is not None and record.position != self._position:
+            return False
+        if field != 'age' and self._ages is not None:
+            low, high = self._ages
+            if (low is not None and record.age < low) or (high is not None and record.age > high):
+                return False
+        if field != 'name' and self._prefix is not None and not record.name.lower().startswith(self._prefix):
+            return False
+        return True
+
+    def _filter(self, dept, records: list, field: str):
+        """Yields (department, record) for the records that pass the remaining filters."""
+        for record in records:
+            if self._matches(record, field):
+                yield dept, record
+
+    def _plan(self) -> list[tuple[object, int, str, str]]:
+        """Returns (department, estimate, index field, description) per department."""
+        plan = []
+        for dept in self.hospital.departments:
+            if self._departments is not None and dept.name.lower() not in self._departments:
+                continue
+            with dept.lock.read():
+                estimate, field, description = self._accesses(dept)[0]
+            plan.append((dept, estimate, field, description))
+        return plan
+
+    def _stream(self, plan):
+        """Yields matching (department, record) pairs, in result order."""
+        streams = []
+        for dept, _, field, _ in plan:
+            with dept.lock.read():
+                records = self._read(dept, field)
+            if self._descending and field == self._order:
+                records.reverse()
+            streams.append(self._filter(dept, records, field))
+
+        if self._order is None:
+            # Department order, then record ID
+            for stream in streams:
+                yield from sorted(stream, key=SORT_KEYS['id'])
+            return
+
+        key = SORT_KEYS[self._order]
+        if all(field == self._order for _, _, field, _ in plan):
+            # Every department reads in result order: merge lazily
+            yield from heapq.merge(*streams, key=key, reverse=self._descending)
+            return
+        entries = (entry for stream in streams for entry in stream)
+        if self._limit is not None:
+            pick = heapq.nlargest if self._descending else heapq.nsmallest
+            yield from pick(self._offset + self._limit, entries, key=key)
+        else:
+            yield from sorted(entries, key=key, reverse=self._descending)
+
+    def run(self) -> list[tuple[object, object]]:
+        """Returns the matching (department, record) pairs."""
+        end = None if self._limit is None else self._offset + self._limit
+        return list(islice(self._stream(self._plan()), self._offset, end))
+
+    def explain(self) -> str:
+        """Describes how run() would answer the query, one line per step."""
+        plan = self._plan()
+        lines = []
+        for dept, estimate, field, description in plan:
+            checks = [name for name, value, indexed in (
+                ('position', self._position, 'position'), ('age', self._ages, 'age'),
+                ('name prefix', self._prefix, 'name')) if value is not None and indexed != field]
+            lines.append(f"{dept.name}: {description} -> {estimate:,} candidates"
+                         + (f", then check {', '.join(checks)}" if checks else ""))
+        if not plan:
+            lines.append("No department matches")
+
+        if self._order is None:
+            lines.append("Order: department, then ID")
+        elif plan and all(field == self._order for _, _, field, _ in plan):
+            lines.append(f"Order: {self._order}{' descending' if self._descending else ''}, "
+                         "read from the index and merged across departments")
+        else:
+            how = "top-N" if self._limit is not None else "full"
+            lines.append(f"Order: {self._order}{' descending' if self._descending else ''}, "
+                         f"{how} sort after filtering")
+        if self._offset or self._limit is not None:
+            lines.append(f"Offset {self._offset}, limit {self._limit if self._limit is not None else 'none'}")
+        return "\n".join(lines)
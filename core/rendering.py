@@ -0,0 +1,156 @@
+import threading
+from collections import OrderedDict
+
+from model.patient import Patient
+from model.person import Person
+from telemetry import count, registry
+
+
+# Positions of the views in a cache entry, after the record and its fingerprint
+LINE, ROWS, MEDICAL_RECORD = 2, 3, 4
+
+
+class RecordRenderer:
+    """
+    Formats patients and staff members for the CLI screens and the
+    SystemManager listings, so every screen shows a record the same way.
+
+    Views that show a blob-backed medical record, which has to be read and
+    decompressed each time, are kept in a bounded LRU cache, one entry per
+    patient holding every view built so far. An entry stores the record's
+    fingerprint() from when it was built, and a lookup whose fingerprint
+    no longer matches rebuilds it, so a changed name, age or medical
+    record is never shown stale. Records need no hooks or extra fields for
+    this, so building and loading them costs nothing more. Every other
+    view is formatted directly: a cache lookup costs about as much as
+    formatting a few in-memory fields.
+
+    Hits take no lock: each is a few single dictionary operations, which
+    the interpreter runs atomically. Only misses, which add or evict
+    entries, hold the lock.
+    """
+
+    def __init__(self, cache_size: int = 65536) -> None:
+        """
+        Initializes an empty renderer.
+
+        Args:
+            cache_size: Maximum number of patients whose views are kept.
+        """
+        # Input validation
+        if not isinstance(cache_size, int) or cache_size < 0:
+            raise ValueError("cache_size must be a non-negative integer!")
+
+        self.cache_size: int = cache_size
+        # id(record) -> [record, fingerprint, line, rows, medical record];
+        # holding the record keeps its id from being reused while the entry lives
+        self._cache: OrderedDict[int, list] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Returns the number of records with cached views."""
+        return len(self._cache)
+
+    def _cached(self, record: Person) -> bool:
+        """Returns True if the record's views go through the cache."""
+        return bool(self.cache_size) and isinstance(record, Patient) and record.blob_backed
+
+    def _render(self, record: Person, view: int, build):
+        """Returns a view of the record from the cache, building it with build(record) if needed."""
+        fingerprint = record.fingerprint()
+        key = id(record)
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] is record and entry[1] == fingerprint:
+            text = entry[view]
+            if text is not None:
+                try:
+                    self._cache.move_to_end(key)
+                except KeyError:
+                    pass    # Evicted meanwhile by another thread
+                if registry.enabled:
+                    count('hospital_render_cache_total', result='hit')
+                return text
+
+        # Built outside the lock: a blob-backed medical record may be read from disk
+        text = build(record)
+        if registry.enabled:
+            count('hospital_render_cache_total', result='miss')
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or entry[0] is not record or entry[1] != fingerprint:
+                entry = self._cache[key] = [record, fingerprint, None, None, None]
+            entry[view] = text
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return text
+
+    def line(self, record: Person) -> str:
+        """Returns the record's one-line listing, as view_info() formats it."""
+        if self._cached(record):
+            return self._render(record, LINE, _view_info)
+        return record.view_info()
+
+    def rows(self, record: Person) -> tuple[str, ...]:
+        """
+        Returns the record's labelled fields for detail screens, one per
+        row: ID, name, age, then medical record or position.
+        """
+        if self._cached(record):
+            return self._render(record, ROWS, _rows)
+        return _rows(record)
+
+    def summary(self, record: Person) -> str:
+        """Returns the record's name with its ID and one distinguishing field."""
+        # Shows no medical record, so there is nothing worth caching
+        return _summary(record)
+
+    def medical_record(self, patient: Patient) -> str:
+        """Returns the patient's medical record view, as view_record() formats it."""
+        if self._cached(patient):
+            return self._render(patient, MEDICAL_RECORD, Patient.view_record)
+        return patient.view_record()
+
+    def lines(self, records, cache: bool = True):
+        """
+        Yields the one-line listing of every record.
+
+        Args:
+            cache: Use the cache; listings larger than the cache should
+                not, since every line would miss and evict the views that
+                pages and searches keep coming back to.
+        """
+        if cache and self.cache_size:
+            for record in records:
+                if isinstance(record, Patient) and record.blob_backed:
+                    yield self._render(record, LINE, _view_info)
+                else:
+                    yield record.view_info()
+        else:
+            for record in records:
+                yield record.view_info()
+
+    def clear(self) -> None:
+        """Drops every cached view."""
+        with self._lock:
+            self._cache.clear()
+
+
+def _view_info(record: Person) -> str:
+    """Builds the one-line listing; every record class formats its own."""
+    return record.view_info()
+
+
+def _rows(record: Person) -> tuple[str, ...]:
+    """Builds the labelled field rows of a patient or staff member."""
+    rows = (f"ID: {record.record_id}", f"Name: {record.name}", f"Age: {record.age}")
+    if isinstance(record, Patient):
+        return rows + (f"Medical Record: {record.medical_record}",)
+    return rows + (f"Position: {record.position}",)
+
+
+def _summary(record: Person) -> str:
+    """Builds the one-line summary shown before deleting a record."""
+    if isinstance(record, Patient):
+        return f"{record.name} (ID: {record.record_id}, Age: {record.age})"
+    return f"{record.name} (ID: {record.record_id}, Position: {record.position})"
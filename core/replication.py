@@ -0,0 +1,321 @@
+import json
+import queue
+import socket
+import socketserver
+import threading
+import time
+
+from model.events import ChangeEvent, apply_event, record_fields
+from model.hospital import Hospital
+from model.patient import Patient
+from storage.base import Repository
+from telemetry import count, set_gauge
+
+
+class _Follower:
+    """A connected follower's queue of live events."""
+
+    def __init__(self, size: int) -> None:
+        self.events: queue.Queue = queue.Queue(size)
+        # Set when the follower could not keep up; it is then disconnected
+        # and catches up from the event log when it reconnects
+        self.overflowed = False
+
+
+class _FollowerHandler(socketserver.StreamRequestHandler):
+    """Serves one follower connection for an EventPublisher."""
+
+    def handle(self) -> None:
+        self.server.publisher._serve(self.rfile, self.wfile)
+
+
+class EventPublisher:
+    """
+    Streams a hospital's change events to followers over TCP, one JSON
+    message per line.
+
+    A follower sends {"after": SEQ} with the last sequence number it has
+    applied. If the event log holds every later event, those are sent
+    first. Otherwise, and always for SEQ 0, the follower gets a 'reset'
+    message, the current state as events and a 'synced' message. Live
+    events follow, plus a 'heartbeat' carrying the latest sequence
+    number whenever the stream is idle, so followers can measure their
+    lag.
+    """
+
+    def __init__(self, hospital: Hospital, log=None, host: str = "127.0.0.1", port: int = 0,
+                 heartbeat: float = 1.0, backlog: int = 10000) -> None:
+        """
+        Initializes the publisher; start() begins accepting followers.
+
+        Args:
+            hospital: Hospital whose changes are published.
+            log: Optional EventLog attached to the hospital, for catch-up.
+            host: Interface to listen on.
+            port: TCP port, or 0 for any free port.
+            heartbeat: Idle seconds between heartbeats.
+            backlog: Events buffered per follower before it is dropped.
+        """
+        # Input validation
+        if not isinstance(hospital, Hospital):
+            raise TypeError("Hospital must be a Hospital object!")
+
+        self.hospital: Hospital = hospital
+        self.log = log
+        self.heartbeat: float = heartbeat
+        self.backlog: int = backlog
+        self._followers: list[_Follower] = []
+        self._lock = threading.Lock()
+        self._closing = threading.Event()
+        self._server = socketserver.ThreadingTCPServer((host, port), _FollowerHandler,
+                                                       bind_and_activate=False)
+        self._server.daemon_threads = True
+        self._server.allow_reuse_address = True
+        self._server.publisher = self
+        self._thread: threading.Thread | None = None
+
+    @property
+    def port(self) -> int:
+        """Port the publisher listens on."""
+        return self._server.server_address[1]
+
+    @property
+    def follower_count(self) -> int:
+        """Number of connected followers."""
+        return len(self._followers)
+
+    def start(self) -> "EventPublisher":
+        """Starts accepting followers in a background thread."""
+        self._server.server_bind()
+        self._server.server_activate()
+        self.hospital.subscribe(self._on_change)
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="event-publisher", daemon=True)
+        self._thread.start()
+        return self
+
+    def _on_change(self, event: ChangeEvent) -> None:
+        """Queues a change for every follower; runs on a writer thread."""
+        for follower in self._followers:
+            try:
+                follower.events.put_nowait(event)
+            except queue.Full:
+                follower.overflowed = True
+        count('hospital_events_published_total')
+
+    @staticmethod
+    def _send(wfile, message: dict) -> None:
+        """Writes one message line."""
+        wfile.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b"\n")
+
+    def _catch_up(self, wfile, after: int) -> int:
+        """
+        Sends what a follower that applied events up to `after` is missing,
+        up to some sequence number, and returns that number. Live events at
+        or below it are skipped afterwards.
+        """
+        if after and self.log is not None and self.log.covers(after) \
+                and after <= self.hospital.event_seq:
+            for event in self.log.events(after):
+                self._send(wfile, dict(event.as_dict(), type='event'))
+                after = event.seq
+            return after
+
+        # Start over from the current state. Changes made while the state is
+        # read may show up in it and again as live events; applying events
+        # is idempotent, so that is harmless.
+        seq = self.hospital.event_seq
+        self._send(wfile, {'type': 'reset', 'seq': seq, 'name': self.hospital.name,
+                           'location': self.hospital.location})
+        for index, (dept, patients, staff) in enumerate(self.hospital.snapshot()):
+            self._send(wfile, dict(ChangeEvent(seq, 'add_department', index,
+                                               {'name': dept.name}).as_dict(), type='event'))
+            for op, records in (('add_patient', patients), ('add_staff', staff)):
+                for record in records:
+                    self._send(wfile, dict(ChangeEvent(seq, op, index, record_fields(record)).as_dict(),
+                                           type='event'))
+        self._send(wfile, {'type': 'synced', 'seq': seq})
+        return seq
+
+    def _serve(self, rfile, wfile) -> None:
+        """Streams events to one follower until it disconnects or falls behind."""
+        request = json.loads(rfile.readline() or b"{}")
+        follower = _Follower(self.backlog)
+        # Registered before catching up, so no change falls in between
+        with self._lock:
+            self._followers = self._followers + [follower]
+        try:
+            sent = self._catch_up(wfile, int(request.get('after', 0)))
+            wfile.flush()
+            while not self._closing.is_set() and not follower.overflowed:
+                try:
+                    event = follower.events.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    self._send(wfile, {'type': 'heartbeat', 'seq': self.hospital.event_seq,
+                                       'time': time.time()})
+                    wfile.flush()
+                    continue
+                if event.seq > sent:
+                    self._send(wfile, dict(event.as_dict(), type='event'))
+                    sent = event.seq
+                if follower.events.empty():
+                    wfile.flush()
+        except OSError:
+            pass    # The follower went away
+        finally:
+            with self._lock:
+                self._followers = [f for f in self._followers if f is not follower]
+
+    def close(self) -> None:
+        """Stops publishing and disconnects the followers."""
+        self._closing.set()
+        self.hospital.unsubscribe(self._on_change)
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+
+class Replica:
+    """
+    Read-only copy of a hospital kept current by following an
+    EventPublisher. It reconnects on its own and resumes after the last
+    event it applied.
+
+    Lag is measured in events (latest sequence number announced by the
+    publisher minus the last one applied) and in seconds (age of the last
+    applied change when it was applied), and exported as the
+    hospital_replica_lag_events and hospital_replica_lag_seconds gauges.
+    """
+
+    def __init__(self, host: str, port: int, after: int = 0, retry: float = 1.0) -> None:
+        """
+        Initializes the replica; start() begins following.
+
+        Args:
+            host: Publisher host.
+            port: Publisher port.
+            after: Last sequence number already applied (0: start from the
+                publisher's current state).
+            retry: Seconds between reconnection attempts.
+        """
+        self.host: str = host
+        self.port: int = port
+        self.retry: float = retry
+        self.hospital: Hospital = Hospital("Replica", "")
+        self.applied_seq: int = after
+        self.head_seq: int = after
+        self.lag_seconds: float = 0.0
+        self.events_applied: int = 0
+        self.synced = threading.Event()
+        # Record IDs received while a reset is in progress
+        self._reset_ids: set[int] | None = None
+        self._closing = threading.Event()
+        self._socket: socket.socket | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def lag_events(self) -> int:
+        """Number of published events not applied yet."""
+        return max(0, self.head_seq - self.applied_seq)
+
+    def start(self) -> "Replica":
+        """Starts following in a background thread."""
+        self._thread = threading.Thread(target=self._run, name="replica", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait_synced(self, timeout: float | None = None) -> bool:
+        """Waits until the replica has caught up once; returns False on timeout."""
+        return self.synced.wait(timeout)
+
+    def _run(self) -> None:
+        """Follows the publisher, reconnecting until close()."""
+        while not self._closing.is_set():
+            try:
+                self._follow()
+            except (OSError, ValueError):
+                count('hospital_replica_reconnects_total')
+            self._closing.wait(self.retry)
+
+    def _follow(self) -> None:
+        """Follows one connection until it ends."""
+        with socket.create_connection((self.host, self.port)) as sock:
+            self._socket = sock
+            sock.sendall(json.dumps({'after': self.applied_seq}).encode('utf-8') + b"\n")
+            with sock.makefile('rb') as f:
+                for line in f:
+                    self._handle(json.loads(line))
+                    if self._closing.is_set():
+                        break
+        self._socket = None
+
+    def _handle(self, message: dict) -> None:
+        """Applies one message from the publisher."""
+        kind = message['type']
+        if kind == 'event':
+            event = ChangeEvent.from_dict(message)
+            if self._reset_ids is not None and event.op in ('add_patient', 'add_staff'):
+                self._reset_ids.add(event.data['id'])
+            if apply_event(self.hospital, event):
+                self.events_applied += 1
+                count('hospital_replica_events_total')
+            if self._reset_ids is None:
+                self.applied_seq = max(self.applied_seq, event.seq)
+                self.lag_seconds = max(0.0, time.time() - event.time)
+            self.head_seq = max(self.head_seq, event.seq)
+        elif kind == 'reset':
+            self.hospital.name = message['name']
+            self.hospital.location = message['location']
+            self._reset_ids = set()
+        elif kind == 'synced':
+            # Records that were deleted while this replica was away; nothing
+            # to compare with if no reset came first
+            if self._reset_ids is not None:
+                for record_id in set(self.hospital.records) - self._reset_ids:
+                    department, record = self.hospital.get_record(record_id)
+                    if isinstance(record, Patient):
+                        department.remove_patient(record)
+                    else:
+                        department.remove_staff_member(record)
+            self._reset_ids = None
+            self.applied_seq = self.head_seq = message['seq']
+            self.synced.set()
+        elif kind == 'heartbeat':
+            self.head_seq = message['seq']
+            if not self.lag_events:
+                self.lag_seconds = 0.0
+        set_gauge('hospital_replica_lag_events', self.lag_events)
+        set_gauge('hospital_replica_lag_seconds', self.lag_seconds)
+
+    def close(self) -> None:
+        """Stops following."""
+        self._closing.set()
+        if self._socket is not None:
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class ReplicaStorage(Repository):
+    """
+    Repository over a replica's hospital: searches work as usual, and
+    every change is refused, since changes must go to the primary.
+    """
+
+    def _refuse(self, *args, **kwargs) -> None:
+        """Refuses a change."""
+        raise PermissionError("This is a read-only replica!")
+
+    load = create = add_department = add_patient = add_staff_member = add_many = _refuse
+    delete_patient = delete_staff_member = transfer_patient = _refuse
+    generate_shifts = book_next_free = cancel_appointment = _refuse
+    set_bed_capacity = triage_arrive = retriage = admit_next = discharge_patient = _refuse
+
+    def save(self, hospital) -> None:
+        """Nothing to save: the primary owns the data."""
@@ -1,28 +1,147 @@
+import sys
+from itertools import islice
+
+from model.department import Department
 from model.hospital import Hospital
+from .query import Query, SORT_KEYS
+from .rendering import RecordRenderer
 
 
 class SystemManager:
     """
     This class for system manager, managing hospital system
     """
-    def __init__(self, hospital: Hospital) -> None:
-        """Initializes the System Manager with a Hospital instance."""
+    def __init__(self, hospital: Hospital, renderer: RecordRenderer | None = None) -> None:
+        """
+        Initializes the System Manager with a Hospital instance.
+
+        Args:
+            renderer: Formats the listed records; a new one if None. The CLI
+                screens share it, so they reuse each other's cached views.
+        """
         # Input validation
         if not isinstance(hospital, Hospital):
             raise TypeError("Hospital must be a Hospital object!")
-            
+
         self.hospital: Hospital = hospital
+        self.renderer: RecordRenderer = renderer if renderer is not None else RecordRenderer()
+
+    def _departments(self, department: str | None) -> list[Department]:
+        """
+        Returns every department, or only those with the given name
+        (case-insensitive, as in Query.department()).
+
+        Raises:
+            ValueError: If no department has the given name.
+        """
+        if department is None:
+            return self.hospital.departments
+        found = [dept for dept in self.hospital.departments
+                 if dept.name.lower() == department.lower()]
+        if not found:
+            raise ValueError(f"{department} is not a department of {self.hospital.name}!")
+        return found
+
+    def _iter_records(self, kind: str, department: str | None, sort_by: str | None,
+                      offset: int, limit: int | None):
+        """Yields (department, record) pairs lazily, optionally sorted."""
+        if sort_by is None:
+            for dept in self._departments(department):
+                records = getattr(dept, kind)
+                # Whole departments before the requested page are skipped by size
+                if offset >= len(records):
+                    offset -= len(records)
+                    continue
+                entries = ((dept, record) for record in records)
+                yield from islice(entries, offset, None)
+                offset = 0
+            return
+
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"sort_by must be one of {', '.join(SORT_KEYS)}!")
+        # Name and age orders are read from the departments' sorted indexes
+        query = Query(self.hospital, kind).order_by(sort_by).offset(offset).limit(limit)
+        if department is not None:
+            query.department(department)
+        yield from query.run()
+
+    def iter_patients(self, department: str | None = None, sort_by: str | None = None,
+                      offset: int = 0, limit: int | None = None):
+        """
+        Yields (department, patient) pairs lazily.
+
+        Args:
+            department: Only list this department (by name).
+            sort_by: 'name', 'age' or 'id'; department order if None.
+            offset: Number of entries to skip.
+            limit: Maximum number of entries to yield.
+        """
+        return islice(self._iter_records('patients', department, sort_by, offset, limit), limit)
+
+    def iter_staff(self, department: str | None = None, sort_by: str | None = None,
+                   offset: int = 0, limit: int | None = None):
+        """
+        Yields (department, staff member) pairs lazily.
+
+        Takes the same arguments as iter_patients().
+        """
+        return islice(self._iter_records('staff', department, sort_by, offset, limit), limit)
+
+    def count_patients(self, department: str | None = None) -> int:
+        """Returns the number of patients, from the maintained statistics."""
+        if department is None:
+            return self.hospital.stats.patient_count
+        return sum(dept.stats.patient_count for dept in self._departments(department))
+
+    def count_staff(self, department: str | None = None) -> int:
+        """Returns the number of staff members, from the maintained statistics."""
+        if department is None:
+            return self.hospital.stats.staff_count
+        return sum(dept.stats.staff_count for dept in self._departments(department))
+
+    def _write(self, entries, out, limit: int | None, chunk: int = 1000) -> int:
+        """
+        Writes record views in large chunks instead of one print per record.
+        Pages go through the render cache; longer listings bypass it.
+        """
+        out = out or sys.stdout
+        lines = []
+        written = 0
+        cache = limit is not None and limit <= self.renderer.cache_size
+        records = (record for _, record in entries)
+        for line in self.renderer.lines(records, cache):
+            lines.append(line)
+            if len(lines) >= chunk:
+                out.write("\n".join(lines) + "\n")
+                written += len(lines)
+                lines = []
+        if lines:
+            out.write("\n".join(lines) + "\n")
+            written += len(lines)
+        return written
+
+    def display_all_patients(self, department: str | None = None, sort_by: str | None = None,
+                             offset: int = 0, limit: int | None = None, out=None) -> int:
+        """
+        Displays info for all patients in every department, or one page of them.
+
+        Returns:
+            The number of patients displayed.
+        """
+        (out or sys.stdout).write(f"\n--- Patient List for {self.hospital.name} ---\n")
+        return self._write(self.iter_patients(department, sort_by, offset, limit), out, limit)
+
+    def display_all_staff(self, department: str | None = None, sort_by: str | None = None,
+                          offset: int = 0, limit: int | None = None, out=None) -> int:
+        """
+        Displays info for all staff members in every department, or one page of them.
+
+        Returns:
+            The number of staff members displayed.
+        """
+        (out or sys.stdout).write(f"\n--- Staff List for {self.hospital.name} ---\n")
+        return self._write(self.iter_staff(department, sort_by, offset, limit), out, limit)
 
-    def display_all_patients(self) -> None:
-        """Displays info for all patients in every department."""
-        print(f"\n--- Patient List for {self.hospital.name} ---")
-        for dept in self.hospital.departments:
-            for patient in dept.patients:
-                print(patient.view_info())
-
-    def display_all_staff(self) -> None:
-        """Displays info for all staff members in every department."""
-        print(f"\n--- Staff List for {self.hospital.name} ---")
-        for dept in self.hospital.departments:
-            for member in dept.staff:
-                print(member.view_info())
+    def get_statistics(self) -> dict:
+        """Returns hospital-wide and per-department statistics."""
+        return self.hospital.statistics()
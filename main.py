@@ -1,22 +1,94 @@
 """
 Hospital Management System - Main Application
 A CLI interface for managing hospital patients, staff, and departments.
-With JSON data persistence.
+With JSON (journaled) or SQLite data persistence.
 """
 # Import required modules
+import argparse
+import contextlib
+import csv
 import json
 import os
-from model import Patient, Staff, Department, Hospital, Person
-from core import SystemManager
+import sys
+import time
+import telemetry
+from datetime import datetime
+from model import Patient, Staff, Department, Hospital, Person, TRIAGE_LEVELS
+# core (asyncio, the HTTP server) is imported where it is used, so the
+# read-only subcommands start without it
+from storage import (BinaryStorage, BlobStore, EventLog, JsonStorage, SqliteStorage,
+                     WriterLock)
 
 
+# Directory holding the data files
+DATA_DIR = os.environ.get("HOSPITAL_DATA_DIR", os.path.join(os.path.dirname(__file__), "data"))
+
 # Path to the data file
-DATA_FILE = os.path.join(os.path.dirname(__file__), "data", "hospital_data.json")
+DATA_FILE = os.path.join(DATA_DIR, "hospital_data.json")
+
+# Path to the journal of changes made since the last snapshot
+JOURNAL_FILE = os.path.join(DATA_DIR, "hospital_data.journal")
+
+# Path to the SQLite database used by the sqlite backend
+DB_FILE = os.path.join(DATA_DIR, "hospital_data.db")
+
+# Blob store holding medical records out of line (JSON backend, HOSPITAL_BLOBS=1)
+BLOB_FILE = os.path.join(DATA_DIR, "hospital_data.blobs")
+
+# Full-text index over medical records, saved with the JSON snapshot
+INDEX_FILE = os.path.join(DATA_DIR, "hospital_data.index")
+
+# Sidecar index saved with the JSON snapshot, answering the read-only
+# subcommands without loading the hospital
+LOOKUP_FILE = os.path.join(DATA_DIR, "hospital_data.lookup")
+
+# Paths of the snapshot and journal used by the binary backend
+BINARY_FILE = os.path.join(DATA_DIR, "hospital_data.bin")
+BINARY_JOURNAL_FILE = os.path.join(DATA_DIR, "hospital_data.bin.journal")
+BINARY_INDEX_FILE = os.path.join(DATA_DIR, "hospital_data.bin.index")
+
+# Lock file held by the one process that may change the data files
+LOCK_FILE = os.path.join(DATA_DIR, "hospital_data.lock")
+
+# Log of change events that replicas catch up from (see tools/replica.py)
+EVENT_LOG_FILE = os.path.join(DATA_DIR, "hospital_data.events")
+
+# Port that change events are published on to replicas; not published if unset
+PUBLISH_PORT = os.environ.get("HOSPITAL_PUBLISH_PORT")
+
+# Interface the change events are published on. Events carry every name and
+# medical record without authentication, so only this machine is served
+# unless another interface is set explicitly.
+PUBLISH_HOST = os.environ.get("HOSPITAL_PUBLISH_HOST", "127.0.0.1")
+
+# Records shown per page in the patient and staff listings
+PAGE_SIZE = 20
+
+# Storage backend: "json" (default), "sqlite" or "binary"
+STORAGE_BACKEND = os.environ.get("HOSPITAL_STORAGE", "json")
+
+# Keep medical records in BLOB_FILE and load them only when shown. Once the
+# blob file exists it is always opened, since the data file refers to it.
+USE_BLOBS = os.environ.get("HOSPITAL_BLOBS", "0") == "1" or os.path.exists(BLOB_FILE)
+
+# Quiet seconds after the last change before the JSON or binary snapshot is
+# rewritten by a background thread (changes are journaled immediately)
+SAVE_DELAY = float(os.environ.get("HOSPITAL_SAVE_DELAY", "2"))
+
+# Metrics are recorded unless HOSPITAL_METRICS=0
+METRICS_ENABLED = os.environ.get("HOSPITAL_METRICS", "1") != "0"
+
+# Optional Prometheus text file refreshed on every save
+METRICS_FILE = os.environ.get("HOSPITAL_METRICS_FILE")
 
 
 def clear_screen():
     """Clears the terminal screen."""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    if os.name == 'nt':
+        os.system('cls')
+    elif sys.stdout.isatty():
+        # ANSI: clear the screen and move the cursor home, without a subprocess
+        print("\033[2J\033[H", end="", flush=True)
 
 
 def print_header(title: str):
@@ -46,110 +118,162 @@ def print_menu(hospital_name: str):
     print("║   [10]  Search Staff                                     ║")
     print("║   [11]  Delete Patient                                   ║")
     print("║   [12]  Delete Staff                                     ║")
+    print("║   [13]  View Record by ID                                ║")
+    print("║   [14]  Delete Record by ID                              ║")
+    print("║   [15]  Bulk Import (CSV/JSONL)                          ║")
+    print("║   [16]  Diagnostics                                      ║")
+    print("║   [17]  Search Medical Records                           ║")
+    print("║   [18]  Query Records                                    ║")
+    print("║   [19]  Appointments                                     ║")
+    print("║   [20]  Triage & Beds                                    ║")
     print("║   [0]  Exit                                              ║")
     print("║                                                          ║")
     print("╚══════════════════════════════════════════════════════════╝")
 
 
+def report_load_progress(bytes_read: int, total_bytes: int):
+    """Prints loading progress for large data files."""
+    percent = 100 * bytes_read // total_bytes if total_bytes else 100
+    print(f"\r  Loading... {percent:3d}% ({bytes_read // (1 << 20)} MiB)", end="", flush=True)
+
+
+def open_storage():
+    """Opens the storage backend selected by HOSPITAL_STORAGE (json, sqlite or binary)."""
+    if STORAGE_BACKEND == "sqlite":
+        return SqliteStorage(DB_FILE)
+    if STORAGE_BACKEND == "binary":
+        return BinaryStorage(BINARY_FILE, BINARY_JOURNAL_FILE, index_path=BINARY_INDEX_FILE)
+    if STORAGE_BACKEND == "json":
+        blobs = BlobStore(BLOB_FILE) if USE_BLOBS else None
+        return JsonStorage(DATA_FILE, JOURNAL_FILE, progress=report_load_progress, blobs=blobs,
+                           index_path=INDEX_FILE, lookup_path=LOOKUP_FILE)
+    raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+
+
+def take_writer_lock():
+    """Takes the writer lock for the menu, or exits if another process holds it."""
+    try:
+        writer_lock.acquire()
+    except PermissionError as e:
+        print(f"\n  {e}")
+        print("  Close it first, or make the change through it (e.g. the API server).")
+        sys.exit(1)
+
+
+def peek_data() -> tuple[str, int] | None:
+    """
+    Returns the hospital name and number of departments for the menu's
+    first screen from the storage's lookup view, without loading the
+    hospital. Returns None if nothing is stored yet or there is no
+    up-to-date view, in which case the hospital is loaded straight away.
+    """
+    if not storage.exists():
+        return None
+    index = open_lookup()
+    if index is None:
+        return None
+    with index:
+        return index.name, len(index.departments)
+
+
 def load_data() -> Hospital:
-    """Loads hospital data from JSON file."""
+    """
+    Loads hospital data from the storage backend. A new hospital is only
+    created if nothing is stored yet; if stored data cannot be read the
+    program exits, so it is never saved over.
+    """
+    take_writer_lock()
     try:
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Create hospital
-        hospital = Hospital(
-            data['hospital']['name'],
-            data['hospital']['location']
-        )
-        
-        # Load departments
-        for dept_data in data['departments']:
-            department = Department(dept_data['name'])
-            
-            # Load patients
-            for patient_data in dept_data['patients']:
-                patient = Patient(
-                    patient_data['name'],
-                    patient_data['age'],
-                    patient_data['medical_record']
-                )
-                department.patients.append(patient)
-            
-            # Load staff
-            for staff_data in dept_data['staff']:
-                staff_member = Staff(
-                    staff_data['name'],
-                    staff_data['age'],
-                    staff_data['position']
-                )
-                department.staff.append(staff_member)
-            
-            hospital.departments.append(department)
-        
-        return hospital
+        if not storage.exists():
+            print("  Data file not found. Creating new hospital...")
+            return storage.create("Cairo Hospital", "Cairo, Egypt")
+        return storage.load()
     # Exception handling    
-    except FileNotFoundError:
-        print("  Data file not found. Creating new hospital...")
-        return Hospital("Cairo Hospital", "Cairo, Egypt")
-    except json.JSONDecodeError:
-        print("  Error reading data file. Creating new hospital...")
-        return Hospital("Cairo Hospital", "Cairo, Egypt")
+    except Exception as e:
+        print(f"\n  Error reading data file: {e}")
+        print("  Nothing was changed. Repair or restore the data files and start again.")
+        sys.exit(1)
+
+
+def start_session() -> tuple:
+    """
+    Loads the hospital for the menu and starts saving changes in the
+    background and publishing them.
+
+    Returns:
+        The hospital, its SystemManager and the change feed's publisher
+        (None if changes are not published).
+    """
+    from core import SystemManager
+
+    print(" Loading data from file...")
+    hospital = load_data()
+    if isinstance(storage, JsonStorage):
+        storage.start_worker(hospital, SAVE_DELAY)
+    publisher = start_change_feed(hospital)
+    return hospital, SystemManager(hospital), publisher
+
+
+def start_change_feed(hospital: Hospital) -> "EventPublisher | None":
+    """Logs and publishes change events for replicas if HOSPITAL_PUBLISH_PORT is set."""
+    from core import EventPublisher
+
+    if not PUBLISH_PORT:
+        return None
+    log = EventLog(EVENT_LOG_FILE)
+    log.attach(hospital)
+    publisher = EventPublisher(hospital, log, host=PUBLISH_HOST, port=int(PUBLISH_PORT)).start()
+    print(f" Publishing changes on {PUBLISH_HOST}:{publisher.port}")
+    return publisher
+
+
+def stop_change_feed(publisher: "EventPublisher | None"):
+    """Disconnects the replicas and closes the event log."""
+    if publisher is not None:
+        publisher.close()
+        publisher.log.close()
 
 
 def save_data(hospital: Hospital):
-    """Saves hospital data to JSON file."""
-    data = {
-        'hospital': {
-            'name': hospital.name,
-            'location': hospital.location
-        },
-        'departments': []
-    }
-    
-    for dept in hospital.departments:
-        dept_data = {
-            'name': dept.name,
-            'patients': [
-                {
-                    'name': p.name,
-                    'age': p.age,
-                    'medical_record': p.medical_record
-                }
-                for p in dept.patients
-            ],
-            'staff': [
-                {
-                    'name': s.name,
-                    'age': s.age,
-                    'position': s.position
-                }
-                for s in dept.staff
-            ]
-        }
-        data['departments'].append(dept_data)
-    
-    # Ensure data directory exists
-    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-    
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
-    
+    """Saves hospital data through the storage backend."""
+    # With a background worker only pending changes need writing, and an
+    # in-progress background save is waited for
+    if getattr(storage, 'worker', None) is not None:
+        storage.worker.flush()
+    else:
+        storage.save(hospital)
+    if METRICS_FILE:
+        telemetry.write_prometheus(METRICS_FILE)
     print("\n Data saved successfully!")
 
 
-def view_all_patients(manager: SystemManager):
-    """Displays all patients in the hospital."""
-    print_header("ALL PATIENTS")
-    manager.display_all_patients()
-    input("\nPress Enter to return to main menu...")
+def page_through(title: str, display, total: int):
+    """Shows a listing one page at a time."""
+    pages = max(1, -(-total // PAGE_SIZE))
+    page = 0
+    while True:
+        clear_screen()
+        print_header(title)
+        display(offset=page * PAGE_SIZE, limit=PAGE_SIZE)
+        print(f"\n Page {page + 1} of {pages} ({total} records)")
+        
+        choice = input("\n[n] Next  [p] Previous  [Enter] Main menu: ").strip().lower()
+        if choice == 'n' and page + 1 < pages:
+            page += 1
+        elif choice == 'p' and page > 0:
+            page -= 1
+        elif choice not in ('n', 'p'):
+            return
 
 
-def view_all_staff(manager: SystemManager):
-    """Displays all staff members in the hospital."""
-    print_header("ALL STAFF")
-    manager.display_all_staff()
-    input("\nPress Enter to return to main menu...")
+def view_all_patients(manager: "SystemManager"):
+    """Displays all patients in the hospital, one page at a time."""
+    page_through("ALL PATIENTS", manager.display_all_patients, manager.count_patients())
+
+
+def view_all_staff(manager: "SystemManager"):
+    """Displays all staff members in the hospital, one page at a time."""
+    page_through("ALL STAFF", manager.display_all_staff, manager.count_staff())
 
 
 def view_all_departments(hospital: Hospital):
@@ -191,11 +315,9 @@ def add_patient(hospital: Hospital):
         
         if 0 <= dept_choice < len(hospital.departments):
             patient = Patient(name, age, medical_record)
-            hospital.departments[dept_choice].add_patient(patient)
+            # Auto-saved by the storage backend
+            storage.add_patient(hospital, hospital.departments[dept_choice], patient)
             print(f"\n Patient '{name}' added successfully!")
-            
-            # Auto-save
-            save_data(hospital)
         else:
             print(" Invalid department selection!")
             
@@ -231,11 +353,9 @@ def add_staff(hospital: Hospital):
         
         if 0 <= dept_choice < len(hospital.departments):
             staff_member = Staff(name, age, position)
-            hospital.departments[dept_choice].add_staff_member(staff_member)
+            # Auto-saved by the storage backend
+            storage.add_staff_member(hospital, hospital.departments[dept_choice], staff_member)
             print(f"\n Staff '{name}' added successfully!")
-            
-            # Auto-save
-            save_data(hospital)
         else:
             print(" Invalid department selection!")
             
@@ -255,39 +375,69 @@ def add_department(hospital: Hospital):
         print(" Department name cannot be empty!")
     else:
         department = Department(name)
-        hospital.add_department(department)
+        # Auto-saved by the storage backend
+        storage.add_department(hospital, department)
         print(f"\n Department '{name}' added successfully!")
-        
-        # Auto-save
-        save_data(hospital)
     
     input("\nPress Enter to return to main menu...")
 
 
+def format_age(age: float | None) -> str:
+    """Formats an average age for display."""
+    return "-" if age is None else f"{age:.1f}"
+
+
 def show_statistics(hospital: Hospital):
     """Displays hospital statistics."""
     print_header("HOSPITAL STATISTICS")
     
-    total_patients = sum(len(dept.patients) for dept in hospital.departments)
-    total_staff = sum(len(dept.staff) for dept in hospital.departments)
+    # Maintained aggregates: no scan over the records
+    stats = hospital.stats
     
     print(f"\n    Hospital: {hospital.name}")
     print(f"    Location: {hospital.location}")
     print("\n   ┌─────────────────────────────────────┐")
     print(f"   │  Departments:     {len(hospital.departments):<15}│")
-    print(f"   │  Total Patients:  {total_patients:<15}│")
-    print(f"   │  Total Staff:     {total_staff:<15}│")
+    print(f"   │  Total Patients:  {stats.patient_count:<15}│")
+    print(f"   │  Total Staff:     {stats.staff_count:<15}│")
+    print(f"   │  Mean Age:        {format_age(stats.mean_age()):<15}│")
+    print(f"   │  Median Age:      {format_age(stats.median_age()):<15}│")
     print("   └─────────────────────────────────────┘")
     
     if hospital.departments:
         print("\n   Department Breakdown:")
         for dept in hospital.departments:
-            print(f"   ├── {dept.name}: {len(dept.patients)} patients, {len(dept.staff)} staff")
+            print(f"   ├── {dept.name}: {dept.stats.patient_count} patients, "
+                  f"{dept.stats.staff_count} staff, mean age {format_age(dept.stats.mean_age())}, "
+                  f"median age {format_age(dept.stats.median_age())}")
+    
+    if stats.age_counts:
+        print("\n   Patients by Age:")
+        for bucket, count in stats.age_histogram().items():
+            print(f"   ├── {bucket:>7}: {count}")
+    
+    if stats.positions:
+        print("\n   Staff by Position:")
+        for position, count in sorted(stats.positions.items()):
+            print(f"   ├── {position}: {count}")
     
     input("\nPress Enter to return to main menu...")
 
 
-def search_patient(hospital: Hospital):
+def format_distance(distance: int) -> str:
+    """Describes how far a fuzzy name match is from the query."""
+    if not distance:
+        return ""
+    return f" ({distance} typo{'s' if distance > 1 else ''} away)"
+
+
+def print_rows(rows: tuple[str, ...], name_note: str = ""):
+    """Prints a record's labelled rows, with a note after the name (second) row."""
+    for i, row in enumerate(rows):
+        print(f"   {row}{name_note if i == 1 else ''}")
+
+
+def search_patient(hospital: Hospital, renderer: "RecordRenderer"):
     """Searches for a patient by name."""
     print_header("SEARCH PATIENT")
     
@@ -297,23 +447,319 @@ def search_patient(hospital: Hospital):
         input("\nPress Enter to return to main menu...")
         return
     
-    found = False
-    for dept in hospital.departments:
-        for patient in dept.patients:
-            if name in patient.name.lower():
-                found = True
-                print(f"\n Found in {dept.name} department:")
-                print(f"   Name: {patient.name}")
-                print(f"   Age: {patient.age}")
-                print(f"   Medical Record: {patient.medical_record}")
-    
-    if not found:
+    results = storage.search_patients(hospital, name)
+    for dept, patient in results:
+        print(f"\n Found in {dept.name} department:")
+        print_rows(renderer.rows(patient))
+    
+    # Then names a few typos away, which the substring search cannot find
+    near = [result for result in storage.fuzzy_search_patients(hospital, name) if result[2]]
+    if near:
+        print("\n Did you mean:")
+    for dept, patient, distance in near:
+        print(f"\n Found in {dept.name} department:")
+        print_rows(renderer.rows(patient), format_distance(distance))
+    
+    if not results and not near:
         print(f"\n No patient found with name containing '{name}'")
     
     input("\nPress Enter to return to main menu...")
 
 
-def search_staff(hospital: Hospital):
+def search_records(hospital: Hospital, renderer: "RecordRenderer"):
+    """Searches medical records for a condition, best matches first."""
+    print_header("SEARCH MEDICAL RECORDS")
+    
+    query = input("\nEnter condition or keywords: ").strip()
+    if not query:
+        print(" Search text cannot be empty!")
+        input("\nPress Enter to return to main menu...")
+        return
+    
+    department = None
+    name = input("Department (Enter for all): ").strip()
+    if name:
+        department = next((dept for dept in hospital.departments
+                           if dept.name.lower() == name.lower()), None)
+        if department is None:
+            print(f" Department '{name}' not found!")
+            input("\nPress Enter to return to main menu...")
+            return
+    
+    limit = input("Number of results (Enter for 10): ").strip()
+    if not limit.isdigit() or int(limit) == 0:
+        limit = "10"
+    
+    if hospital.record_index is None:
+        print(" Building the full-text index...")
+    start = time.perf_counter()
+    results = storage.search_records(hospital, query, department, int(limit))
+    elapsed = time.perf_counter() - start
+    
+    for rank, (dept, patient, score) in enumerate(results, 1):
+        print(f"\n {rank}. Found in {dept.name} department - score {score:.2f}")
+        print_rows(renderer.rows(patient))
+    
+    if results:
+        print(f"\n {len(results)} result(s) in {format_seconds(elapsed)}")
+    else:
+        print(f"\n No medical record matches '{query}'")
+    
+    input("\nPress Enter to return to main menu...")
+
+
+def read_age(prompt: str) -> int | None:
+    """Reads an optional age; returns None if left empty."""
+    text = input(prompt).strip()
+    if not text:
+        return None
+    if not text.isdigit():
+        raise ValueError("Age must be a whole number!")
+    return int(text)
+
+
+def query_records(hospital: Hospital):
+    """Lists the patients or staff members matching several filters."""
+    from core import Query
+
+    print_header("QUERY RECORDS")
+    
+    kind = input("\nQuery (1) Patients or (2) Staff: ").strip()
+    if kind not in ('1', '2'):
+        print(" Invalid choice!")
+        input("\nPress Enter to return to main menu...")
+        return
+    query = Query(hospital, 'patients' if kind == '1' else 'staff')
+    
+    try:
+        departments = input("Departments, comma-separated (Enter for all): ").strip()
+        if departments:
+            query.department(*(name.strip() for name in departments.split(',')))
+        low = read_age("Minimum age (Enter for none): ")
+        high = read_age("Maximum age (Enter for none): ")
+        if low is not None or high is not None:
+            query.age_between(low, high)
+        if kind == '2':
+            position = input("Position (Enter for any): ").strip()
+            if position:
+                query.position(position)
+        prefix = input("Name starts with (Enter for any): ").strip()
+        if prefix:
+            query.name_prefix(prefix)
+        order = input("Order by name, age or id (Enter for department): ").strip().lower()
+        if order:
+            query.order_by(order, input("Descending? (y/N): ").strip().lower() == 'y')
+        limit = input("Number of results (Enter for 20): ").strip()
+        query.limit(int(limit) if limit.isdigit() else 20)
+    except ValueError as e:
+        print(f" {e}")
+        input("\nPress Enter to return to main menu...")
+        return
+    
+    print("\n Plan:")
+    for line in query.explain().splitlines():
+        print(f"   {line}")
+    
+    start = time.perf_counter()
+    results = query.run()
+    elapsed = time.perf_counter() - start
+    
+    for dept, record in results:
+        detail = f"Age: {record.age}"
+        if kind == '2':
+            detail += f", {record.position}"
+        print(f"\n {record.name} (ID {record.record_id}), {dept.name} - {detail}")
+    
+    if results:
+        print(f"\n {len(results)} result(s) in {format_seconds(elapsed)}")
+    else:
+        print("\n No record matches the query")
+    
+    input("\nPress Enter to return to main menu...")
+
+
+def read_datetime(prompt: str) -> datetime:
+    """Reads a 'YYYY-MM-DD HH:MM' time; an empty answer means now."""
+    text = input(prompt).strip()
+    if not text:
+        return datetime.now().replace(second=0, microsecond=0)
+    try:
+        return datetime.strptime(text, "%Y-%m-%d %H:%M")
+    except ValueError:
+        raise ValueError("Time must look like 2026-11-02 09:30!") from None
+
+
+def format_appointment(appointment) -> str:
+    """Formats an appointment for display."""
+    line = (f"#{appointment.appointment_id} {appointment.starts_at:%Y-%m-%d %H:%M}-"
+            f"{appointment.ends_at:%H:%M}  {appointment.patient.name} with "
+            f"{appointment.staff.name} ({appointment.staff.position})")
+    return f"{line} - {appointment.reason}" if appointment.reason else line
+
+
+def manage_appointments(hospital: Hospital):
+    """Generates shifts and books, lists or cancels appointments in a department."""
+    print_header("APPOINTMENTS")
+    
+    dept = find_department(hospital, input("\nDepartment name: ").strip())
+    if dept is None:
+        print(" Department not found!")
+        input("\nPress Enter to return to main menu...")
+        return
+    schedule = dept.schedule
+    
+    print(f"\n {len(schedule)} appointment(s) booked in {dept.name}")
+    print("\n [1] Generate a month of shifts")
+    print(" [2] Book the next free slot")
+    print(" [3] List appointments of a record")
+    print(" [4] Cancel an appointment")
+    action = input("\nEnter your choice: ").strip()
+    
+    try:
+        if action == '1':
+            try:
+                month = datetime.strptime(input("Month (YYYY-MM): ").strip(), "%Y-%m")
+            except ValueError:
+                raise ValueError("Month must look like 2026-11!") from None
+            shifts = storage.generate_shifts(hospital, dept, month.year, month.month)
+            print(f"\n {shifts} shift(s) added for {len(dept.staff)} staff member(s)")
+        elif action == '2':
+            found = read_record_id(hospital)
+            if found is None:
+                pass
+            elif found[0] is not dept or not isinstance(found[1], Patient):
+                print(f" Record is not a patient of {dept.name}!")
+            else:
+                position = input("Position, e.g. Cardiologist: ").strip()
+                after = read_datetime("Earliest time, YYYY-MM-DD HH:MM (Enter for now): ")
+                minutes = input("Duration in minutes (Enter for 30): ").strip()
+                reason = input("Reason: ").strip()
+                appointment = storage.book_next_free(hospital, dept, found[1], position, after,
+                                                     int(minutes) if minutes else 30, reason)
+                if appointment is None:
+                    print(f"\n No {position} is free after {after:%Y-%m-%d %H:%M}")
+                else:
+                    print(f"\n Booked {format_appointment(appointment)}")
+        elif action == '3':
+            found = read_record_id(hospital)
+            if found is not None:
+                appointments = schedule.appointments_of(found[1])
+                for appointment in appointments:
+                    print(f"   {format_appointment(appointment)}")
+                if not appointments:
+                    print(f"\n No appointments for '{found[1].name}' in {dept.name}")
+        elif action == '4':
+            appointment = storage.cancel_appointment(
+                hospital, dept, int(input("Appointment number: ").strip().lstrip('#')))
+            print(f"\n Cancelled {format_appointment(appointment)}")
+        else:
+            print(" Invalid choice!")
+    except KeyError:
+        print(" No appointment with that number!")
+    except (TypeError, ValueError) as e:
+        print(f" {e}")
+    
+    input("\nPress Enter to return to main menu...")
+
+
+def read_patient_of(hospital: Hospital, dept: Department) -> Patient | None:
+    """Asks for a record ID and returns the patient if they belong to the department."""
+    found = read_record_id(hospital)
+    if found is None:
+        return None
+    if found[0] is not dept or not isinstance(found[1], Patient):
+        print(f" Record is not a patient of {dept.name}!")
+        return None
+    return found[1]
+
+
+def read_level() -> int:
+    """Reads a triage level from 1 to 5."""
+    for level, name in TRIAGE_LEVELS.items():
+        print(f"   {level}  {name}")
+    text = input("Triage level: ").strip()
+    if not text.isdigit():
+        raise ValueError("Triage level must be a whole number from 1 to 5!")
+    return int(text)
+
+
+def manage_triage(hospital: Hospital):
+    """Queues, re-triages, admits, discharges and transfers a department's patients."""
+    print_header("TRIAGE & BEDS")
+    
+    dept = find_department(hospital, input("\nDepartment name: ").strip())
+    if dept is None:
+        print(" Department not found!")
+        input("\nPress Enter to return to main menu...")
+        return
+    triage = dept.triage
+    
+    status = triage.status()
+    print(f"\n {dept.name}: {status['occupied']}/{status['capacity']} beds occupied, "
+          f"{status['waiting']} waiting")
+    print("\n [1] Register an arrival")
+    print(" [2] Re-triage a waiting patient")
+    print(" [3] Admit the most urgent patient")
+    print(" [4] Discharge a patient")
+    print(" [5] Transfer a patient to another department")
+    print(" [6] Show the queue and beds")
+    print(" [7] Set the number of beds")
+    action = input("\nEnter your choice: ").strip()
+    
+    try:
+        if action in ('1', '2', '4', '5'):
+            patient = read_patient_of(hospital, dept)
+            if patient is None:
+                pass
+            elif action == '1':
+                storage.triage_arrive(hospital, dept, patient, read_level())
+                print(f"\n '{patient.name}' is waiting ({len(triage.queue)} in the queue)")
+            elif action == '2':
+                storage.retriage(hospital, dept, patient, read_level())
+                print(f"\n '{patient.name}' re-triaged")
+            elif action == '4':
+                print(f"\n '{patient.name}' discharged from bed "
+                      f"{storage.discharge_patient(hospital, dept, patient)}")
+            else:
+                target = find_department(hospital, input("Transfer to department: ").strip())
+                if target is None:
+                    print(" Department not found!")
+                else:
+                    storage.transfer_patient(hospital, patient, target)
+                    print(f"\n '{patient.name}' transferred to {target.name}")
+                    state = target.triage.state_of(patient)
+                    if state is not None:
+                        print(f"   {'Bed' if state[0] == 'admitted' else 'Waiting, level'} "
+                              f"{state[1]}")
+        elif action == '3':
+            admitted = storage.admit_next(hospital, dept)
+            if admitted is None:
+                print("\n No patient is waiting" if not triage.queue else "\n No bed is free")
+            else:
+                print(f"\n '{admitted[0].name}' admitted to bed {admitted[1]}")
+        elif action == '6':
+            for patient, level in triage.waiting():
+                print(f"   Waiting  [{level}] {TRIAGE_LEVELS[level]:<14} {patient.name} "
+                      f"(ID {patient.record_id})")
+            for bed, patient in triage.occupancy():
+                print(f"   Bed {bed:<4} {patient.name} (ID {patient.record_id})")
+        elif action == '7':
+            beds = input("Number of beds: ").strip()
+            if not beds.isdigit():
+                raise ValueError("Bed capacity must be a non-negative whole number!")
+            storage.set_bed_capacity(hospital, dept, int(beds))
+            print(f"\n {dept.name} now has {beds} beds")
+        else:
+            print(" Invalid choice!")
+    except KeyError:
+        print(" That patient is not waiting or admitted here!")
+    except (TypeError, ValueError) as e:
+        print(f" {e}")
+    
+    input("\nPress Enter to return to main menu...")
+
+
+def search_staff(hospital: Hospital, renderer: "RecordRenderer"):
     """Searches for a staff member by name."""
     print_header("SEARCH STAFF")
     
@@ -323,23 +769,26 @@ def search_staff(hospital: Hospital):
         input("\nPress Enter to return to main menu...")
         return
     
-    found = False
-    for dept in hospital.departments:
-        for staff in dept.staff:
-            if name in staff.name.lower():
-                found = True
-                print(f"\n Found in {dept.name} department:")
-                print(f"   Name: {staff.name}")
-                print(f"   Age: {staff.age}")
-                print(f"   Position: {staff.position}")
-    
-    if not found:
+    results = storage.search_staff(hospital, name)
+    for dept, staff in results:
+        print(f"\n Found in {dept.name} department:")
+        print_rows(renderer.rows(staff))
+    
+    # Then names a few typos away, which the substring search cannot find
+    near = [result for result in storage.fuzzy_search_staff(hospital, name) if result[2]]
+    if near:
+        print("\n Did you mean:")
+    for dept, staff, distance in near:
+        print(f"\n Found in {dept.name} department:")
+        print_rows(renderer.rows(staff), format_distance(distance))
+    
+    if not results and not near:
         print(f"\n No staff found with name containing '{name}'")
     
     input("\nPress Enter to return to main menu...")
 
 
-def delete_patient(hospital: Hospital):
+def delete_patient(hospital: Hospital, renderer: "RecordRenderer"):
     """Deletes a patient by name."""
     print_header("DELETE PATIENT")
     
@@ -349,29 +798,28 @@ def delete_patient(hospital: Hospital):
         input("\nPress Enter to return to main menu...")
         return
     
-    # Find patient
-    for dept in hospital.departments:
-        for i, patient in enumerate(dept.patients):
-            if name in patient.name.lower():
-                print(f"\n  Found: {patient.name} (Age: {patient.age})")
-                print(f"   Department: {dept.name}")
-                confirm = input("\n   Are you sure you want to delete? (y/n): ").strip().lower()
-                
-                if confirm == 'y':
-                    dept.patients.pop(i)
-                    save_data(hospital)
-                    print(f"\n Patient '{patient.name}' deleted successfully!")
-                else:
-                    print("\n Deletion cancelled.")
-                
-                input("\nPress Enter to return to main menu...")
-                return
+    # Find patient (first match, like a scan in department order)
+    results = storage.search_patients(hospital, name)
+    if results:
+        dept, patient = results[0]
+        print(f"\n  Found: {renderer.summary(patient)}")
+        print(f"   Department: {dept.name}")
+        confirm = input("\n   Are you sure you want to delete? (y/n): ").strip().lower()
+        
+        if confirm == 'y':
+            storage.delete_patient(hospital, dept, patient)
+            print(f"\n Patient '{patient.name}' deleted successfully!")
+        else:
+            print("\n Deletion cancelled.")
+        
+        input("\nPress Enter to return to main menu...")
+        return
     
     print(f"\n No patient found with name containing '{name}'")
     input("\nPress Enter to return to main menu...")
 
 
-def delete_staff(hospital: Hospital):
+def delete_staff(hospital: Hospital, renderer: "RecordRenderer"):
     """Deletes a staff member by name."""
     print_header("DELETE STAFF")
     
@@ -381,42 +829,395 @@ def delete_staff(hospital: Hospital):
         input("\nPress Enter to return to main menu...")
         return
     
-    # Find staff member
-    for dept in hospital.departments:
-        for i, staff in enumerate(dept.staff):
-            if name in staff.name.lower():
-                print(f"\n  Found: {staff.name} (Position: {staff.position})")
-                print(f"   Department: {dept.name}")
-                confirm = input("\n   Are you sure you want to delete? (y/n): ").strip().lower()
-                
-                if confirm == 'y':
-                    dept.staff.pop(i)
-                    save_data(hospital)
-                    print(f"\n Staff '{staff.name}' deleted successfully!")
-                else:
-                    print("\n Deletion cancelled.")
-                
-                input("\nPress Enter to return to main menu...")
-                return
+    # Find staff member (first match, like a scan in department order)
+    results = storage.search_staff(hospital, name)
+    if results:
+        dept, staff = results[0]
+        print(f"\n  Found: {renderer.summary(staff)}")
+        print(f"   Department: {dept.name}")
+        confirm = input("\n   Are you sure you want to delete? (y/n): ").strip().lower()
+        
+        if confirm == 'y':
+            storage.delete_staff_member(hospital, dept, staff)
+            print(f"\n Staff '{staff.name}' deleted successfully!")
+        else:
+            print("\n Deletion cancelled.")
+        
+        input("\nPress Enter to return to main menu...")
+        return
     
     print(f"\n No staff found with name containing '{name}'")
     input("\nPress Enter to return to main menu...")
 
 
+def read_record_id(hospital: Hospital):
+    """Asks for a record ID and returns its (department, record), or None."""
+    try:
+        record_id = int(input("\nEnter Record ID: ").strip())
+    except ValueError:
+        print(" Record ID must be a number!")
+        return None
+    
+    found = hospital.get_record(record_id)
+    if found is None:
+        print(f"\n No patient or staff member with ID {record_id}")
+    return found
+
+
+def view_record_by_id(hospital: Hospital, renderer: "RecordRenderer"):
+    """Displays a patient or staff member by ID."""
+    print_header("VIEW RECORD BY ID")
+    
+    found = read_record_id(hospital)
+    if found is not None:
+        dept, record = found
+        print(f"\n Found in {dept.name} department:")
+        print(f"   {renderer.line(record)}")
+    
+    input("\nPress Enter to return to main menu...")
+
+
+def delete_record_by_id(hospital: Hospital, renderer: "RecordRenderer"):
+    """Deletes a patient or staff member by ID."""
+    print_header("DELETE RECORD BY ID")
+    
+    found = read_record_id(hospital)
+    if found is not None:
+        dept, record = found
+        print(f"\n  Found: {renderer.line(record)}")
+        print(f"   Department: {dept.name}")
+        confirm = input("\n   Are you sure you want to delete? (y/n): ").strip().lower()
+        
+        if confirm == 'y':
+            if isinstance(record, Patient):
+                storage.delete_patient(hospital, dept, record)
+            else:
+                storage.delete_staff_member(hospital, dept, record)
+            print(f"\n '{record.name}' deleted successfully!")
+        else:
+            print("\n Deletion cancelled.")
+    
+    input("\nPress Enter to return to main menu...")
+
+
+def bulk_import(hospital: Hospital):
+    """Imports patients and staff from a CSV or JSONL feed."""
+    from core import BulkImporter
+
+    print_header("BULK IMPORT")
+    
+    path = input("\nEnter CSV/JSONL file path: ").strip()
+    if not path:
+        print(" Path cannot be empty!")
+        input("\nPress Enter to return to main menu...")
+        return
+    create = input("Create missing departments? (y/n): ").strip().lower() == 'y'
+    
+    try:
+        importer = BulkImporter(hospital, storage, create_departments=create)
+        report = importer.import_file(path)
+    except (OSError, ValueError) as e:
+        print(f"\n Import failed: {e}")
+    else:
+        print(f"\n {report.summary()}")
+        for line_no, reason in report.rejected[:10]:
+            print(f"   Line {line_no}: {reason}")
+        if len(report.rejected) > 10:
+            print(f"   ... and {len(report.rejected) - 10} more")
+    
+    input("\nPress Enter to return to main menu...")
+
+
+def format_seconds(seconds: float | None) -> str:
+    """Formats a latency for display."""
+    if seconds is None:
+        return "-"
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    return f"{seconds * 1000:.2f} ms"
+
+
+def show_diagnostics():
+    """Displays live operation latencies and I/O counters."""
+    print_header("DIAGNOSTICS")
+    
+    if not telemetry.registry.enabled:
+        print("\n Metrics are disabled (HOSPITAL_METRICS=0).")
+        input("\nPress Enter to return to main menu...")
+        return
+    
+    metrics = telemetry.registry.collect()
+    histograms = [(labels.get('operation', name), metric) for name, labels, metric in metrics
+                  if isinstance(metric, telemetry.Histogram)]
+    if histograms:
+        print(f"\n   {'Operation':<18}{'Count':>8}{'p50':>11}{'p90':>11}{'p99':>11}{'Max':>11}")
+        for operation, histogram in histograms:
+            print(f"   {operation:<18}{histogram.count:>8}"
+                  f"{format_seconds(histogram.percentile(50)):>11}"
+                  f"{format_seconds(histogram.percentile(90)):>11}"
+                  f"{format_seconds(histogram.percentile(99)):>11}"
+                  f"{format_seconds(histogram.max()):>11}")
+    else:
+        print("\n No operations recorded yet.")
+    
+    others = [(name, labels, metric) for name, labels, metric in metrics
+              if not isinstance(metric, telemetry.Histogram)]
+    if others:
+        print("\n   Counters and Gauges:")
+        for name, labels, metric in others:
+            label = ", ".join(f"{key}={value}" for key, value in labels.items())
+            print(f"   ├── {name}{f' ({label})' if label else ''}: {metric.value:,.0f}")
+    
+    path = input("\nExport to Prometheus file (path, or Enter to skip): ").strip()
+    if path:
+        try:
+            telemetry.write_prometheus(path)
+            print(f" Metrics written to {path}")
+        except OSError as e:
+            print(f" Export failed: {e}")
+    
+    input("\nPress Enter to return to main menu...")
+
+
+# Fields of the records written by the export subcommand, in CSV column order
+EXPORT_FIELDS = ['id', 'name', 'age', 'department', 'position', 'medical_record']
+
+
+def print_json(data):
+    """Prints the result of a subcommand as JSON."""
+    print(json.dumps(data, ensure_ascii=False, indent=2))
+
+
+def fail(message: str) -> int:
+    """Reports a subcommand error on stderr and returns the exit status."""
+    print(json.dumps({'error': message}, ensure_ascii=False), file=sys.stderr)
+    return 1
+
+
+def record_json(department: Department, record) -> dict:
+    """Returns a loaded record in the API's JSON format, which the sidecar index also uses."""
+    from core.api_server import record_to_dict
+
+    return record_to_dict(department, record)
+
+
+def open_lookup():
+    """
+    Opens the storage's read-only lookup view (the JSON snapshot's sidecar
+    index, the mapped binary snapshot, or queries on the SQLite tables),
+    or returns None if there is none or it is out of date, in which case
+    the hospital must be loaded.
+    """
+    try:
+        return storage.open_lookup()
+    except (OSError, ValueError):
+        return None
+
+
+def load_for_command(write: bool = False) -> Hospital:
+    """
+    Loads the hospital for a subcommand, without progress output.
+
+    Args:
+        write: The subcommand changes the data, so it takes the writer
+            lock first and refuses to run while another process holds it.
+    """
+    if isinstance(storage, JsonStorage):
+        storage.progress = None
+    if write:
+        try:
+            writer_lock.acquire()
+        except PermissionError as e:
+            sys.exit(fail(f"{str(e).rstrip('!')}; make the change through it, "
+                          f"e.g. POST /patients or /staff on the API server"))
+    try:
+        if not storage.exists():
+            return storage.create("Cairo Hospital", "Cairo, Egypt")
+        return storage.load()
+    except Exception as e:
+        # Exit before anything is written over data that could not be read
+        sys.exit(fail(f"Error reading data file: {e}"))
+
+
+def find_department(hospital: Hospital, name: str) -> Department | None:
+    """Returns the department with the given name (case-insensitive), or None."""
+    for dept in hospital.departments:
+        if dept.name.lower() == name.lower():
+            return dept
+    return None
+
+
+def command_search(args) -> int:
+    """Prints the patients or staff members whose name contains the text."""
+    staff = args.command == "search-staff"
+    index = open_lookup()
+    if index is not None:
+        with index:
+            print_json(index.search(args.name, staff=staff, limit=args.limit))
+        return 0
+    hospital = load_for_command()
+    found = hospital.search_staff(args.name) if staff else hospital.search_patients(args.name)
+    print_json([record_json(dept, record) for dept, record in found[:args.limit]])
+    return 0
+
+
+def command_get(args) -> int:
+    """Prints the record with the given ID."""
+    index = open_lookup()
+    if index is not None:
+        with index:
+            record = index.get(args.id)
+    else:
+        found = load_for_command().get_record(args.id)
+        record = record_json(*found) if found is not None else None
+    if record is None:
+        return fail(f"No record with ID {args.id}")
+    print_json(record)
+    return 0
+
+
+def command_stats(args) -> int:
+    """Prints hospital-wide and per-department statistics."""
+    index = open_lookup()
+    if index is not None:
+        with index:
+            print_json(index.statistics())
+    else:
+        print_json(load_for_command().statistics())
+    return 0
+
+
+def command_export(args) -> int:
+    """Writes every record as JSON lines or CSV."""
+    index = open_lookup()
+    if index is not None:
+        records = index.records()
+    else:
+        records = (record_json(dept, record)
+                   for dept, patients, staff in load_for_command().snapshot()
+                   for record in (*patients, *staff))
+
+    with contextlib.ExitStack() as stack:
+        if index is not None:
+            stack.enter_context(index)
+        out = sys.stdout
+        if args.output:
+            out = stack.enter_context(open(args.output, 'w', encoding='utf-8', newline=''))
+        if args.format == "csv":
+            writer = csv.DictWriter(out, EXPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+        else:
+            for record in records:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return 0
+
+
+def command_add(args) -> int:
+    """Adds a patient or staff member and prints it with its new ID."""
+    if not args.name.strip():
+        return fail("Name cannot be empty")
+    hospital = load_for_command(write=True)
+    try:
+        dept = find_department(hospital, args.department)
+        if dept is None:
+            return fail(f"Department '{args.department}' not found")
+        # The model reports additions on stdout, which is reserved for the JSON result
+        with contextlib.redirect_stdout(sys.stderr):
+            if args.command == "add-patient":
+                record = Patient(args.name, args.age, args.record)
+                storage.add_patient(hospital, dept, record)
+            else:
+                record = Staff(args.name, args.age, args.position)
+                storage.add_staff_member(hospital, dept, record)
+        print_json(record_json(dept, record))
+        return 0
+    except (TypeError, ValueError) as e:
+        return fail(str(e))
+    finally:
+        storage.close()
+
+
+def command_reindex(args) -> int:
+    """Writes a new snapshot, and with it the sidecar index."""
+    hospital = load_for_command(write=True)
+    storage.save(hospital)
+    storage.close()
+    print_json({'records': len(hospital.records), 'lookup_index': open_lookup() is not None})
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the parser of the non-interactive subcommands."""
+    parser = argparse.ArgumentParser(
+        description="Hospital Management System. Without a command the interactive menu starts; "
+                    "commands print JSON.")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    for name, kind in (("search-patient", "patients"), ("search-staff", "staff members")):
+        search = commands.add_parser(name, help=f"Find {kind} by name (case-insensitive substring)")
+        search.add_argument("name", help="Text the name contains")
+        search.add_argument("--limit", type=int, help="Maximum number of results")
+        search.set_defaults(handler=command_search)
+
+    get = commands.add_parser("get", help="Show a patient or staff member by ID")
+    get.add_argument("id", type=int, help="Record ID")
+    get.set_defaults(handler=command_get)
+
+    stats = commands.add_parser("stats", help="Show hospital and department statistics")
+    stats.set_defaults(handler=command_stats)
+
+    export = commands.add_parser("export", help="Write every record as JSON lines or CSV")
+    export.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    export.add_argument("--output", help="Output file (default: standard output)")
+    export.set_defaults(handler=command_export)
+
+    add = commands.add_parser("add-patient", help="Admit a patient")
+    add.add_argument("--record", required=True, help="Medical record")
+    add_staff = commands.add_parser("add-staff", help="Add a staff member")
+    add_staff.add_argument("--position", required=True, help="Position, e.g. Doctor")
+    for command in (add, add_staff):
+        command.add_argument("--department", required=True, help="Department name")
+        command.add_argument("--name", required=True)
+        command.add_argument("--age", type=int, required=True)
+        command.set_defaults(handler=command_add)
+
+    reindex = commands.add_parser("reindex", help="Rewrite the snapshot and its sidecar index")
+    reindex.set_defaults(handler=command_reindex)
+    return parser
+
+
 def main():
     """Main application entry point."""
-    # Load data from JSON
-    print(" Loading data from file...")
-    hospital = load_data()
-    manager = SystemManager(hospital)
-    print(f" Loaded {len(hospital.departments)} departments!\n")
+    args = build_parser().parse_args()
+    if args.command is not None:
+        try:
+            sys.exit(args.handler(args))
+        except BrokenPipeError:
+            # Output piped into e.g. head, which stopped reading
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+
+    # The first screen is served from the storage's lookup view; the
+    # hospital is only loaded once a menu choice needs it
+    take_writer_lock()
+    hospital = manager = publisher = None
+    heading = peek_data()
+    if heading is None:
+        hospital, manager, publisher = start_session()
+        heading = hospital.name, len(hospital.departments)
+        print(f" Loaded {heading[1]} departments!\n")
+    else:
+        print(f" Found {heading[1]} departments!\n")
     
     while True:
         clear_screen()
-        print_menu(hospital.name)
+        print_menu(heading[0])
         
         try:
             choice = input("\nEnter your choice: ").strip()
+            if hospital is None and choice not in ("", "0", "16"):
+                hospital, manager, publisher = start_session()
             
             if choice == "1":
                 view_all_patients(manager)
@@ -436,16 +1237,35 @@ def main():
                 save_data(hospital)
                 input("\nPress Enter to continue...")
             elif choice == "9":
-                search_patient(hospital)
+                search_patient(hospital, manager.renderer)
             elif choice == "10":
-                search_staff(hospital)
+                search_staff(hospital, manager.renderer)
             elif choice == "11":
-                delete_patient(hospital)
+                delete_patient(hospital, manager.renderer)
             elif choice == "12":
-                delete_staff(hospital)
+                delete_staff(hospital, manager.renderer)
+            elif choice == "13":
+                view_record_by_id(hospital, manager.renderer)
+            elif choice == "14":
+                delete_record_by_id(hospital, manager.renderer)
+            elif choice == "15":
+                bulk_import(hospital)
+            elif choice == "16":
+                show_diagnostics()
+            elif choice == "17":
+                search_records(hospital, manager.renderer)
+            elif choice == "18":
+                query_records(hospital)
+            elif choice == "19":
+                manage_appointments(hospital)
+            elif choice == "20":
+                manage_triage(hospital)
             elif choice == "0":
-                # Save before exit
-                save_data(hospital)
+                # Save before exit; nothing changed if nothing was loaded
+                if hospital is not None:
+                    save_data(hospital)
+                storage.close()
+                stop_change_feed(publisher)
                 print("\n Thank you for using Hospital Management System!")
                 print("   Goodbye!\n")
                 break
@@ -454,10 +1274,23 @@ def main():
                 input("\nPress Enter to continue...")
                 
         except KeyboardInterrupt:
-            save_data(hospital)
+            if hospital is not None:
+                save_data(hospital)
+            storage.close()
+            stop_change_feed(publisher)
             print("\n\n Goodbye!")
             break
 
 
+if METRICS_ENABLED:
+    telemetry.enable()
+
+# Every change goes through the repository so it is persisted as it happens
+storage = open_storage()
+
+# Taken before loading by every process that changes the data
+writer_lock = WriterLock(LOCK_FILE)
+
+
 if __name__ == "__main__":
     main()
@@ -1,5 +1,15 @@
 from .department import *
+from .events import *
 from .hospital import *
+from .locking import *
 from .patient import *
 from .staff import *
-from .person import *
\ No newline at end of file
+from .person import *
+from .name_index import *
+from .record_set import *
+from .schedule import *
+from .secondary_index import *
+from .statistics import *
+from .text_index import *
+from .timeline import *
+from .triage import *
\ No newline at end of file
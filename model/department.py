@@ -1,5 +1,15 @@
+import sys
+from operator import attrgetter
+
+from .locking import ReadWriteLock
+from .name_index import NameIndex
 from .patient import Patient
+from .record_set import RecordSet
+from .schedule import Schedule
+from .secondary_index import HashIndex, SortedIndex
 from .staff import Staff
+from .statistics import Statistics
+from .triage import Triage
 
 class Department:
     """
@@ -13,11 +23,31 @@ class Department:
         if not isinstance(name, str):
             raise TypeError("Department name must be a string!")
         
-        self.name = name
-        self.patients = []
-        self.staff = []
+        self.name = sys.intern(name)
+        self.patients = RecordSet()
+        self.staff = RecordSet()
+        # Set by Hospital.add_department; keeps the hospital-wide ID map current
+        self.hospital = None
+        # Trigram indexes used by name searches
+        self.patient_index = NameIndex()
+        self.staff_index = NameIndex()
+        # Secondary indexes by field, used by the query engine
+        self.patient_indexes = {'age': SortedIndex(attrgetter('age')),
+                                'name': SortedIndex(lambda record: record.name.lower())}
+        self.staff_indexes = {'age': SortedIndex(attrgetter('age')),
+                              'name': SortedIndex(lambda record: record.name.lower()),
+                              'position': HashIndex(attrgetter('position'))}
+        # Counts and age/position aggregates, kept current on every change
+        self.stats = Statistics()
+        # Staff shifts and patient appointments
+        self.schedule = Schedule(self)
+        # Waiting patients by triage level and the beds they are admitted to
+        self.triage = Triage(self)
+        # Writers update records, indexes and statistics together under this lock;
+        # listings read copy-on-write snapshots and never wait for it
+        self.lock = ReadWriteLock()
 
-    def add_patient(self, patient: Patient) -> None:
+    def add_patient(self, patient: Patient, quiet: bool = False) -> None:
         """
         Adds a patient to the department
         """
@@ -25,10 +55,18 @@ class Department:
         if not isinstance(patient, Patient):
             raise TypeError("Patient must be a Patient object!")
             
-        self.patients.append(patient)
-        print(f"Patient '{patient.name}' added to {self.name} department.")
+        with self.lock.write():
+            if self.hospital is not None:
+                self.hospital._register(self, patient)
+            self._attach_patient(patient)
+            if self.hospital is not None:
+                self.hospital._publish('add_patient', self, patient)
+        if self.hospital is not None:
+            self.hospital._deliver()
+        if not quiet:
+            print(f"Patient '{patient.name}' added to {self.name} department.")
 
-    def add_staff_member(self, staff_member: Staff) -> None:
+    def add_staff_member(self, staff_member: Staff, quiet: bool = False) -> None:
         """
         Adds a staff member to the department
         """
@@ -36,5 +74,124 @@ class Department:
         if not isinstance(staff_member, Staff):
             raise TypeError("Staff member must be a Staff object!")
             
-        self.staff.append(staff_member)
-        print(f"Staff '{staff_member.name}' added to {self.name} department.") 
\ No newline at end of file
+        with self.lock.write():
+            if self.hospital is not None:
+                self.hospital._register(self, staff_member)
+            self.staff.append(staff_member)
+            self.staff_index.add(staff_member)
+            for index in self.staff_indexes.values():
+                index.add(staff_member)
+            self.stats.add(staff_member)
+            if self.hospital is not None:
+                self.hospital._publish('add_staff', self, staff_member)
+        if self.hospital is not None:
+            self.hospital._deliver()
+        if not quiet:
+            print(f"Staff '{staff_member.name}' added to {self.name} department.")
+
+    def remove_patient(self, patient: Patient) -> None:
+        """
+        Removes a patient from the department
+        """
+        with self.lock.write():
+            self._detach_patient(patient)
+            self.triage._forget(patient)
+            if self.hospital is not None:
+                self.hospital._unregister(patient)
+                self.hospital._publish('delete_patient', self, patient)
+        if self.hospital is not None:
+            self.hospital._deliver()
+
+    def remove_staff_member(self, staff_member: Staff) -> None:
+        """
+        Removes a staff member from the department
+        """
+        with self.lock.write():
+            self.staff.remove(staff_member)
+            self.staff_index.remove(staff_member)
+            for index in self.staff_indexes.values():
+                index.remove(staff_member)
+            self.stats.remove(staff_member)
+            self.schedule._forget(staff_member)
+            if self.hospital is not None:
+                self.hospital._unregister(staff_member)
+                self.hospital._publish('delete_staff', self, staff_member)
+        if self.hospital is not None:
+            self.hospital._deliver()
+
+    def state(self) -> dict:
+        """
+        Returns the department's schedule and triage as JSON-serializable
+        values for snapshots, leaving out what is empty
+        """
+        state = {}
+        schedule = self.schedule.as_dict()
+        if schedule:
+            state['schedule'] = schedule
+        triage = self.triage.as_dict()
+        if triage:
+            state['triage'] = triage
+        return state
+
+    def load_state(self, state: dict) -> None:
+        """
+        Restores what state() returned; the department's records must be
+        added first
+        """
+        self.schedule.load_dict(state.get('schedule'))
+        self.triage.load_dict(state.get('triage'))
+
+    def _attach_patient(self, patient: Patient) -> None:
+        """
+        Adds a patient to the record set, indexes and statistics; the
+        caller holds the write lock
+        """
+        self.patients.append(patient)
+        self.patient_index.add(patient)
+        for index in self.patient_indexes.values():
+            index.add(patient)
+        self.stats.add(patient)
+
+    def _detach_patient(self, patient: Patient) -> None:
+        """
+        Removes a patient from the record set, indexes and statistics and
+        cancels their appointments; the caller holds the write lock
+        """
+        self.patients.remove(patient)
+        self.patient_index.remove(patient)
+        for index in self.patient_indexes.values():
+            index.remove(patient)
+        self.stats.remove(patient)
+        self.schedule._forget(patient)
+
+    def search_patients(self, name: str) -> list[Patient]:
+        """
+        Returns the patients whose name contains the given lower-cased text
+        """
+        with self.lock.read():
+            return self.patient_index.search(name)
+
+    def search_staff(self, name: str) -> list[Staff]:
+        """
+        Returns the staff members whose name contains the given lower-cased text
+        """
+        with self.lock.read():
+            return self.staff_index.search(name)
+
+    def fuzzy_search_patients(self, name: str, limit: int | None = None) -> list[tuple[Patient, int]]:
+        """
+        Returns (patient, distance) pairs for names containing the given
+        lower-cased text (distance 0) or matching its words within a few
+        typos, closest first
+        """
+        with self.lock.read():
+            return self.patient_index.fuzzy_search(name, limit)
+
+    def fuzzy_search_staff(self, name: str, limit: int | None = None) -> list[tuple[Staff, int]]:
+        """
+        Returns (staff member, distance) pairs for names containing the given
+        lower-cased text (distance 0) or matching its words within a few
+        typos, closest first
+        """
+        with self.lock.read():
+            return self.staff_index.fuzzy_search(name, limit)
@@ -0,0 +1,110 @@
+import time
+
+from .department import Department
+from .patient import Patient
+from .staff import Staff
+
+
+# Changes a ChangeEvent can describe
+OPERATIONS = ('add_department', 'add_patient', 'add_staff', 'delete_patient', 'delete_staff')
+
+
+class ChangeEvent:
+    """
+    One change to a hospital, as passed to its subscribers.
+
+    Attributes:
+        seq: Position in the hospital's change sequence; every change gets
+            the next number, so subscribers see them in order.
+        op: One of OPERATIONS.
+        department: Index of the department in hospital.departments.
+        data: The department name for 'add_department', the record's fields
+            for adds, and the record ID for deletes.
+        time: Wall-clock time of the change.
+    """
+
+    __slots__ = ('seq', 'op', 'department', 'data', 'time')
+
+    def __init__(self, seq: int, op: str, department: int, data: dict,
+                 timestamp: float | None = None) -> None:
+        """Initializes an event; the time defaults to now."""
+        # Input validation
+        if op not in OPERATIONS:
+            raise ValueError(f"Unknown change operation: {op}!")
+
+        self.seq: int = seq
+        self.op: str = op
+        self.department: int = department
+        self.data: dict = data
+        self.time: float = time.time() if timestamp is None else timestamp
+
+    def as_dict(self) -> dict:
+        """Returns the event as plain JSON-serializable values."""
+        return {'seq': self.seq, 'op': self.op, 'department': self.department,
+                'time': self.time, 'data': self.data}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChangeEvent":
+        """Rebuilds an event from as_dict() output."""
+        return cls(data['seq'], data['op'], data['department'], data['data'], data['time'])
+
+
+def record_fields(record) -> dict:
+    """Returns the fields needed to recreate a patient or staff member."""
+    fields = {'id': record.record_id, 'name': record.name, 'age': record.age}
+    if isinstance(record, Patient):
+        fields['medical_record'] = record.medical_record
+    else:
+        fields['position'] = record.position
+    return fields
+
+
+def apply_event(hospital, event: ChangeEvent) -> bool:
+    """
+    Applies a change event to another hospital, e.g. a read-only replica.
+
+    Changes that are already there are skipped (departments by position,
+    records by ID and department), so an event can safely be applied more
+    than once. A record whose ID arrives for another department, or as the
+    other kind of record, is replaced: it was moved while its delete was
+    not seen, e.g. during a reset.
+
+    Returns:
+        True if the hospital changed.
+    """
+    data = event.data
+    if event.op == 'add_department':
+        if event.department < len(hospital.departments):
+            return False
+        hospital.add_department(Department(data['name']))
+        return True
+
+    if event.op in ('add_patient', 'add_staff'):
+        department = hospital.departments[event.department]
+        found = hospital.get_record(data['id'])
+        if found is not None:
+            same_kind = isinstance(found[1], Patient) == (event.op == 'add_patient')
+            if found[0] is department and same_kind:
+                return False
+            _remove(*found)
+        if event.op == 'add_patient':
+            department.add_patient(Patient(data['name'], data['age'], data['medical_record'],
+                                           data['id']), quiet=True)
+        else:
+            department.add_staff_member(Staff(data['name'], data['age'], data['position'],
+                                              data['id']), quiet=True)
+        return True
+
+    found = hospital.get_record(data['id'])
+    if found is None:
+        return False
+    _remove(*found)
+    return True
+
+
+def _remove(department, record) -> None:
+    """Removes a patient or staff member from its department."""
+    if isinstance(record, Patient):
+        department.remove_patient(record)
+    else:
+        department.remove_staff_member(record)
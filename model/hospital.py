@@ -1,4 +1,12 @@
+import threading
+
 from .department import Department
+from .events import ChangeEvent, record_fields
+from .patient import Patient
+from .person import Person
+from .staff import Staff
+from .statistics import Statistics
+from .text_index import TextIndex
 
 class Hospital:
     """
@@ -14,11 +22,310 @@ class Hospital:
         self.name: str = name
         self.location: str = location
         self.departments: list[Department] = [] # List of Department objects
+        # Record ID -> (department, patient or staff member), for O(1) lookups
+        self.records: dict[int, tuple[Department, Person]] = {}
+        self.next_id: int = 1
+        # Hospital-wide aggregates, kept current as records come and go
+        self.stats: Statistics = Statistics()
+        # Full-text index over medical records; None until it is built by the
+        # first search or loaded by the storage backend, kept current after that
+        self.record_index: TextIndex | None = None
+        # Change data capture: every change gets the next sequence number and
+        # subscribers receive it as a ChangeEvent
+        self.event_seq: int = 0
+        self._subscribers: list = []
+        # (event, subscribers) published under the locks, not yet delivered
+        self._pending: list = []
+        self._delivering: bool = False
+        # Guards the ID map, statistics and department list against concurrent
+        # writers. The department list is replaced, never changed in place,
+        # so readers can iterate it without locking.
+        self._lock = threading.RLock()
 
     def add_department(self, department: Department) -> None:
         """Adds a department to the hospital."""
         # Input validation
         if not isinstance(department, Department):
             raise TypeError("Department must be a Department object!")
+        if department.hospital is not None:
+            raise ValueError("Department already belongs to a hospital!")
             
-        self.departments.append(department)
\ No newline at end of file
+        # Department lock first, then the hospital's, the same order writers use
+        with department.lock.write(), self._lock:
+            department.hospital = self
+            for record in department.patients:
+                self._register(department, record)
+            for record in department.staff:
+                self._register(department, record)
+            self.departments = self.departments + [department]
+            self._publish('add_department', department)
+            for record in department.patients:
+                self._publish('add_patient', department, record)
+            for record in department.staff:
+                self._publish('add_staff', department, record)
+        self._deliver()
+
+    def subscribe(self, callback) -> None:
+        """
+        Calls callback(event) with a ChangeEvent after every change, in
+        sequence order. Callbacks run on a writer thread once it has
+        released the department and hospital locks, so they may read or
+        change the hospital; while one runs, changes made by other threads
+        are delivered by the thread already delivering, after it.
+        """
+        with self._lock:
+            self._subscribers = self._subscribers + [callback]
+
+    def unsubscribe(self, callback) -> None:
+        """Stops passing changes to a callback given to subscribe()."""
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s != callback]
+
+    def _publish(self, op: str, department: Department, record: Person | None = None) -> None:
+        """
+        Numbers a change and queues it for the subscribers; the caller holds
+        the department lock and calls _deliver() once it is released.
+        """
+        with self._lock:
+            self.event_seq += 1
+            if not self._subscribers:
+                return
+            if op == 'add_department':
+                data = {'name': department.name}
+            elif op.startswith('add'):
+                data = record_fields(record)
+            else:
+                data = {'id': record.record_id}
+            event = ChangeEvent(self.event_seq, op, self.departments.index(department), data)
+            self._pending.append((event, self._subscribers))
+
+    def _deliver(self) -> None:
+        """
+        Passes queued changes to their subscribers in sequence order, one
+        thread at a time; the caller holds no department lock.
+        """
+        while self._pending:
+            with self._lock:
+                if self._delivering or not self._pending:
+                    return
+                self._delivering = True
+                pending, self._pending = self._pending, []
+            delivered = 0
+            try:
+                for event, subscribers in pending:
+                    delivered += 1
+                    for callback in subscribers:
+                        callback(event)
+            finally:
+                with self._lock:
+                    # A failed callback leaves the later changes to the next writer
+                    self._pending[:0] = pending[delivered:]
+                    self._delivering = False
+
+    def _register(self, department: Department, record: Person) -> None:
+        """Gives the record an ID if it has none and adds it to the ID map."""
+        with self._lock:
+            if record.record_id is None:
+                record.record_id = self.next_id
+            elif record.record_id in self.records:
+                raise ValueError(f"Duplicate record ID: {record.record_id}")
+            self.next_id = max(self.next_id, record.record_id + 1)
+            self.records[record.record_id] = (department, record)
+            self.stats.add(record)
+            if self.record_index is not None and isinstance(record, Patient):
+                self.record_index.add(record.record_id, record.medical_record)
+
+    def _unregister(self, record: Person) -> None:
+        """Removes the record from the ID map."""
+        with self._lock:
+            if self.records.pop(record.record_id, None) is not None:
+                self.stats.remove(record)
+                if self.record_index is not None and isinstance(record, Patient):
+                    self.record_index.remove(record.record_id, record.medical_record)
+
+    def snapshot(self) -> list[tuple[Department, object, object]]:
+        """
+        Returns a consistent point-in-time view of every department.
+
+        Each department's read lock is held only long enough to take O(1)
+        copy-on-write snapshots of its patients and staff.
+
+        Returns:
+            (department, patients view, staff view) triples.
+        """
+        views = []
+        for dept in self.departments:
+            with dept.lock.read():
+                views.append((dept, dept.patients.snapshot(), dept.staff.snapshot()))
+        return views
+
+    def build_record_index(self, stem: bool = True) -> TextIndex:
+        """
+        Indexes every patient's medical record for search_records() and
+        keeps the index current from then on.
+        """
+        with self._lock:
+            index = TextIndex(stem)
+            for record_id, (_, record) in self.records.items():
+                if isinstance(record, Patient):
+                    index.add(record_id, record.medical_record)
+            self.record_index = index
+        return index
+
+    def export_record_index(self) -> dict | None:
+        """Returns a consistent copy of the full-text index, or None if it is not built."""
+        with self._lock:
+            if self.record_index is None:
+                return None
+            return self.record_index.as_dict()
+
+    def statistics(self) -> dict:
+        """
+        Returns hospital-wide and per-department aggregates.
+        Reads the maintained counters, so it never scans the records.
+        """
+        with self._lock:
+            summary = self.stats.as_dict()
+        summary['hospital'] = self.name
+        summary['location'] = self.location
+        summary['departments'] = [
+            dict(name=dept.name, **dept.stats.as_dict()) for dept in self.departments
+        ]
+        return summary
+
+    def get_record(self, record_id: int) -> tuple[Department, Person] | None:
+        """
+        Looks up a patient or staff member by ID in O(1).
+
+        Returns:
+            (department, record) or None if no record has that ID.
+        """
+        return self.records.get(record_id)
+
+    def transfer_patient(self, patient: Patient, target: Department) -> Department:
+        """
+        Moves a patient to another department, keeping their ID, together
+        with their bed or their place in the triage queue. Their
+        appointments in the old department are cancelled. Subscribers see
+        the move as a delete followed by an add.
+
+        Returns:
+            The department the patient left.
+
+        Raises:
+            ValueError: If the patient is admitted and the target has no
+                free bed, or is already in the target department.
+        """
+        # Input validation
+        if not isinstance(patient, Patient):
+            raise TypeError("Patient must be a Patient object!")
+        if target not in self.departments:
+            raise ValueError(f"{target.name} is not a department of {self.name}!")
+        found = self.records.get(patient.record_id)
+        if found is None or found[1] is not patient:
+            raise ValueError(f"{patient.name} is not a patient of {self.name}!")
+        source = found[0]
+        if source is target:
+            raise ValueError(f"{patient.name} is already in {target.name}!")
+
+        # Both department locks in list order, so two transfers never deadlock;
+        # then the hospital's, the same order writers use
+        first, second = sorted((source, target), key=self.departments.index)
+        with first.lock.write(), second.lock.write(), self._lock:
+            if self.records.get(patient.record_id) != (source, patient):
+                raise ValueError(f"{patient.name} was moved or removed meanwhile!")
+            # Fails before any change if no bed is free
+            source.triage._move(patient, target.triage)
+            source._detach_patient(patient)
+            target._attach_patient(patient)
+            self.records[patient.record_id] = (target, patient)
+            self._publish('delete_patient', source, patient)
+            self._publish('add_patient', target, patient)
+        self._deliver()
+        return source
+
+    def search_patients(self, name: str) -> list[tuple[Department, Patient]]:
+        """
+        Finds patients whose name contains the given text (case-insensitive).
+
+        Returns:
+            (department, patient) pairs in department order.
+        """
+        name = name.lower()
+        return [(dept, patient) for dept in self.departments
+                for patient in dept.search_patients(name)]
+
+    def search_staff(self, name: str) -> list[tuple[Department, Staff]]:
+        """
+        Finds staff members whose name contains the given text (case-insensitive).
+
+        Returns:
+            (department, staff member) pairs in department order.
+        """
+        name = name.lower()
+        return [(dept, member) for dept in self.departments
+                for member in dept.search_staff(name)]
+
+    def fuzzy_search_patients(self, name: str,
+                              limit: int | None = None) -> list[tuple[Department, Patient, int]]:
+        """
+        Finds patients whose name contains the given text, as
+        search_patients() does (distance 0), then those whose name matches
+        its words within a few typos, e.g. "Mohamed" also finds "Mohammed".
+
+        Args:
+            name: Text to look for.
+            limit: Maximum number of results, or None for all.
+
+        Returns:
+            (department, patient, distance) triples, closest first, then in
+            department order.
+        """
+        name = name.lower()
+        results = [(dept, patient, distance) for dept in self.departments
+                   for patient, distance in dept.fuzzy_search_patients(name, limit)]
+        results.sort(key=lambda result: result[2])
+        return results[:limit]
+
+    def fuzzy_search_staff(self, name: str,
+                           limit: int | None = None) -> list[tuple[Department, Staff, int]]:
+        """
+        Finds staff members whose name contains the given text, as
+        search_staff() does (distance 0), then those whose name matches its
+        words within a few typos.
+
+        Args:
+            name: Text to look for.
+            limit: Maximum number of results, or None for all.
+
+        Returns:
+            (department, staff member, distance) triples, closest first, then
+            in department order.
+        """
+        name = name.lower()
+        results = [(dept, member, distance) for dept in self.departments
+                   for member, distance in dept.fuzzy_search_staff(name, limit)]
+        results.sort(key=lambda result: result[2])
+        return results[:limit]
+
+    def search_records(self, query: str, department: Department | None = None,
+                       k: int = 10) -> list[tuple[Department, Patient, float]]:
+        """
+        Finds the patients whose medical records best match the query,
+        ranked by BM25. Builds the full-text index on first use.
+
+        Args:
+            query: Free text, e.g. "epilepsy controlled".
+            department: Only return patients of this department.
+            k: Maximum number of results.
+
+        Returns:
+            (department, patient, score) triples, best match first.
+        """
+        with self._lock:
+            index = self.record_index or self.build_record_index()
+            accept = None
+            if department is not None:
+                accept = lambda record_id: self.records[record_id][0] is department
+            hits = index.search(query, k, accept)
+            return [(*self.records[record_id], score) for record_id, score in hits]
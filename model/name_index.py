@@ -0,0 +1,265 @@
+import heapq
+import itertools
+
+
+# Largest edit distance the fuzzy search tolerates for any word
+MAX_DISTANCE = 2
+
+
+def edit_distance(a: str, b: str, limit: int = MAX_DISTANCE) -> int:
+    """
+    Returns the edit distance between two words, counting insertions,
+    deletions, substitutions and swaps of adjacent letters (optimal string
+    alignment), or limit + 1 if it is larger than limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def allowed_distance(word: str) -> int:
+    """Returns how many edits a query word may be away from a name: 0, 1 or 2."""
+    if len(word) <= 2:
+        return 0
+    return 1 if len(word) <= 4 else MAX_DISTANCE
+
+
+class NameIndex:
+    """
+    Trigram inverted index over lower-cased names.
+
+    Substring queries only look at the records that contain every trigram of
+    the query, instead of scanning every record.
+
+    For fuzzy queries the index also keeps the distinct words of the names
+    with their deletion variants (SymSpell): a query word and a name word
+    within MAX_DISTANCE edits always share a variant, so near-words are
+    found by lookups, and edit distance is only computed against those few
+    candidate words, never against every record.
+    """
+
+    def __init__(self) -> None:
+        """Initializes an empty index."""
+        # Records are keyed by a number given on add, so sorting keys puts
+        # records back in the order they were added
+        self._postings: dict[str, set[int]] = {}        # trigram -> record keys
+        self._entries: dict[int, object] = {}           # record key -> record
+        self._keys: dict[int, int] = {}                 # id(record) -> record key
+        self._order = 0
+        self._words: dict[str, set[int]] = {}           # name word -> record keys
+        self._variants: dict[str, set[str]] = {}        # deletion variant -> name words
+
+    @staticmethod
+    def _trigrams(text: str) -> set[str]:
+        """Returns the set of 3-character substrings of the text."""
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    @staticmethod
+    def _deletions(word: str, distance: int) -> set[str]:
+        """Returns the word and every string made by deleting up to `distance` letters."""
+        variants = {word}
+        frontier = {word}
+        for _ in range(distance):
+            frontier = {w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))}
+            variants |= frontier
+        return variants
+
+    def _add_words(self, name: str, key: int) -> None:
+        """Indexes the words of a name, and the variants of words not seen before."""
+        for word in set(name.split()):
+            keys = self._words.get(word)
+            if keys is None:
+                keys = self._words[word] = set()
+                for variant in self._deletions(word, MAX_DISTANCE):
+                    self._variants.setdefault(variant, set()).add(word)
+            keys.add(key)
+
+    def _remove_words(self, name: str, key: int) -> None:
+        """Unindexes the words of a name, dropping words no name uses any more."""
+        for word in set(name.split()):
+            keys = self._words.get(word)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if keys:
+                continue
+            del self._words[word]
+            for variant in self._deletions(word, MAX_DISTANCE):
+                words = self._variants.get(variant)
+                if words is not None:
+                    words.discard(word)
+                    if not words:
+                        del self._variants[variant]
+
+    def similar_words(self, word: str) -> dict[str, int]:
+        """
+        Returns the name words within the allowed edit distance of a query
+        word, mapped to their distance.
+        """
+        limit = allowed_distance(word)
+        found = {}
+        for variant in self._deletions(word, limit):
+            for candidate in self._variants.get(variant, ()):
+                if candidate not in found:
+                    found[candidate] = edit_distance(word, candidate, limit)
+        return {candidate: distance for candidate, distance in found.items() if distance <= limit}
+
+    def __len__(self) -> int:
+        """Returns the number of indexed records."""
+        return len(self._entries)
+
+    def add(self, record) -> None:
+        """
+        Indexes a record by its name.
+
+        Args:
+            record: Any object with a `name` attribute.
+        """
+        self._order += 1
+        key = self._keys[id(record)] = self._order
+        self._entries[key] = record
+        name = record.name.lower()
+        for gram in self._trigrams(name):
+            self._postings.setdefault(gram, set()).add(key)
+        self._add_words(name, key)
+
+    def remove(self, record) -> None:
+        """Removes a record from the index."""
+        key = self._keys.pop(id(record), None)
+        if key is None:
+            return
+        del self._entries[key]
+        name = record.name.lower()
+        self._remove_words(name, key)
+        for gram in self._trigrams(name):
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+    def _trigram_candidates(self, query: str) -> set[int]:
+        """Returns the keys of the records holding every trigram of the query."""
+        # Intersect postings, smallest first
+        postings = []
+        for gram in self._trigrams(query):
+            keys = self._postings.get(gram)
+            if not keys:
+                return set()
+            postings.append(keys)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for keys in postings[1:]:
+            candidates &= keys
+            if not candidates:
+                break
+        return candidates
+
+    def _search_keys(self, query: str) -> list[int]:
+        """Returns the keys of the records whose name contains the query, in order."""
+        # Too short to have a trigram: every record is a candidate
+        if len(query) < 3:
+            return [key for key, record in self._entries.items()
+                    if query in record.name.lower()]
+
+        candidates = self._trigram_candidates(query)
+
+        # Trigrams can match out of order, so verify each candidate
+        entries = self._entries
+        return [key for key in sorted(candidates) if query in entries[key].name.lower()]
+
+    def search(self, query: str) -> list:
+        """
+        Returns the records whose lower-cased name contains the query.
+
+        Args:
+            query: Lower-cased substring to look for.
+
+        Returns:
+            Matching records in the order they were added.
+        """
+        entries = self._entries
+        return [entries[key] for key in self._search_keys(query)]
+
+    def fuzzy_search(self, query: str, limit: int | None = None) -> list[tuple[object, int]]:
+        """
+        Returns the records whose name contains the query, as search()
+        finds them (distance 0), then those whose name matches every word
+        of the query as a substring or as a whole name word a few edits
+        away, with at least one edit, e.g. "mohamed" also finds "Mohammed".
+
+        Args:
+            query: Lower-cased words to look for.
+            limit: Maximum number of results, or None for all.
+
+        Returns:
+            (record, distance) pairs, closest first, then in the order the
+            records were added. The distance is summed over the query words.
+        """
+        if not query.split():
+            return []
+        exact = set(self._search_keys(query))
+        totals: dict[int, set[int]] = {0: exact} if exact else {}
+
+        # Per query word, disjoint (distance, record keys) tiers: substring
+        # matches, then records holding a name word 1 or 2 edits away. A
+        # word without spaces is in a name only if it is in one of the name's
+        # words, so substrings are found in the distinct words, not the records.
+        words = []
+        for word in query.split():
+            matches = set().union(*(keys for name_word, keys in self._words.items()
+                                    if word in name_word))
+            near: dict[int, list[set[int]]] = {}
+            for candidate, distance in self.similar_words(word).items():
+                if distance:
+                    near.setdefault(distance, []).append(self._words[candidate])
+            tiers = [(0, matches)] if matches else []
+            taken = matches
+            for distance in sorted(near):
+                keys = set().union(*near[distance]) - taken
+                if keys:
+                    tiers.append((distance, keys))
+                    taken = taken | keys
+            if not tiers:
+                words = []
+                break
+            words.append(tiers)
+
+        # A record falls in exactly one tier per word; intersect every
+        # combination of tiers and file the records under their total
+        # distance. Every word found as is but not the query as a whole
+        # (e.g. "ali ahmed" in "Ahmed Ali") is no match at all.
+        for combination in itertools.product(*words):
+            distance = sum(distance for distance, _ in combination)
+            if not distance:
+                continue
+            sets = sorted((keys for _, keys in combination), key=len)
+            keys = sets[0].intersection(*sets[1:]) if len(sets) > 1 else sets[0]
+            keys = keys - exact
+            if keys:
+                totals.setdefault(distance, set()).update(keys)
+
+        entries = self._entries
+        results = []
+        for distance in sorted(totals):
+            keys = totals[distance]
+            if limit is not None and len(keys) > limit - len(results):
+                ordered = heapq.nsmallest(limit - len(results), keys)
+            else:
+                ordered = sorted(keys)
+            results += [(entries[key], distance) for key in ordered]
+            if limit is not None and len(results) >= limit:
+                break
+        return results
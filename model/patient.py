@@ -7,7 +7,12 @@ class Patient(Person):
     Inherits from Person class and adds medical record functionality.
     """
 
-    def __init__(self, name: str, age: int, medical_record: str) -> None:
+    # The medical record is either held inline (_blobs is None) or stored in
+    # a blob store, in which case _medical_record is its offset there
+    __slots__ = ('_medical_record', '_blobs')
+
+    def __init__(self, name: str, age: int, medical_record: str,
+                 record_id: int | None = None) -> None:
         """
         Initializes the Patient class with name, age, and medical record.
 
@@ -15,10 +20,64 @@ class Patient(Person):
             name: The patient's name.
             age: The patient's age.
             medical_record: The patient's medical record information.
+            record_id: Stable hospital-wide ID, assigned on admission if None.
         """
         # Call the parent class constructor
-        super().__init__(name, age)
-        self.medical_record = medical_record
+        super().__init__(name, age, record_id)
+        self._medical_record = medical_record
+        self._blobs = None
+
+    @classmethod
+    def from_blob(cls, name: str, age: int, blobs, offset: int,
+                  record_id: int | None = None) -> "Patient":
+        """
+        Creates a patient whose medical record stays in a blob store until it
+        is read.
+
+        Args:
+            blobs: BlobStore holding the record.
+            offset: Offset of the record in the blob store.
+        """
+        patient = cls(name, age, None, record_id)
+        patient._medical_record = offset
+        patient._blobs = blobs
+        return patient
+
+    @property
+    def medical_record(self) -> str:
+        """Returns the medical record, reading it from the blob store if needed."""
+        if self._blobs is None:
+            return self._medical_record
+        return self._blobs.get(self._medical_record)
+
+    @medical_record.setter
+    def medical_record(self, medical_record: str) -> None:
+        """Replaces the medical record with an inline one."""
+        self._medical_record = medical_record
+        self._blobs = None
+
+    @property
+    def blob_backed(self) -> bool:
+        """Returns True if the medical record is read from a blob store on every access."""
+        return self._blobs is not None
+
+    def record_offset(self, blobs) -> int:
+        """
+        Returns the offset of the medical record in the given blob store,
+        moving the record there first if it is held inline or elsewhere.
+        """
+        if self._blobs is not blobs:
+            self._medical_record = blobs.put(self.medical_record)
+            self._blobs = blobs
+        return self._medical_record
+
+    def fingerprint(self) -> tuple:
+        """
+        Returns the values the patient's views are built from. The medical
+        record is represented by what is stored for it, so a blob-backed
+        record is not read just to check.
+        """
+        return (self.name, self.age, self.record_id, self._medical_record, self._blobs)
 
     def view_record(self) -> str:
         """
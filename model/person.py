@@ -3,16 +3,30 @@ class Person:
     Base class representing a person in the Hospital System.
     """
     
-    def __init__(self, name: str, age: int) -> None:
+    # No per-instance __dict__: keeps millions of records compact
+    __slots__ = ('name', 'age', 'record_id')
+    
+    def __init__(self, name: str, age: int, record_id: int | None = None) -> None:
         """
-        Initializes the Person class with name and age.
+        Initializes the Person class with name, age and an optional record ID.
+        Records without an ID get one when they join a hospital.
         """
         # Input validation
         if not isinstance(name, str) or not isinstance(age, int):
             raise TypeError("Name must be a string and age must be an integer!")
+        if record_id is not None and not isinstance(record_id, int):
+            raise TypeError("Record ID must be an integer!")
         
         self.name = name
         self.age = age
+        self.record_id = record_id
+
+    def fingerprint(self) -> tuple:
+        """
+        Returns the values the record's views are built from; a cached
+        view is current as long as this compares equal.
+        """
+        return (self.name, self.age, self.record_id)
 
     def view_info(self) -> str:
         """
@@ -0,0 +1,71 @@
+import threading
+
+
+class RecordSet:
+    """
+    Insertion-ordered collection of records with O(1) add and remove.
+
+    Used instead of a list for Department.patients/staff, so removing a
+    record never shifts the records after it.
+
+    Iteration works on a copy-on-write snapshot: readers get the current
+    contents without holding any lock, and the next write copies the
+    records first instead of changing what readers are looking at.
+    """
+
+    def __init__(self, records=()) -> None:
+        """Initializes the set, optionally with some records."""
+        self._records: dict[int, object] = {}
+        self._shared = False    # True while a snapshot of _records is handed out
+        self._lock = threading.Lock()
+        for record in records:
+            self.append(record)
+
+    def _writable(self) -> dict:
+        """Returns the records dict, copying it first if a snapshot shares it."""
+        if self._shared:
+            self._records = dict(self._records)
+            self._shared = False
+        return self._records
+
+    def append(self, record) -> None:
+        """Adds a record at the end."""
+        with self._lock:
+            self._writable()[id(record)] = record
+
+    def remove(self, record) -> None:
+        """
+        Removes a record.
+
+        Raises:
+            ValueError: If the record is not in the set.
+        """
+        with self._lock:
+            if id(record) not in self._records:
+                raise ValueError("Record is not in this set!")
+            del self._writable()[id(record)]
+
+    def snapshot(self):
+        """
+        Returns a read-only view of the current records.
+        Later writes do not change the view.
+        """
+        with self._lock:
+            self._shared = True
+            return self._records.values()
+
+    def __contains__(self, record) -> bool:
+        """Returns True if the record is in the set."""
+        return id(record) in self._records
+
+    def __iter__(self):
+        """Iterates over a snapshot of the records in insertion order."""
+        return iter(self.snapshot())
+
+    def __len__(self) -> int:
+        """Returns the number of records."""
+        return len(self._records)
+
+    def __bool__(self) -> bool:
+        """Returns True if the set is not empty."""
+        return bool(self._records)
@@ -0,0 +1,447 @@
+import calendar
+from datetime import datetime, time, timedelta
+from itertools import repeat
+from operator import itemgetter
+
+from .patient import Patient
+from .staff import Staff
+from .timeline import Timeline
+
+
+# Times are kept as whole minutes since this moment, in packed integer columns
+EPOCH = datetime(1970, 1, 1)
+
+# Daily shifts handed out by generate_month(), in rotation: day, evening, night
+DEFAULT_SHIFTS = ((time(8), time(16)), (time(16), time(0)), (time(0), time(8)))
+
+
+def to_minutes(moment: datetime) -> int:
+    """Returns a naive datetime as whole minutes since EPOCH."""
+    # Input validation
+    if not isinstance(moment, datetime):
+        raise TypeError("Time must be a datetime!")
+    return (moment - EPOCH) // timedelta(minutes=1)
+
+
+def from_minutes(minutes: int) -> datetime:
+    """Returns minutes since EPOCH as a datetime."""
+    return EPOCH + timedelta(minutes=minutes)
+
+
+class Appointment:
+    """A patient's booking with a staff member."""
+
+    __slots__ = ('appointment_id', 'patient', 'staff', 'start', 'end', 'reason')
+
+    def __init__(self, appointment_id: int, patient: Patient, staff: Staff,
+                 start: int, end: int, reason: str = "") -> None:
+        """Initializes the appointment; start and end are minutes since EPOCH."""
+        self.appointment_id: int = appointment_id
+        self.patient: Patient = patient
+        self.staff: Staff = staff
+        self.start: int = start
+        self.end: int = end
+        self.reason: str = reason
+
+    @property
+    def starts_at(self) -> datetime:
+        """Returns the start time."""
+        return from_minutes(self.start)
+
+    @property
+    def ends_at(self) -> datetime:
+        """Returns the end time."""
+        return from_minutes(self.end)
+
+    def as_dict(self) -> dict:
+        """Returns the appointment as JSON-serializable values."""
+        return {'id': self.appointment_id, 'patient_id': self.patient.record_id,
+                'staff_id': self.staff.record_id, 'start': self.starts_at.isoformat(),
+                'end': self.ends_at.isoformat(), 'reason': self.reason}
+
+
+class StaffSchedule:
+    """One staff member's shifts and the bookings within them."""
+
+    __slots__ = ('staff', 'shifts', 'bookings')
+
+    def __init__(self, staff: Staff) -> None:
+        """Initializes an empty schedule."""
+        self.staff: Staff = staff
+        self.shifts: Timeline = Timeline()
+        self.bookings: Timeline = Timeline()     # items are Appointments
+
+    def free_slot(self, after: int, minutes: int, before: int | None = None) -> int | None:
+        """
+        Returns the earliest start, at or after `after`, of `minutes` free
+        minutes within one shift, or None if there is none starting before
+        `before`.
+
+        Only the shifts from `after` on and the bookings inside them are
+        visited, each found by bisection.
+        """
+        shifts = self.shifts
+        bookings = self.bookings
+        i = shifts.next_after(after)
+        while i is not None and i < len(shifts):
+            shift_start, shift_end, _ = shifts.interval(i)
+            free = max(shift_start, after)
+            if before is not None and free >= before:
+                return None
+            j = bookings.next_after(free)
+            while j is not None and j < len(bookings):
+                booked_start, booked_end, _ = bookings.interval(j)
+                if booked_start >= shift_end or booked_start - free >= minutes:
+                    break
+                free = booked_end
+                j += 1
+            if shift_end - free >= minutes and (before is None or free < before):
+                return free
+            i += 1
+        return None
+
+
+class Schedule:
+    """
+    Shifts and appointments of a department's staff and patients.
+
+    Every staff member has a StaffSchedule of non-overlapping shifts and
+    bookings, and every patient a Timeline of their appointments, so a
+    booking's conflicts with either side are found by bisection. Writers
+    hold the department's write lock, readers its read lock.
+    """
+
+    def __init__(self, department) -> None:
+        """Initializes an empty schedule for the department."""
+        self.department = department
+        self.appointments: dict[int, Appointment] = {}
+        self.next_id: int = 1
+        self._staff: dict[int, StaffSchedule] = {}      # id(staff member) -> schedule
+        self._patients: dict[int, Timeline] = {}        # id(patient) -> appointments
+
+    def __len__(self) -> int:
+        """Returns the number of appointments."""
+        return len(self.appointments)
+
+    def _staff_schedule(self, staff: Staff) -> StaffSchedule:
+        """Returns a staff member's schedule, creating it on first use; the caller holds the lock."""
+        # Input validation
+        if not isinstance(staff, Staff):
+            raise TypeError("Staff member must be a Staff object!")
+        if staff not in self.department.staff:
+            raise ValueError(f"{staff.name} does not work in {self.department.name}!")
+
+        schedule = self._staff.get(id(staff))
+        if schedule is None:
+            schedule = self._staff[id(staff)] = StaffSchedule(staff)
+        return schedule
+
+    def add_shift(self, staff: Staff, start: datetime, end: datetime) -> None:
+        """
+        Adds a shift to a staff member's schedule.
+
+        Raises:
+            ValueError: If it overlaps another of their shifts.
+        """
+        with self.department.lock.write():
+            self._staff_schedule(staff).shifts.add(to_minutes(start), to_minutes(end))
+
+    def remove_shift(self, staff: Staff, start: datetime) -> None:
+        """
+        Removes the shift starting at `start`.
+
+        Raises:
+            KeyError: If there is no such shift.
+            ValueError: If appointments are booked in it.
+        """
+        with self.department.lock.write():
+            schedule = self._staff_schedule(staff)
+            minutes = to_minutes(start)
+            shift = schedule.shifts.covering(minutes, minutes)
+            if shift is None or shift[0] != minutes:
+                raise KeyError(start)
+            if schedule.bookings.conflicts(shift[0], shift[1]):
+                raise ValueError("Appointments are booked in this shift!")
+            schedule.shifts.remove(minutes)
+
+    def shifts(self, staff: Staff, start: datetime, end: datetime) -> list[tuple[datetime, datetime]]:
+        """Returns a staff member's shifts overlapping [start, end), in time order."""
+        with self.department.lock.read():
+            schedule = self._staff.get(id(staff))
+            if schedule is None:
+                return []
+            return [(from_minutes(s), from_minutes(e))
+                    for s, e, _ in schedule.shifts.overlapping(to_minutes(start), to_minutes(end))]
+
+    def generate_month(self, year: int, month: int, shifts=DEFAULT_SHIFTS,
+                       days_off: int = 2, staff=None) -> int:
+        """
+        Generates a month of shifts for many staff members at once.
+
+        Staff members take the daily shifts in rotation and have `days_off`
+        consecutive days off every week, staggered so that every day is
+        covered. Shifts that would overlap existing ones are skipped.
+
+        Args:
+            year: Year.
+            month: Month (1-12).
+            shifts: Daily (start time, end time) pairs; a shift ending at or
+                before its start time ends the next day.
+            days_off: Days off per week.
+            staff: Staff members to schedule; the whole department if None.
+
+        Returns:
+            The number of shifts added.
+        """
+        # Input validation
+        if not shifts:
+            raise ValueError("At least one shift is needed!")
+        if not 0 <= days_off < 7:
+            raise ValueError("Days off must be between 0 and 6!")
+
+        first = datetime(year, month, 1)
+        days = calendar.monthrange(year, month)[1]
+        day_start = to_minutes(first)
+        # Minutes after midnight of every shift's start and its length
+        patterns = []
+        for start, end in shifts:
+            begin = start.hour * 60 + start.minute
+            length = (end.hour * 60 + end.minute - begin) % (24 * 60) or 24 * 60
+            patterns.append((begin, length))
+
+        added = 0
+        with self.department.lock.write():
+            members = list(self.department.staff if staff is None else staff)
+            for number, member in enumerate(members):
+                begin, length = patterns[number % len(patterns)]
+                # Staggered weekly days off, starting on a different weekday per member
+                off = {(number + k) % 7 for k in range(days_off)}
+                intervals = []
+                for day in range(days):
+                    if (first.weekday() + day) % 7 in off:
+                        continue
+                    start = day_start + day * 24 * 60 + begin
+                    intervals.append((start, start + length, None))
+                added += self._staff_schedule(member).shifts.extend(intervals)
+        return added
+
+    def book(self, patient: Patient, staff: Staff, start: datetime, minutes: int,
+             reason: str = "", appointment_id: int | None = None) -> Appointment:
+        """
+        Books an appointment of a patient with a staff member.
+
+        Args:
+            appointment_id: ID to keep, e.g. when a journal is replayed;
+                the next free one if None.
+
+        Raises:
+            ValueError: If the time is outside the staff member's shifts or
+                overlaps another appointment of either of them, or the ID
+                is taken.
+        """
+        # Input validation
+        if not isinstance(patient, Patient):
+            raise TypeError("Patient must be a Patient object!")
+        if not isinstance(minutes, int) or minutes <= 0:
+            raise ValueError("Duration must be a positive number of minutes!")
+
+        begin = to_minutes(start)
+        with self.department.lock.write():
+            return self._book(patient, self._staff_schedule(staff), begin, begin + minutes, reason,
+                              appointment_id)
+
+    def _book(self, patient: Patient, schedule: StaffSchedule, start: int, end: int,
+              reason: str, appointment_id: int | None = None) -> Appointment:
+        """Checks and records a booking; the caller holds the write lock."""
+        if appointment_id in self.appointments:
+            raise ValueError(f"Appointment #{appointment_id} already exists!")
+        if patient not in self.department.patients:
+            raise ValueError(f"{patient.name} is not a patient of {self.department.name}!")
+        if schedule.shifts.covering(start, end) is None:
+            raise ValueError(f"{schedule.staff.name} is not on shift then!")
+        if schedule.bookings.conflicts(start, end):
+            raise ValueError(f"{schedule.staff.name} already has an appointment then!")
+        visits = self._patients.get(id(patient))
+        if visits is not None and visits.conflicts(start, end):
+            raise ValueError(f"{patient.name} already has an appointment then!")
+
+        if appointment_id is None:
+            appointment_id = self.next_id
+        appointment = Appointment(appointment_id, patient, schedule.staff, start, end, reason)
+        self.next_id = max(self.next_id, appointment_id + 1)
+        schedule.bookings.add(start, end, appointment)
+        if visits is None:
+            visits = self._patients[id(patient)] = Timeline()
+        visits.add(start, end, appointment)
+        self.appointments[appointment.appointment_id] = appointment
+        return appointment
+
+    def cancel(self, appointment_id: int) -> Appointment:
+        """
+        Cancels an appointment.
+
+        Raises:
+            KeyError: If there is no appointment with that ID.
+        """
+        with self.department.lock.write():
+            appointment = self.appointments[appointment_id]
+            self._cancel(appointment)
+            return appointment
+
+    def _cancel(self, appointment: Appointment) -> None:
+        """Removes a booking; the caller holds the write lock."""
+        del self.appointments[appointment.appointment_id]
+        self._staff[id(appointment.staff)].bookings.remove(appointment.start)
+        visits = self._patients[id(appointment.patient)]
+        visits.remove(appointment.start)
+        if not visits:
+            del self._patients[id(appointment.patient)]
+
+    def appointments_of(self, record, start: datetime | None = None,
+                        end: datetime | None = None) -> list[Appointment]:
+        """Returns a patient's or staff member's appointments, optionally within [start, end)."""
+        low = -2 ** 62 if start is None else to_minutes(start)
+        high = 2 ** 62 if end is None else to_minutes(end)
+        with self.department.lock.read():
+            if isinstance(record, Staff):
+                schedule = self._staff.get(id(record))
+                timeline = schedule.bookings if schedule is not None else None
+            else:
+                timeline = self._patients.get(id(record))
+            if timeline is None:
+                return []
+            return [appointment for _, _, appointment in timeline.overlapping(low, high)]
+
+    def next_free_slot(self, position: str, after: datetime,
+                       minutes: int) -> tuple[Staff, datetime] | None:
+        """
+        Finds the earliest time at or after `after` when any staff member
+        with the given position, e.g. "Cardiologist", is on shift and free
+        for `minutes` minutes.
+
+        Candidates are visited in the order their next shift starts, and
+        the search stops once that is later than the best slot found, so
+        most of them cost one bisection.
+
+        Returns:
+            (staff member, start time), or None if no one is free.
+        """
+        with self.department.lock.read():
+            return self._next_free_slot(position, to_minutes(after), minutes)
+
+    def _next_free_slot(self, position: str, after: int,
+                        minutes: int) -> tuple[Staff, datetime] | None:
+        """Finds the next free slot; the caller holds the lock."""
+        candidates = []
+        schedules = self._staff
+        for member in self.department.staff_indexes['position'].get(position):
+            schedule = schedules.get(id(member))
+            if schedule is None:
+                continue
+            start = schedule.shifts.next_start(after)
+            if start is not None:
+                candidates.append((start if start > after else after, schedule))
+        candidates.sort(key=itemgetter(0))
+
+        best = None
+        for earliest, schedule in candidates:
+            if best is not None and earliest >= best[1]:
+                break
+            start = schedule.free_slot(after, minutes, None if best is None else best[1])
+            if start is not None and (best is None or start < best[1]):
+                best = (schedule, start)
+        if best is None:
+            return None
+        return best[0].staff, from_minutes(best[1])
+
+    def book_next_free(self, patient: Patient, position: str, after: datetime, minutes: int,
+                       reason: str = "") -> Appointment | None:
+        """
+        Books the patient with whichever staff member of the position is
+        free first, or returns None if no one is.
+        """
+        # Input validation
+        if not isinstance(patient, Patient):
+            raise TypeError("Patient must be a Patient object!")
+        if not isinstance(minutes, int) or minutes <= 0:
+            raise ValueError("Duration must be a positive number of minutes!")
+
+        after = to_minutes(after)
+        with self.department.lock.write():
+            visits = self._patients.get(id(patient))
+            while True:
+                found = self._next_free_slot(position, after, minutes)
+                if found is None:
+                    return None
+                staff, start = found
+                begin = to_minutes(start)
+                if visits is None or not visits.conflicts(begin, begin + minutes):
+                    return self._book(patient, self._staff[id(staff)], begin, begin + minutes,
+                                      reason)
+                # The patient is busy then: try after their conflicting appointment
+                after = max(end for _, end, _ in visits.overlapping(begin, begin + minutes))
+
+    def as_dict(self) -> dict:
+        """
+        Returns the shifts and appointments as JSON-serializable values,
+        with times in minutes since EPOCH and records by ID; empty if
+        nothing was ever scheduled.
+        """
+        with self.department.lock.read():
+            shifts = []
+            for schedule in self._staff.values():
+                if schedule.shifts:
+                    times = []
+                    for start, end, _ in schedule.shifts:
+                        times += (start, end)
+                    shifts.append([schedule.staff.record_id, times])
+            if not shifts and self.next_id == 1:
+                return {}
+            appointments = [[a.appointment_id, a.patient.record_id, a.staff.record_id,
+                             a.start, a.end, a.reason] for a in self.appointments.values()]
+            return {'next_id': self.next_id, 'shifts': shifts, 'appointments': appointments}
+
+    def load_dict(self, data: dict) -> None:
+        """
+        Adds the shifts and appointments of as_dict() output. The records
+        they refer to must already be in the department.
+
+        Raises:
+            ValueError: If a record is missing or the bookings conflict.
+        """
+        if not data:
+            return
+        with self.department.lock.write():
+            records = {record.record_id: record for record in self.department.patients}
+            records.update((member.record_id, member) for member in self.department.staff)
+            try:
+                for staff_id, times in data['shifts']:
+                    self._staff_schedule(records[staff_id]).shifts.extend(
+                        zip(times[::2], times[1::2], repeat(None)))
+                # In time order, so every booking is appended to its timelines
+                for appointment_id, patient_id, staff_id, start, end, reason in sorted(
+                        data['appointments'], key=itemgetter(3)):
+                    self._book(records[patient_id], self._staff_schedule(records[staff_id]),
+                               start, end, reason, appointment_id)
+            except KeyError as e:
+                raise ValueError(f"Schedule of {self.department.name} refers to unknown "
+                                 f"record {e.args[0]}!") from None
+            self.next_id = max(self.next_id, data['next_id'])
+
+    def _forget(self, record) -> None:
+        """
+        Cancels the appointments of a patient or staff member leaving the
+        department, and drops their shifts; the caller holds the write lock.
+        """
+        if isinstance(record, Staff):
+            schedule = self._staff.get(id(record))
+            if schedule is None:
+                return
+            for _, _, appointment in schedule.bookings:
+                self._cancel(appointment)
+            del self._staff[id(record)]
+        else:
+            visits = self._patients.get(id(record))
+            if visits is not None:
+                for _, _, appointment in visits:
+                    self._cancel(appointment)
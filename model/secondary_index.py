@@ -0,0 +1,193 @@
+import threading
+from bisect import bisect_left, bisect_right
+
+
+class SortedIndex:
+    """
+    Records kept sorted by one value, e.g. age or lower-cased name, for
+    range and prefix lookups by bisection.
+
+    The records are split into sorted chunks, each a pair of parallel value
+    and record arrays, with the largest value of every chunk kept apart.
+    Adding or removing a record bisects to its chunk and inserts or deletes
+    there, so it costs O(log n) plus moving at most 2 * CHUNK entries,
+    instead of shifting one array of every record; a chunk that grows to
+    twice CHUNK is split in two. Records with equal values keep the order
+    they were added in.
+    """
+
+    CHUNK = 512
+
+    def __init__(self, key) -> None:
+        """
+        Initializes an empty index.
+
+        Args:
+            key: Function returning the value a record is sorted by.
+        """
+        self.key = key
+        self._values: list[list] = []      # sorted values, chunk by chunk
+        self._records: list[list] = []     # records, in the order of _values
+        self._maxes: list = []             # last value of every chunk
+        self._len: int = 0
+        # Adds and removes restructure the chunks, so readers take this too
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Returns the number of indexed records."""
+        return self._len
+
+    def add(self, record) -> None:
+        """Indexes a record after those with the same value."""
+        value = self.key(record)
+        with self._lock:
+            maxes = self._maxes
+            if not maxes:
+                self._values.append([value])
+                self._records.append([record])
+                maxes.append(value)
+            else:
+                # First chunk whose values go past this one, or else the last
+                c = min(bisect_right(maxes, value), len(maxes) - 1)
+                values = self._values[c]
+                records = self._records[c]
+                i = bisect_right(values, value)
+                values.insert(i, value)
+                records.insert(i, record)
+                maxes[c] = values[-1]
+                if len(values) >= 2 * self.CHUNK:
+                    half = len(values) >> 1
+                    self._values[c:c + 1] = [values[:half], values[half:]]
+                    self._records[c:c + 1] = [records[:half], records[half:]]
+                    maxes[c:c + 1] = [values[half - 1], values[-1]]
+            self._len += 1
+
+    def remove(self, record) -> None:
+        """Removes a record, which must still have the value it was indexed with."""
+        value = self.key(record)
+        with self._lock:
+            maxes = self._maxes
+            # Records with this value may continue into the following chunks
+            for c in range(bisect_left(maxes, value), len(maxes)):
+                values = self._values[c]
+                records = self._records[c]
+                start = bisect_left(values, value)
+                for i in range(start, bisect_right(values, value, start)):
+                    if records[i] is record:
+                        del values[i]
+                        del records[i]
+                        if values:
+                            maxes[c] = values[-1]
+                        else:
+                            del self._values[c], self._records[c], maxes[c]
+                        self._len -= 1
+                        return
+                if maxes[c] != value:
+                    return
+
+    def _bounds(self, low, high, inclusive: bool = True) -> tuple[int, int, int, int]:
+        """
+        Locates the records with low <= value <= high, or value < high
+        unless inclusive (None: unbounded), as (first chunk, start in it,
+        last chunk, end in it); nothing matches if first > last. The caller
+        holds the lock.
+        """
+        maxes = self._maxes
+        find_high = bisect_right if inclusive else bisect_left
+        first = 0 if low is None else bisect_left(maxes, low)
+        last = len(maxes) - 1 if high is None else min(find_high(maxes, high), len(maxes) - 1)
+        if first > last:
+            return first, 0, last, 0
+        start = 0 if low is None else bisect_left(self._values[first], low)
+        values = self._values[last]
+        if high is None:
+            end = len(values)
+        else:
+            end = find_high(values, high, start if first == last else 0)
+        return first, start, last, end
+
+    def _count(self, first: int, start: int, last: int, end: int) -> int:
+        """Returns the number of records _bounds() located; the caller holds the lock."""
+        if first >= last:
+            return end - start if first == last else 0
+        return (len(self._values[first]) - start + sum(map(len, self._values[first + 1:last]))
+                + end)
+
+    def _slice(self, first: int, start: int, last: int, end: int) -> list:
+        """Returns the records _bounds() located; the caller holds the lock."""
+        if first >= last:
+            return self._records[first][start:end] if first == last else []
+        records = self._records[first][start:]
+        for chunk in self._records[first + 1:last]:
+            records += chunk
+        records += self._records[last][:end]
+        return records
+
+    def count(self, low=None, high=None) -> int:
+        """Returns the number of records with low <= value <= high (None: unbounded)."""
+        with self._lock:
+            return self._count(*self._bounds(low, high))
+
+    def range(self, low=None, high=None) -> list:
+        """Returns the records with low <= value <= high (None: unbounded), sorted by value."""
+        with self._lock:
+            return self._slice(*self._bounds(low, high))
+
+    @staticmethod
+    def _prefix_bounds(prefix: str) -> tuple[str, str | None]:
+        """Returns the range of strings that start with the prefix."""
+        if not prefix:
+            return prefix, None
+        return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+    def count_prefix(self, prefix: str) -> int:
+        """Returns the number of records whose string value starts with the prefix."""
+        with self._lock:
+            low, high = self._prefix_bounds(prefix)
+            return self._count(*self._bounds(low, high, False))
+
+    def prefix(self, prefix: str) -> list:
+        """Returns the records whose string value starts with the prefix, sorted by value."""
+        with self._lock:
+            low, high = self._prefix_bounds(prefix)
+            return self._slice(*self._bounds(low, high, False))
+
+
+class HashIndex:
+    """
+    Records grouped by one value, e.g. staff members by position, for
+    equality lookups.
+    """
+
+    def __init__(self, key) -> None:
+        """
+        Initializes an empty index.
+
+        Args:
+            key: Function returning the value a record is grouped by.
+        """
+        self.key = key
+        self._groups: dict[object, dict[int, object]] = {}    # value -> id(record) -> record
+
+    def __len__(self) -> int:
+        """Returns the number of indexed records."""
+        return sum(len(group) for group in self._groups.values())
+
+    def add(self, record) -> None:
+        """Indexes a record."""
+        self._groups.setdefault(self.key(record), {})[id(record)] = record
+
+    def remove(self, record) -> None:
+        """Removes a record, which must still have the value it was indexed with."""
+        value = self.key(record)
+        group = self._groups.get(value)
+        if group is not None and group.pop(id(record), None) is not None and not group:
+            del self._groups[value]
+
+    def count(self, value) -> int:
+        """Returns the number of records with the value."""
+        return len(self._groups.get(value, ()))
+
+    def get(self, value) -> list:
+        """Returns the records with the value, in the order they were added."""
+        return list(self._groups.get(value, {}).values())
@@ -1,16 +1,29 @@
-from .person import Person
-
-
-class Staff(Person):
-    """Class for hospital staff, inheriting from Person."""
-
-    def __init__(self, name: str, age: int, position: str):
-        """
-        Initializes the Staff class with name, age, and position.
-        """
-        super().__init__(name, age)
-        self.position = position
-
-    def view_info(self) -> str:
-        """View staff information."""
+import sys
+
+from .person import Person
+
+
+class Staff(Person):
+    """Class for hospital staff, inheriting from Person."""
+
+    __slots__ = ('position',)
+
+    def __init__(self, name: str, age: int, position: str, record_id: int | None = None):
+        """
+        Initializes the Staff class with name, age, position and an optional record ID.
+        """
+        super().__init__(name, age, record_id)
+        # Input validation
+        if not isinstance(position, str):
+            raise TypeError("Position must be a string!")
+
+        # Positions repeat across records, so share one string per value
+        self.position = sys.intern(position)
+
+    def fingerprint(self) -> tuple:
+        """Returns the values the staff member's views are built from."""
+        return (self.name, self.age, self.record_id, self.position)
+
+    def view_info(self) -> str:
+        """View staff information."""
         return f"Staff Name: {self.name}, Age: {self.age}, Position: {self.position}"
\ No newline at end of file
@@ -0,0 +1,170 @@
+from .patient import Patient
+from .staff import Staff
+
+
+class Statistics:
+    """
+    Incrementally maintained aggregates over a group of patients and staff.
+
+    Updated on every add or remove, so reading counts, the patient age
+    histogram, mean and median age, or headcount per position never scans
+    the records.
+    """
+
+    def __init__(self) -> None:
+        """Initializes empty aggregates."""
+        self.patient_count: int = 0
+        self.staff_count: int = 0
+        self.age_total: int = 0
+        self.age_counts: dict[int, int] = {}    # patient age -> number of patients
+        self.positions: dict[str, int] = {}     # staff position -> headcount
+
+    def add(self, record) -> None:
+        """Counts a patient or staff member in."""
+        if isinstance(record, Patient):
+            self.patient_count += 1
+            self.age_total += record.age
+            self.age_counts[record.age] = self.age_counts.get(record.age, 0) + 1
+        elif isinstance(record, Staff):
+            self.staff_count += 1
+            self.positions[record.position] = self.positions.get(record.position, 0) + 1
+
+    def remove(self, record) -> None:
+        """Counts a patient or staff member out."""
+        if isinstance(record, Patient):
+            self.patient_count -= 1
+            self.age_total -= record.age
+            self._decrement(self.age_counts, record.age)
+        elif isinstance(record, Staff):
+            self.staff_count -= 1
+            self._decrement(self.positions, record.position)
+
+    @staticmethod
+    def _decrement(counts: dict, key) -> None:
+        """Decrements a counter, dropping it when it reaches zero."""
+        if counts[key] == 1:
+            del counts[key]
+        else:
+            counts[key] -= 1
+
+    def mean_age(self) -> float | None:
+        """Returns the mean patient age, or None without patients."""
+        if not self.patient_count:
+            return None
+        return self.age_total / self.patient_count
+
+    def median_age(self) -> float | None:
+        """
+        Returns the median patient age, or None without patients.
+
+        Walks the distinct ages, which are bounded by the human lifespan
+        rather than the number of patients.
+        """
+        # Copy first: writers on other threads may be updating the counts
+        age_counts = self.age_counts.copy()
+        count = sum(age_counts.values())
+        if not count:
+            return None
+        low_rank = (count - 1) // 2
+        high_rank = count // 2
+        low = None
+        seen = 0
+        for age in sorted(age_counts):
+            seen += age_counts[age]
+            if low is None and seen > low_rank:
+                low = age
+            if seen > high_rank:
+                return (low + age) / 2
+
+    def age_histogram(self, bucket: int = 10) -> dict[str, int]:
+        """
+        Returns the number of patients per age bucket, e.g. {'30-39': 4}.
+        """
+        histogram = {}
+        age_counts = self.age_counts.copy()
+        for age in sorted(age_counts):
+            start = age // bucket * bucket
+            label = f"{start}-{start + bucket - 1}"
+            histogram[label] = histogram.get(label, 0) + age_counts[age]
+        return histogram
+
+    def as_dict(self) -> dict:
+        """Returns the aggregates as a plain dictionary."""
+        return {
+            'patients': self.patient_count,
+            'staff': self.staff_count,
+            'mean_age': self.mean_age(),
+            'median_age': self.median_age(),
+            'age_histogram': self.age_histogram(),
+            'positions': dict(sorted(self.positions.copy().items())),
+        }
+
+    def merge(self, other: "Statistics") -> None:
+        """Adds the aggregates of another group, e.g. another hospital, to these."""
+        self.patient_count += other.patient_count
+        self.staff_count += other.staff_count
+        self.age_total += other.age_total
+        for age, count in other.age_counts.items():
+            self.age_counts[age] = self.age_counts.get(age, 0) + count
+        for position, count in other.positions.items():
+            self.positions[position] = self.positions.get(position, 0) + count
+
+    def matches(self, other: "Statistics") -> bool:
+        """Returns True if both hold exactly the same aggregates."""
+        return (self.patient_count == other.patient_count
+                and self.staff_count == other.staff_count
+                and self.age_total == other.age_total
+                and self.age_counts == other.age_counts
+                and self.positions == other.positions)
+
+    def state(self) -> dict:
+        """Returns the raw aggregates as JSON-serializable values, for from_state()."""
+        return {
+            'patient_count': self.patient_count,
+            'staff_count': self.staff_count,
+            'age_total': self.age_total,
+            'age_counts': {str(age): count for age, count in self.age_counts.copy().items()},
+            'positions': self.positions.copy(),
+        }
+
+    @classmethod
+    def from_state(cls, data: dict) -> "Statistics":
+        """Rebuilds aggregates saved with state(), e.g. in a sidecar index."""
+        stats = cls()
+        stats.patient_count = data['patient_count']
+        stats.staff_count = data['staff_count']
+        stats.age_total = data['age_total']
+        stats.age_counts = {int(age): count for age, count in data['age_counts'].items()}
+        stats.positions = dict(data['positions'])
+        return stats
+
+    @classmethod
+    def recount(cls, patients, staff) -> "Statistics":
+        """Builds aggregates from scratch with a full scan."""
+        stats = cls()
+        for patient in patients:
+            stats.add(patient)
+        for member in staff:
+            stats.add(member)
+        return stats
+
+
+def verify_statistics(hospital) -> list[str]:
+    """
+    Checks the maintained aggregates of a hospital against a full recount.
+
+    Returns:
+        A description of every mismatch; empty when everything is consistent.
+    """
+    problems = []
+    for dept in hospital.departments:
+        if not dept.stats.matches(Statistics.recount(dept.patients, dept.staff)):
+            problems.append(f"Department '{dept.name}' statistics are out of date")
+
+    expected = Statistics.recount(
+        (p for dept in hospital.departments for p in dept.patients),
+        (s for dept in hospital.departments for s in dept.staff),
+    )
+    if not hospital.stats.matches(expected):
+        problems.append(f"Hospital '{hospital.name}' statistics are out of date")
+    return problems
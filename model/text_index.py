@@ -0,0 +1,213 @@
+import heapq
+import math
+import re
+from collections import Counter
+
+
+# Runs of letters and digits; everything else separates tokens
+TOKEN = re.compile(r"[a-z0-9]+")
+
+# Words too common to help ranking
+STOPWORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have",
+    "in", "is", "it", "its", "of", "on", "or", "that", "the", "to", "was", "were", "with",
+))
+
+
+def stem(word: str) -> str:
+    """
+    Strips common English inflections, so that e.g. "controlled",
+    "controls" and "control" index to the same term. A light, Porter-style
+    stemmer: it only needs to map a query and a record to the same term.
+    """
+    if len(word) <= 3 or not word.isalpha():
+        return word
+
+    # Plurals
+    if word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+
+    # Past tense, gerunds and adverbs, undoubling the consonant left behind
+    for suffix in ("ingly", "edly", "ing", "ed", "ly"):
+        base = word[:-len(suffix)]
+        if word.endswith(suffix) and len(base) >= 3 and any(c in "aeiouy" for c in base):
+            word = base
+            if word[-1] == word[-2] and word[-1] not in "aeiouslz":
+                word = word[:-1]
+            elif word.endswith("ll") and len(word) > 5:
+                word = word[:-1]
+            break
+
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+class TextIndex:
+    """
+    BM25-ranked inverted index over free text, keyed by record ID.
+
+    The postings of a term are grouped by (term frequency, document length).
+    Every record in a group has the same BM25 weight for that term, so a
+    record's score only depends on which group it falls in for each query
+    term. A query walks these combinations best first and intersects their
+    groups, stopping once it has k records, instead of scoring every record
+    that contains a common term.
+
+    Records are removed by tokenizing their text again, so a record's text
+    must not change while it is indexed.
+    """
+
+    # BM25 term frequency saturation and length normalization
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, stem: bool = True) -> None:
+        """
+        Initializes an empty index.
+
+        Args:
+            stem: Index and query word stems instead of the exact words.
+        """
+        self.stem: bool = stem
+        self.documents: int = 0
+        self.total_length: int = 0
+        self._postings: dict[str, dict[tuple[int, int], set[int]]] = {}  # term -> (tf, length) -> IDs
+        self._df: dict[str, int] = {}      # term -> number of records containing it
+
+    def tokens(self, text: str) -> list[str]:
+        """Returns the indexed terms of a text, in order."""
+        words = [word for word in TOKEN.findall(text.lower()) if word not in STOPWORDS]
+        if self.stem:
+            return [stem(word) for word in words]
+        return words
+
+    def __len__(self) -> int:
+        """Returns the number of indexed records."""
+        return self.documents
+
+    def add(self, record_id: int, text: str) -> None:
+        """Indexes the text of a record."""
+        counts = Counter(self.tokens(text))
+        length = sum(counts.values())
+        self.documents += 1
+        self.total_length += length
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {}).setdefault((tf, length), set()).add(record_id)
+            self._df[term] = self._df.get(term, 0) + 1
+
+    def remove(self, record_id: int, text: str) -> None:
+        """Removes a record indexed with the given text."""
+        counts = Counter(self.tokens(text))
+        length = sum(counts.values())
+        self.documents -= 1
+        self.total_length -= length
+        for term, tf in counts.items():
+            groups = self._postings[term]
+            ids = groups[(tf, length)]
+            ids.discard(record_id)
+            if not ids:
+                del groups[(tf, length)]
+            if self._df[term] == 1:
+                del self._df[term]
+                del self._postings[term]
+            else:
+                self._df[term] -= 1
+
+    def _weight(self, idf: float, tf: int, length: int, average: float) -> float:
+        """Returns the BM25 weight of a term in a record."""
+        norm = self.K1 * (1 - self.B + self.B * length / average)
+        return idf * tf * (self.K1 + 1) / (tf + norm)
+
+    def search(self, query: str, k: int = 10, accept=None) -> list[tuple[int, float]]:
+        """
+        Returns the k records that best match the query.
+
+        Args:
+            query: Free text; records matching any of its terms are ranked.
+            k: Maximum number of results.
+            accept: Optional predicate on record IDs, e.g. a department filter.
+
+        Returns:
+            (record ID, score) pairs, best first.
+        """
+        terms = {term for term in self.tokens(query) if term in self._postings}
+        if not terms or k <= 0:
+            return []
+
+        average = self.total_length / self.documents or 1
+        # Length -> one column per query term that occurs at that length: the
+        # term's groups, best first, then (0.0, None) for records without it
+        lattices: dict[int, list] = {}
+        for term in terms:
+            df = self._df[term]
+            idf = math.log(1 + (self.documents - df + 0.5) / (df + 0.5))
+            columns = {}
+            for (tf, length), ids in self._postings[term].items():
+                columns.setdefault(length, []).append((self._weight(idf, tf, length, average), ids))
+            for length, column in columns.items():
+                column.sort(key=lambda group: group[0], reverse=True)
+                column.append((0.0, None))
+                lattices.setdefault(length, []).append(column)
+
+        # Walk the (length, choice of group per term) combinations best first.
+        # Successors only advance columns at or after the last one advanced,
+        # so every combination is generated exactly once.
+        heap = [(-sum(column[0][0] for column in columns), length, (0,) * len(columns), 0)
+                for length, columns in lattices.items()]
+        heapq.heapify(heap)
+        results: list[tuple[int, float]] = []
+        seen: set[int] = set()
+        while heap and len(results) < k:
+            negative, length, choice, last = heapq.heappop(heap)
+            columns = lattices[length]
+            for j in range(last, len(columns)):
+                column = columns[j]
+                i = choice[j]
+                if i + 1 < len(column):
+                    heapq.heappush(heap, (negative + column[i][0] - column[i + 1][0], length,
+                                          choice[:j] + (i + 1,) + choice[j + 1:], j))
+
+            # Records in every chosen group. Any of them holding a term this
+            # combination leaves out has a better combination that was
+            # already walked, so the unseen ones score exactly -negative.
+            sets = sorted((columns[c][i][1] for c, i in enumerate(choice)
+                           if columns[c][i][1] is not None), key=len)
+            if not sets:
+                # Every term left out: this and all remaining combinations score 0
+                break
+            fresh = (sets[0].intersection(*sets[1:]) if len(sets) > 1 else sets[0]) - seen
+            if not fresh:
+                continue
+            seen |= fresh
+            if accept is not None:
+                fresh = [record_id for record_id in fresh if accept(record_id)]
+            needed = k - len(results)
+            ids = sorted(fresh) if len(fresh) <= needed else heapq.nsmallest(needed, fresh)
+            results += [(record_id, -negative) for record_id in ids]
+        return results
+
+    def as_dict(self) -> dict:
+        """Returns the index as plain lists and dicts, e.g. for saving it as JSON."""
+        return {
+            'stem': self.stem,
+            'documents': self.documents,
+            'total_length': self.total_length,
+            'postings': {term: [[tf, length, list(ids)] for (tf, length), ids in groups.items()]
+                         for term, groups in self._postings.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TextIndex":
+        """Rebuilds an index from as_dict() output."""
+        index = cls(data['stem'])
+        index.documents = data['documents']
+        index.total_length = data['total_length']
+        for term, groups in data['postings'].items():
+            index._postings[term] = {(tf, length): set(ids) for tf, length, ids in groups}
+            index._df[term] = sum(len(ids) for _, _, ids in groups)
+        return index
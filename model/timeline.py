@@ -0,0 +1,123 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class Timeline:
+    """
+    Non-overlapping half-open intervals [start, end), each carrying an item,
+    e.g. one staff member's shifts or bookings.
+
+    Since the intervals never overlap, sorting them by start also sorts them
+    by end, so every query is a bisection over two packed integer columns:
+    whether a new interval conflicts, which interval covers a time, and
+    which ones fall in a window all take O(log n), plus the number of
+    intervals returned.
+    """
+
+    __slots__ = ('_starts', '_ends', '_items')
+
+    def __init__(self) -> None:
+        """Initializes an empty timeline."""
+        self._starts = array('q')
+        self._ends = array('q')
+        self._items: list = []
+
+    def __len__(self) -> int:
+        """Returns the number of intervals."""
+        return len(self._items)
+
+    def __iter__(self):
+        """Yields (start, end, item) triples in time order."""
+        return iter(list(zip(self._starts, self._ends, self._items)))
+
+    def conflicts(self, start: int, end: int) -> bool:
+        """Returns True if [start, end) overlaps an interval of the timeline."""
+        i = bisect_right(self._ends, start)
+        return i < len(self._starts) and self._starts[i] < end
+
+    def add(self, start: int, end: int, item=None) -> None:
+        """
+        Adds an interval.
+
+        Raises:
+            ValueError: If the interval is empty or overlaps another one.
+        """
+        # Input validation
+        if start >= end:
+            raise ValueError("An interval must end after it starts!")
+        i = bisect_right(self._ends, start)
+        if i < len(self._starts) and self._starts[i] < end:
+            raise ValueError("Interval overlaps an existing one!")
+
+        self._starts.insert(i, start)
+        self._ends.insert(i, end)
+        self._items.insert(i, item)
+
+    def extend(self, intervals) -> int:
+        """
+        Adds many (start, end, item) intervals at once, skipping those that
+        overlap the timeline or an earlier one of the batch.
+
+        Intervals sorted by start that all come after the current ones, as
+        when a new month of shifts is generated, are appended without
+        shifting anything.
+
+        Returns:
+            The number of intervals added.
+        """
+        added = 0
+        for start, end, item in intervals:
+            if start >= end:
+                continue
+            if not self._ends or start >= self._ends[-1]:
+                self._starts.append(start)
+                self._ends.append(end)
+                self._items.append(item)
+            elif self.conflicts(start, end):
+                continue
+            else:
+                self.add(start, end, item)
+            added += 1
+        return added
+
+    def remove(self, start: int):
+        """
+        Removes the interval starting at `start` and returns its item.
+
+        Raises:
+            KeyError: If no interval starts there.
+        """
+        i = bisect_left(self._starts, start)
+        if i == len(self._starts) or self._starts[i] != start:
+            raise KeyError(start)
+        del self._starts[i]
+        del self._ends[i]
+        return self._items.pop(i)
+
+    def covering(self, start: int, end: int):
+        """Returns the (start, end, item) interval containing [start, end), or None."""
+        i = bisect_right(self._starts, start) - 1
+        if i >= 0 and self._ends[i] >= end:
+            return self._starts[i], self._ends[i], self._items[i]
+        return None
+
+    def overlapping(self, start: int, end: int) -> list[tuple[int, int, object]]:
+        """Returns the (start, end, item) intervals overlapping [start, end), in time order."""
+        i = bisect_right(self._ends, start)
+        j = bisect_left(self._starts, end, i)
+        return list(zip(self._starts[i:j], self._ends[i:j], self._items[i:j]))
+
+    def next_after(self, time: int) -> int | None:
+        """Returns the position of the first interval ending after `time`, or None."""
+        i = bisect_right(self._ends, time)
+        return i if i < len(self._starts) else None
+
+    def next_start(self, time: int) -> int | None:
+        """Returns the start of the first interval ending after `time`, or None."""
+        i = bisect_right(self._ends, time)
+        return self._starts[i] if i < len(self._starts) else None
+
+    def interval(self, i: int) -> tuple[int, int, object]:
+        """Returns the (start, end, item) interval at a position."""
+        return self._starts[i], self._ends[i], self._items[i]
+
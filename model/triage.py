@@ -0,0 +1,497 @@
+from heapq import heapify, heappop, heappush
+from itertools import count
+
+from .patient import Patient
+
+
+# Emergency Severity Index levels; a lower level is more urgent
+TRIAGE_LEVELS = {1: "Resuscitation", 2: "Emergent", 3: "Urgent", 4: "Less urgent", 5: "Non-urgent"}
+
+# Arrival order shared by every queue, so a patient moved to another
+# department keeps their place among patients of the same level
+_arrivals = count()
+
+
+def _arrivals_past(arrival: int) -> None:
+    """
+    Makes new arrivals come after a restored one; only called while
+    loading, before other threads change the queues.
+    """
+    global _arrivals
+    _arrivals = count(max(next(_arrivals), arrival + 1))
+
+
+def check_level(level) -> None:
+    """Raises ValueError unless `level` is one of TRIAGE_LEVELS."""
+    if isinstance(level, bool) or level not in TRIAGE_LEVELS:
+        raise ValueError("Triage level must be a whole number from 1 to 5!")
+
+
+class TriageQueue:
+    """
+    Waiting patients ordered by triage level, then by arrival.
+
+    A binary heap of (level, arrival, patient) entries with a map from
+    each patient to their heap position, so besides push and pop in
+    O(log n), a patient can be re-triaged (decrease-key, or increase-key
+    when their condition improves) or leave the queue in O(log n) without
+    searching for them.
+    """
+
+    __slots__ = ('_heap', '_positions')
+
+    def __init__(self) -> None:
+        """Initializes an empty queue."""
+        self._heap: list[tuple[int, int, Patient]] = []
+        self._positions: dict[int, int] = {}    # id(patient) -> heap position
+
+    def __len__(self) -> int:
+        """Returns the number of waiting patients."""
+        return len(self._heap)
+
+    def __contains__(self, patient) -> bool:
+        """Returns True if the patient is waiting."""
+        return id(patient) in self._positions
+
+    def push(self, patient: Patient, level: int, arrival: int | None = None) -> None:
+        """
+        Adds a patient with a triage level.
+
+        Args:
+            arrival: Arrival order to keep, e.g. when moving between
+                queues; a new one is taken if None.
+
+        Raises:
+            ValueError: If the patient is already waiting.
+        """
+        # Input validation
+        check_level(level)
+        if id(patient) in self._positions:
+            raise ValueError(f"{patient.name} is already waiting!")
+
+        self._heap.append((level, next(_arrivals) if arrival is None else arrival, patient))
+        self._positions[id(patient)] = len(self._heap) - 1
+        self._sift_up(len(self._heap) - 1)
+
+    def peek(self) -> tuple[Patient, int] | None:
+        """Returns the most urgent (patient, level) without removing it, or None."""
+        if not self._heap:
+            return None
+        level, _, patient = self._heap[0]
+        return patient, level
+
+    def pop(self) -> tuple[Patient, int]:
+        """
+        Removes and returns the most urgent (patient, level).
+
+        Raises:
+            IndexError: If no one is waiting.
+        """
+        if not self._heap:
+            raise IndexError("No patient is waiting!")
+        level, _, patient = self._take(0)
+        return patient, level
+
+    def level(self, patient) -> int | None:
+        """Returns a waiting patient's triage level, or None."""
+        i = self._positions.get(id(patient))
+        return None if i is None else self._heap[i][0]
+
+    def arrival(self, patient) -> int | None:
+        """Returns a waiting patient's arrival order, or None."""
+        i = self._positions.get(id(patient))
+        return None if i is None else self._heap[i][1]
+
+    def update(self, patient, level: int) -> int:
+        """
+        Re-triages a waiting patient, keeping their arrival order, and
+        returns their previous level.
+
+        Raises:
+            KeyError: If the patient is not waiting.
+        """
+        # Input validation
+        check_level(level)
+
+        i = self._positions[id(patient)]
+        old, arrival, _ = self._heap[i]
+        self._heap[i] = (level, arrival, patient)
+        if level < old:
+            self._sift_up(i)
+        elif level > old:
+            self._sift_down(i)
+        return old
+
+    def remove(self, patient) -> int:
+        """
+        Takes a patient out of the queue and returns their level.
+
+        Raises:
+            KeyError: If the patient is not waiting.
+        """
+        return self._take(self._positions[id(patient)])[0]
+
+    def ordered(self) -> list[tuple[Patient, int]]:
+        """Returns the waiting (patient, level) pairs, most urgent first."""
+        return [(patient, level) for level, _, patient in sorted(self._heap)]
+
+    def _take(self, i: int) -> tuple[int, int, Patient]:
+        """Removes the entry at heap position i and returns it."""
+        heap = self._heap
+        entry = heap[i]
+        del self._positions[id(entry[2])]
+        last = heap.pop()
+        if i < len(heap):
+            heap[i] = last
+            self._positions[id(last[2])] = i
+            # The moved entry may belong above or below its new position
+            self._sift_up(i)
+            self._sift_down(self._positions[id(last[2])])
+        return entry
+
+    def _sift_up(self, i: int) -> None:
+        """Moves the entry at position i up to its place."""
+        heap = self._heap
+        positions = self._positions
+        entry = heap[i]
+        while i:
+            parent = (i - 1) >> 1
+            # Arrival orders are unique, so entries never tie and the
+            # patients themselves are never compared
+            if entry > heap[parent]:
+                break
+            heap[i] = heap[parent]
+            positions[id(heap[i][2])] = i
+            i = parent
+        heap[i] = entry
+        positions[id(entry[2])] = i
+
+    def _sift_down(self, i: int) -> None:
+        """Moves the entry at position i down to its place."""
+        heap = self._heap
+        positions = self._positions
+        size = len(heap)
+        entry = heap[i]
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if entry < heap[child]:
+                break
+            heap[i] = heap[child]
+            positions[id(heap[i][2])] = i
+            i = child
+        heap[i] = entry
+        positions[id(entry[2])] = i
+
+
+class Ward:
+    """
+    A department's beds, numbered from 1, and the patients in them.
+
+    Free beds are kept in a min-heap so the lowest-numbered one is handed
+    out in O(log n), and the occupancy count answers "is a bed free?" in
+    O(1).
+    """
+
+    __slots__ = ('capacity', '_free', '_beds', '_occupants')
+
+    def __init__(self, capacity: int = 0) -> None:
+        """Initializes a ward with `capacity` free beds."""
+        # Input validation
+        if not isinstance(capacity, int) or capacity < 0:
+            raise ValueError("Bed capacity must be a non-negative whole number!")
+
+        self.capacity: int = capacity
+        self._free: list[int] = list(range(1, capacity + 1))   # already a heap
+        self._beds: dict[int, int] = {}             # id(patient) -> bed
+        self._occupants: dict[int, Patient] = {}    # bed -> patient
+
+    def __len__(self) -> int:
+        """Returns the number of occupied beds."""
+        return len(self._occupants)
+
+    def __contains__(self, patient) -> bool:
+        """Returns True if the patient has a bed."""
+        return id(patient) in self._beds
+
+    @property
+    def available(self) -> int:
+        """Returns the number of free beds."""
+        return self.capacity - len(self._occupants)
+
+    def bed_of(self, patient) -> int | None:
+        """Returns the patient's bed number, or None."""
+        return self._beds.get(id(patient))
+
+    def admit(self, patient: Patient, bed: int | None = None) -> int:
+        """
+        Puts a patient in the lowest-numbered free bed, or in the given
+        one, and returns its number.
+
+        Raises:
+            ValueError: If the patient already has a bed, none is free or
+                the given bed is taken.
+        """
+        if id(patient) in self._beds:
+            raise ValueError(f"{patient.name} already has a bed!")
+        if not self._free:
+            raise ValueError("No bed is free!")
+        if bed is not None and (bed in self._occupants or not 1 <= bed <= self.capacity):
+            raise ValueError(f"Bed {bed} is not free!")
+
+        if bed is None:
+            bed = heappop(self._free)
+        else:
+            self._free.remove(bed)
+            heapify(self._free)
+        self._beds[id(patient)] = bed
+        self._occupants[bed] = patient
+        return bed
+
+    def discharge(self, patient) -> int:
+        """
+        Frees a patient's bed and returns its number.
+
+        Raises:
+            KeyError: If the patient has no bed.
+        """
+        bed = self._beds.pop(id(patient))
+        del self._occupants[bed]
+        heappush(self._free, bed)
+        return bed
+
+    def resize(self, capacity: int) -> None:
+        """
+        Changes the number of beds.
+
+        Raises:
+            ValueError: If a bed that would be removed is occupied.
+        """
+        # Input validation
+        if not isinstance(capacity, int) or capacity < 0:
+            raise ValueError("Bed capacity must be a non-negative whole number!")
+        if any(bed > capacity for bed in self._occupants):
+            raise ValueError("Beds to be removed are occupied!")
+
+        if capacity > self.capacity:
+            for bed in range(self.capacity + 1, capacity + 1):
+                heappush(self._free, bed)
+        else:
+            self._free = [bed for bed in self._free if bed <= capacity]
+            heapify(self._free)
+        self.capacity = capacity
+
+    def occupants(self) -> list[tuple[int, Patient]]:
+        """Returns the (bed, patient) pairs of occupied beds by bed number."""
+        return sorted(self._occupants.items(), key=lambda item: item[0])
+
+    def _restore(self, occupants: list[tuple[int, Patient]]) -> None:
+        """
+        Fills an empty ward with (bed, patient) pairs in O(capacity).
+
+        Raises:
+            ValueError: If a bed is out of range or given twice.
+        """
+        for bed, patient in occupants:
+            if bed in self._occupants or not 1 <= bed <= self.capacity:
+                raise ValueError(f"Bed {bed} is not free!")
+            self._beds[id(patient)] = bed
+            self._occupants[bed] = patient
+        self._free = [bed for bed in range(1, self.capacity + 1) if bed not in self._occupants]
+
+
+class Triage:
+    """
+    A department's triage queue and ward.
+
+    A patient is either waiting, with a triage level, or admitted to a
+    bed, or neither. Writers hold the department's write lock, readers
+    its read lock.
+    """
+
+    def __init__(self, department, capacity: int = 0) -> None:
+        """Initializes an empty queue and a ward with `capacity` beds."""
+        self.department = department
+        self.queue: TriageQueue = TriageQueue()
+        self.ward: Ward = Ward(capacity)
+
+    def _check_patient(self, patient) -> None:
+        """Raises unless the patient belongs to the department; the caller holds the lock."""
+        # Input validation
+        if not isinstance(patient, Patient):
+            raise TypeError("Patient must be a Patient object!")
+        if patient not in self.department.patients:
+            raise ValueError(f"{patient.name} is not a patient of {self.department.name}!")
+
+    def arrive(self, patient: Patient, level: int, arrival: int | None = None) -> int:
+        """
+        Adds an arriving patient to the queue and returns their arrival
+        order.
+
+        Args:
+            arrival: Arrival order to restore, e.g. from the journal; a new
+                one is taken if None.
+
+        Raises:
+            ValueError: If the patient is already waiting or admitted.
+        """
+        with self.department.lock.write():
+            self._check_patient(patient)
+            if patient in self.ward:
+                raise ValueError(f"{patient.name} is already admitted!")
+            if arrival is not None:
+                _arrivals_past(arrival)
+            self.queue.push(patient, level, arrival)
+            return self.queue.arrival(patient)
+
+    def retriage(self, patient: Patient, level: int) -> int:
+        """
+        Changes a waiting patient's triage level and returns the old one.
+
+        Raises:
+            KeyError: If the patient is not waiting.
+        """
+        with self.department.lock.write():
+            return self.queue.update(patient, level)
+
+    def admit_next(self) -> tuple[Patient, int] | None:
+        """
+        Admits the most urgent waiting patient and returns (patient, bed),
+        or None if no one is waiting or no bed is free.
+        """
+        with self.department.lock.write():
+            if not self.queue or not self.ward.available:
+                return None
+            patient, _ = self.queue.pop()
+            return patient, self.ward.admit(patient)
+
+    def admit(self, patient: Patient, bed: int | None = None) -> int:
+        """
+        Admits a patient straight away, to the lowest-numbered free bed or
+        the given one, taking them out of the queue if they are waiting,
+        and returns their bed.
+
+        Raises:
+            ValueError: If no bed is free or the patient already has one.
+        """
+        with self.department.lock.write():
+            self._check_patient(patient)
+            bed = self.ward.admit(patient, bed)
+            if patient in self.queue:
+                self.queue.remove(patient)
+            return bed
+
+    def discharge(self, patient: Patient) -> int:
+        """
+        Discharges an admitted patient and returns the bed freed.
+
+        Raises:
+            KeyError: If the patient is not admitted.
+        """
+        with self.department.lock.write():
+            return self.ward.discharge(patient)
+
+    def set_capacity(self, beds: int) -> None:
+        """
+        Changes the number of beds.
+
+        Raises:
+            ValueError: If a bed that would be removed is occupied.
+        """
+        with self.department.lock.write():
+            self.ward.resize(beds)
+
+    def is_full(self) -> bool:
+        """Returns True if no bed is free."""
+        with self.department.lock.read():
+            return not self.ward.available
+
+    def state_of(self, patient) -> tuple[str, int] | None:
+        """
+        Returns ('waiting', level) or ('admitted', bed) for a patient, or
+        None if they are neither.
+        """
+        with self.department.lock.read():
+            bed = self.ward.bed_of(patient)
+            if bed is not None:
+                return 'admitted', bed
+            level = self.queue.level(patient)
+            return None if level is None else ('waiting', level)
+
+    def waiting(self) -> list[tuple[Patient, int]]:
+        """Returns the waiting (patient, level) pairs, most urgent first."""
+        with self.department.lock.read():
+            return self.queue.ordered()
+
+    def occupancy(self) -> list[tuple[int, Patient]]:
+        """Returns the (bed, patient) pairs of occupied beds by bed number."""
+        with self.department.lock.read():
+            return self.ward.occupants()
+
+    def status(self) -> dict:
+        """Returns bed capacity, occupied and free beds, and the queue length."""
+        with self.department.lock.read():
+            return {'capacity': self.ward.capacity, 'occupied': len(self.ward),
+                    'available': self.ward.available, 'waiting': len(self.queue)}
+
+    def as_dict(self) -> dict:
+        """
+        Returns the bed capacity, the waiting patients as [id, level,
+        arrival] and the admitted ones as [id, bed]; empty if there are no
+        beds and no one is waiting.
+        """
+        with self.department.lock.read():
+            if not self.ward.capacity and not self.queue:
+                return {}
+            return {'beds': self.ward.capacity,
+                    'waiting': [[patient.record_id, level, arrival]
+                                for level, arrival, patient in self.queue._heap],
+                    'admitted': [[patient.record_id, bed]
+                                 for bed, patient in self.ward._occupants.items()]}
+
+    def load_dict(self, data: dict) -> None:
+        """
+        Restores as_dict() output into an empty triage. The patients must
+        already be in the department.
+
+        Raises:
+            ValueError: If a patient is missing or a bed is taken twice.
+        """
+        if not data:
+            return
+        with self.department.lock.write():
+            patients = {patient.record_id: patient for patient in self.department.patients}
+            try:
+                self.ward.resize(data['beds'])
+                self.ward._restore([(bed, patients[patient_id])
+                                    for patient_id, bed in data['admitted']])
+                for patient_id, level, arrival in data['waiting']:
+                    self.queue.push(patients[patient_id], level, arrival)
+            except KeyError as e:
+                raise ValueError(f"Triage of {self.department.name} refers to unknown "
+                                 f"patient {e.args[0]}!") from None
+            if data['waiting']:
+                _arrivals_past(max(arrival for _, _, arrival in data['waiting']))
+
+    def _move(self, patient: Patient, target: "Triage") -> None:
+        """
+        Moves a patient's bed or place in the queue to another department's
+        triage, failing before any change if the target has no free bed;
+        the caller holds both departments' write locks.
+        """
+        if patient in self.ward:
+            target.ward.admit(patient)
+            self.ward.discharge(patient)
+        elif patient in self.queue:
+            arrival = self.queue.arrival(patient)
+            target.queue.push(patient, self.queue.remove(patient), arrival)
+
+    def _forget(self, patient) -> None:
+        """Drops a patient leaving the department; the caller holds the write lock."""
+        if patient in self.ward:
+            self.ward.discharge(patient)
+        elif patient in self.queue:
+            self.queue.remove(patient)
@@ -0,0 +1,13 @@
+from .atomic import *
+from .writer_lock import *
+from .base import *
+from .blob_store import *
+from .journal import *
+from .event_log import *
+from .search_index import *
+from .lookup_index import *
+from .persistence import *
+from .streaming import *
+from .json_storage import *
+from .sqlite_storage import *
+from .binary_snapshot import *
\ No newline at end of file
@@ -0,0 +1,43 @@
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', encoding: str = 'utf-8'):
+    """
+    Opens a temporary file next to `path` for writing. When the block ends
+    without an error the file is flushed to disk (fsync) and renamed over
+    `path`, so a crash at any point leaves either the old file or the new
+    one, never a truncated mix. On error the temporary file is removed.
+
+    Args:
+        path: File to replace.
+        mode: 'w' for text or 'wb' for binary writes.
+        encoding: Text encoding, ignored in binary mode.
+    """
+    temp_path = path + ".tmp"
+    f = open(temp_path, mode, encoding=None if 'b' in mode else encoding)
+    try:
+        with f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    os.replace(temp_path, path)
+    _sync_directory(path)
+
+
+def _sync_directory(path: str) -> None:
+    """Makes a rename in the file's directory durable (POSIX only)."""
+    if os.name != 'posix':
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
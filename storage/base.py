@@ -0,0 +1,190 @@
+from telemetry import timed
+
+
+class Repository:
+    """
+    Base class for hospital storage backends.
+
+    A repository loads the Hospital object graph and applies every change to
+    both the in-memory model and the persistent store, so the CLI and the
+    SystemManager work the same on any backend.
+    """
+
+    def load(self):
+        """
+        Loads and returns the stored Hospital.
+
+        Raises:
+            FileNotFoundError: If nothing has been stored yet.
+            ValueError: If the stored data cannot be read.
+        """
+        raise NotImplementedError
+
+    def exists(self) -> bool:
+        """
+        Returns True if a hospital has been stored. Only when it returns
+        False may a new one be created in its place: stored data that
+        fails to load must be repaired, not replaced.
+        """
+        raise NotImplementedError
+
+    def create(self, name: str, location: str):
+        """Creates, stores and returns a new empty Hospital."""
+        raise NotImplementedError
+
+    def save(self, hospital) -> None:
+        """Makes sure every change to the hospital is durably stored."""
+        raise NotImplementedError
+
+    def open_lookup(self):
+        """
+        Opens a read-only view answering get(), search(), records() and
+        statistics() in the record format of the API without loading the
+        hospital, for one-off commands and the menu's first screen; close
+        it when done. Its name and location attributes hold the hospital's,
+        and its departments attribute one entry per department.
+
+        Returns:
+            The view, or None if the backend has none (load() instead).
+
+        Raises:
+            OSError, ValueError: If the view cannot be opened or is out of date.
+        """
+        return None
+
+    def add_department(self, hospital, department) -> None:
+        """Adds a department to the hospital and stores it."""
+        raise NotImplementedError
+
+    def add_patient(self, hospital, department, patient, quiet: bool = False) -> None:
+        """Adds a patient to a department and stores it; see Department.add_patient()."""
+        raise NotImplementedError
+
+    def add_staff_member(self, hospital, department, staff_member, quiet: bool = False) -> None:
+        """Adds a staff member to a department and stores it; see Department.add_staff_member()."""
+        raise NotImplementedError
+
+    def add_many(self, hospital, entries: list) -> None:
+        """
+        Adds a batch of records and stores them together.
+
+        Args:
+            entries: (department, patient or staff member) pairs.
+        """
+        raise NotImplementedError
+
+    def delete_patient(self, hospital, department, patient) -> None:
+        """Removes a patient from a department and from the store."""
+        raise NotImplementedError
+
+    def delete_staff_member(self, hospital, department, staff_member) -> None:
+        """Removes a staff member from a department and from the store."""
+        raise NotImplementedError
+
+    def transfer_patient(self, hospital, patient, target) -> None:
+        """Moves a patient to another department and stores the move."""
+        raise NotImplementedError
+
+    def generate_shifts(self, hospital, department, year: int, month: int,
+                        shifts=None, days_off: int = 2) -> int:
+        """
+        Generates a month of shifts for a department's staff and stores them.
+        See Schedule.generate_month(); the default daily shifts if shifts is None.
+
+        Returns:
+            The number of shifts added.
+        """
+        raise NotImplementedError
+
+    def book_next_free(self, hospital, department, patient, position: str, after,
+                       minutes: int, reason: str = ""):
+        """
+        Books the patient with whichever staff member of the position is
+        free first and stores the appointment, or returns None if no one is.
+        """
+        raise NotImplementedError
+
+    def cancel_appointment(self, hospital, department, appointment_id: int):
+        """
+        Cancels an appointment, stores the change and returns the appointment.
+
+        Raises:
+            KeyError: If the department has no appointment with that ID.
+        """
+        raise NotImplementedError
+
+    def set_bed_capacity(self, hospital, department, beds: int) -> None:
+        """Changes the number of beds of a department's ward and stores it."""
+        raise NotImplementedError
+
+    def triage_arrive(self, hospital, department, patient, level: int) -> None:
+        """Adds an arriving patient to the department's triage queue and stores it."""
+        raise NotImplementedError
+
+    def retriage(self, hospital, department, patient, level: int) -> int:
+        """Changes a waiting patient's triage level, stores it and returns the old one."""
+        raise NotImplementedError
+
+    def admit_next(self, hospital, department):
+        """
+        Admits the most urgent waiting patient, stores it and returns
+        (patient, bed), or None if no one is waiting or no bed is free.
+        """
+        raise NotImplementedError
+
+    def discharge_patient(self, hospital, department, patient) -> int:
+        """Frees an admitted patient's bed, stores it and returns the bed."""
+        raise NotImplementedError
+
+    @timed('search_patients')
+    def search_patients(self, hospital, name: str) -> list:
+        """
+        Finds patients whose name contains the given text (case-insensitive).
+
+        Returns:
+            (department, patient) pairs in department order.
+        """
+        return hospital.search_patients(name)
+
+    @timed('search_staff')
+    def search_staff(self, hospital, name: str) -> list:
+        """
+        Finds staff members whose name contains the given text (case-insensitive).
+
+        Returns:
+            (department, staff member) pairs in department order.
+        """
+        return hospital.search_staff(name)
+
+    @timed('fuzzy_search_patients')
+    def fuzzy_search_patients(self, hospital, name: str, limit: int | None = None) -> list:
+        """
+        Finds patients whose name matches the given text, allowing typos.
+
+        Returns:
+            (department, patient, distance) triples, closest first.
+        """
+        return hospital.fuzzy_search_patients(name, limit)
+
+    @timed('fuzzy_search_staff')
+    def fuzzy_search_staff(self, hospital, name: str, limit: int | None = None) -> list:
+        """
+        Finds staff members whose name matches the given text, allowing typos.
+
+        Returns:
+            (department, staff member, distance) triples, closest first.
+        """
+        return hospital.fuzzy_search_staff(name, limit)
+
+    @timed('search_records')
+    def search_records(self, hospital, query: str, department=None, k: int = 10) -> list:
+        """
+        Finds the patients whose medical records best match the query.
+
+        Returns:
+            (department, patient, score) triples, best match first.
+        """
+        return hospital.search_records(query, department, k)
+
+    def close(self) -> None:
+        """Releases files or connections held by the backend."""
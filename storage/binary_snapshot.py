@@ -0,0 +1,521 @@
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections import Counter
+
+from telemetry import timed
+
+from .atomic import atomic_write
+from .json_storage import JsonStorage
+from .lookup_index import LookupIndex
+
+
+MAGIC = b"HOSPBIN\x00"
+VERSION = 2
+
+# magic, version, department count, next_id, journal_seq, hospital name and
+# location string IDs, string table offset, department table offset, and
+# offset and length of the departments' schedules as JSON
+HEADER = struct.Struct('<8sIIqqIIQQQQ')
+
+# Header of version 1 snapshots, which have no schedules; they are still read
+HEADER_V1 = struct.Struct('<8sIIqqIIQQ')
+
+# name string ID, patient count and block offset, staff count and block offset
+DEPARTMENT = struct.Struct('<I4xQQQQ')
+
+# Columns of a record block, in file order: record IDs, ages, name string IDs,
+# and medical record (patients) or position (staff) string IDs
+COLUMNS = ('q', 'i', 'I', 'I')
+
+
+def _align(f, boundary: int = 8) -> int:
+    """Pads the file to the boundary and returns the new position."""
+    position = f.tell()
+    padding = -position % boundary
+    if padding:
+        f.write(b"\0" * padding)
+    return position + padding
+
+
+def _write_column(f, typecode: str, values) -> None:
+    """Writes one little-endian column."""
+    column = array(typecode, values)
+    if sys.byteorder != 'little':
+        column.byteswap()
+    f.write(column.tobytes())
+
+
+def write_binary_snapshot(hospital, path: str, journal_seq: int = 0, views=None,
+                          states=None) -> None:
+    """
+    Writes a binary snapshot of the hospital.
+
+    Layout: a fixed header, a department table with the record count and
+    block offset of every department, one block of fixed-width columns per
+    department and record kind, a table of the distinct strings that the
+    columns refer to by index, and Department.state() of every department
+    as JSON. The file is replaced atomically.
+
+    Args:
+        hospital: Hospital to write.
+        path: Snapshot file path.
+        journal_seq: Sequence number of the last journal record included.
+        views: Departments as returned by hospital.snapshot() when the
+            journal was at `journal_seq`; taken now if None.
+        states: Department.state() of every department, taken with the
+            views; taken now if None.
+    """
+    strings: dict[str, int] = {}
+
+    def string_id(text: str) -> int:
+        sid = strings.get(text)
+        if sid is None:
+            sid = strings[text] = len(strings)
+        return sid
+
+    name_sid = string_id(hospital.name)
+    location_sid = string_id(hospital.location)
+    if views is None:
+        views = hospital.snapshot()
+    if states is None:
+        states = [dept.state() for dept, _, _ in views]
+    with atomic_write(path, 'wb') as f:
+        f.write(b"\0" * (HEADER.size + DEPARTMENT.size * len(views)))
+
+        entries = []
+        for dept, patients, staff in views:
+            entry = [string_id(dept.name)]
+            for records, field in ((patients, 'medical_record'), (staff, 'position')):
+                entry += [len(records), _align(f)]
+                _write_column(f, 'q', (record.record_id for record in records))
+                _write_column(f, 'i', (record.age for record in records))
+                _write_column(f, 'I', (string_id(record.name) for record in records))
+                _write_column(f, 'I', (string_id(getattr(record, field)) for record in records))
+            entries.append(entry)
+
+        strings_offset = _align(f)
+        encoded = [text.encode('utf-8') for text in strings]
+        offsets = [0]
+        for data in encoded:
+            offsets.append(offsets[-1] + len(data))
+        f.write(struct.pack('<I4x', len(encoded)))
+        _write_column(f, 'Q', offsets)
+        f.write(b"".join(encoded))
+
+        states_offset = f.tell()
+        states_data = json.dumps(states, ensure_ascii=False).encode('utf-8')
+        f.write(states_data)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, len(views), hospital.next_id, journal_seq,
+                            name_sid, location_sid, strings_offset, HEADER.size,
+                            states_offset, len(states_data)))
+        for entry in entries:
+            f.write(DEPARTMENT.pack(*entry))
+
+
+class DepartmentView:
+    """
+    One department of a binary snapshot.
+
+    The name and counts come from the department table; records are only
+    decoded when they are accessed.
+    """
+
+    def __init__(self, snapshot: "BinarySnapshot", name_sid: int, patient_count: int,
+                 patients_offset: int, staff_count: int, staff_offset: int) -> None:
+        """Initializes the view from its department table entry."""
+        self.snapshot = snapshot
+        self.patient_count: int = patient_count
+        self.staff_count: int = staff_count
+        self._name_sid = name_sid
+        self._blocks = {'patients': (patient_count, patients_offset),
+                        'staff': (staff_count, staff_offset)}
+        self._columns = {}
+
+    @property
+    def name(self) -> str:
+        """Returns the department name."""
+        return self.snapshot.string(self._name_sid)
+
+    def _block(self, kind: str) -> list:
+        """Returns the columns of the patient or staff block, mapping them on first use."""
+        columns = self._columns.get(kind)
+        if columns is None:
+            count, offset = self._blocks[kind]
+            columns = []
+            for typecode in COLUMNS:
+                columns.append(self.snapshot._column(typecode, offset, count))
+                offset += count * array(typecode).itemsize
+            self._columns[kind] = columns
+        return columns
+
+    def find(self, record_id: int) -> tuple[bool, int] | None:
+        """
+        Returns (is staff, position) of the record with the given ID, or
+        None. Searches the raw ID columns, so no record is decoded.
+        """
+        pattern = struct.pack('<q', record_id)
+        data = self.snapshot._mmap
+        for is_staff, kind in ((False, 'patients'), (True, 'staff')):
+            count, offset = self._blocks[kind]
+            position = offset
+            end = offset + 8 * count
+            while True:
+                hit = data.find(pattern, position, end)
+                if hit == -1:
+                    break
+                if (hit - offset) % 8 == 0:
+                    return is_staff, (hit - offset) // 8
+                position = hit + 1
+        return None
+
+    def patient(self, index: int):
+        """Decodes the patient at the given position."""
+        from model import Patient
+
+        ids, ages, names, records = self._block('patients')
+        string = self.snapshot.string
+        return Patient(string(names[index]), ages[index], string(records[index]), ids[index])
+
+    def staff_member(self, index: int):
+        """Decodes the staff member at the given position."""
+        from model import Staff
+
+        ids, ages, names, positions = self._block('staff')
+        string = self.snapshot.string
+        return Staff(string(names[index]), ages[index], string(positions[index]), ids[index])
+
+    def patients(self):
+        """Yields every patient in order."""
+        return map(self.patient, range(self.patient_count))
+
+    def staff(self):
+        """Yields every staff member in order."""
+        return map(self.staff_member, range(self.staff_count))
+
+    def department(self):
+        """Builds a model Department holding all of this department's records."""
+        from model import Department
+
+        department = Department(self.name)
+        for patient in self.patients():
+            department.add_patient(patient, quiet=True)
+        for member in self.staff():
+            department.add_staff_member(member, quiet=True)
+        return department
+
+
+class BinarySnapshot:
+    """
+    Memory-mapped reader for binary snapshots.
+
+    Opening a snapshot reads only the header and the department table.
+    Strings, departments and records are decoded on first access, so a
+    single record or a count is available without loading the file.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Opens a snapshot.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If the file is not a valid snapshot.
+        """
+        self.path: str = path
+        with open(path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"{path} is empty!") from None
+        self._views: list[memoryview] = []
+
+        try:
+            magic, version = struct.unpack_from('<8sI', self._mmap)
+            if magic != MAGIC or version not in (1, VERSION):
+                raise ValueError(f"{path} is not a version {VERSION} hospital snapshot!")
+            self._states = (0, 0)
+            if version == 1:
+                (_, _, department_count, self.next_id, self.journal_seq, name_sid, location_sid,
+                 strings_offset, departments_offset) = HEADER_V1.unpack_from(self._mmap)
+            else:
+                (_, _, department_count, self.next_id, self.journal_seq, name_sid, location_sid,
+                 strings_offset, departments_offset, *self._states) = HEADER.unpack_from(self._mmap)
+
+            string_count = struct.unpack_from('<I', self._mmap, strings_offset)[0]
+            self._string_offsets = self._column('Q', strings_offset + 8, string_count + 1)
+            self._strings_start = strings_offset + 8 + 8 * (string_count + 1)
+            self._strings: list[str | None] = [None] * string_count
+
+            self.departments: list[DepartmentView] = [
+                DepartmentView(self, *DEPARTMENT.unpack_from(
+                    self._mmap, departments_offset + i * DEPARTMENT.size))
+                for i in range(department_count)
+            ]
+            self.name: str = self.string(name_sid)
+            self.location: str = self.string(location_sid)
+        except (struct.error, IndexError, UnicodeDecodeError) as e:
+            self.close()
+            raise ValueError(f"Corrupt snapshot {path}: {e}") from e
+
+    def _column(self, typecode: str, offset: int, count: int):
+        """Returns a column of the file, without copying it on little-endian hosts."""
+        size = count * array(typecode).itemsize
+        if offset + size > len(self._mmap):
+            raise IndexError("column extends past the end of the file")
+        raw = memoryview(self._mmap)[offset:offset + size]
+        if sys.byteorder != 'little':
+            column = array(typecode, raw.tobytes())
+            column.byteswap()
+            raw.release()
+            return column
+        column = raw.cast(typecode)
+        self._views += [column, raw]
+        return column
+
+    def string(self, sid: int) -> str:
+        """Returns a string of the string table, decoding it once."""
+        text = self._strings[sid]
+        if text is None:
+            start = self._strings_start + self._string_offsets[sid]
+            end = self._strings_start + self._string_offsets[sid + 1]
+            text = self._strings[sid] = str(self._mmap[start:end], 'utf-8')
+        return text
+
+    @property
+    def patient_count(self) -> int:
+        """Returns the number of patients, from the department table."""
+        return sum(view.patient_count for view in self.departments)
+
+    @property
+    def staff_count(self) -> int:
+        """Returns the number of staff members, from the department table."""
+        return sum(view.staff_count for view in self.departments)
+
+    def find(self, record_id: int) -> tuple[int, bool, int] | None:
+        """Returns (department index, is staff, position) of a record, or None."""
+        for index, view in enumerate(self.departments):
+            found = view.find(record_id)
+            if found is not None:
+                return (index, *found)
+        return None
+
+    def states(self) -> list[dict]:
+        """Returns Department.state() of every department, as saved."""
+        offset, length = self._states
+        if not length:
+            return [{} for _ in self.departments]
+        try:
+            return json.loads(self._mmap[offset:offset + length])
+        except ValueError as e:
+            raise ValueError(f"Corrupt snapshot {self.path}: {e}") from e
+
+    def to_hospital(self):
+        """Builds the full Hospital object graph."""
+        from model import Hospital
+
+        hospital = Hospital(self.name, self.location)
+        for view, state in zip(self.departments, self.states()):
+            department = view.department()
+            department.load_state(state)
+            hospital.add_department(department)
+        # Never hand out the ID of a record deleted before the snapshot
+        hospital.next_id = max(hospital.next_id, self.next_id)
+        return hospital
+
+    def close(self) -> None:
+        """Unmaps the file."""
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def __enter__(self) -> "BinarySnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class BinaryLookup(LookupIndex):
+    """
+    Read-only view of a binary snapshot for one-off reads without building
+    the hospital, answering like LookupIndex.
+
+    Only the snapshot's header, its department table and the journal are
+    read on open. Lookups by ID search the raw ID columns, name searches
+    and exports decode the records of one department at a time, and
+    statistics are counted from the age and position columns. Changes
+    journaled since the snapshot are laid over the results.
+    """
+
+    def __init__(self, path: str, journal_path: str | None = None, blobs=None) -> None:
+        """
+        Opens a snapshot.
+
+        Args:
+            path: Binary snapshot file path.
+            journal_path: Journal of changes made since the snapshot.
+            blobs: BlobStore holding medical records journaled by reference.
+
+        Raises:
+            FileNotFoundError: If the snapshot does not exist.
+            ValueError: If the snapshot is invalid or the journal cannot be
+                laid over it, in which case the hospital has to be loaded.
+        """
+        self.blobs = blobs
+        self.snapshot: BinarySnapshot = BinarySnapshot(path)
+        self.name: str = self.snapshot.name
+        self.location: str = self.snapshot.location
+        self.journal_seq: int = self.snapshot.journal_seq
+        self.departments: list[str] = [view.name for view in self.snapshot.departments]
+
+        # Changes journaled since the snapshot
+        self._added: dict[int, dict] = {}
+        self._deleted: set[int] = set()
+        self._changes: list[tuple[str, dict]] = []
+        if journal_path is not None:
+            try:
+                self._read_journal(journal_path)
+            except (KeyError, IndexError, ValueError) as e:
+                self.close()
+                raise ValueError(f"Cannot apply the journal to the snapshot: {e}") from e
+
+    def __len__(self) -> int:
+        """Returns the number of records."""
+        return (self.snapshot.patient_count + self.snapshot.staff_count
+                - len(self._deleted) + len(self._added))
+
+    def _find(self, record_id: int) -> tuple[int, bool, int] | None:
+        """Returns the location of the snapshot record with the given ID, or None."""
+        return self.snapshot.find(record_id)
+
+    def _entry(self, location: tuple[int, bool, int]) -> dict:
+        """
+        Decodes the snapshot record at a location returned by _find(), with
+        its department index under 'department' as in the journal.
+        """
+        index, is_staff, position = location
+        ids, ages, names, texts = self.snapshot.departments[index]._block(
+            'staff' if is_staff else 'patients')
+        string = self.snapshot.string
+        return {'id': ids[position], 'name': string(names[position]), 'age': ages[position],
+                'department': index,
+                'position' if is_staff else 'medical_record': string(texts[position])}
+
+    def _entries(self, index: int, is_staff: bool):
+        """Yields the snapshot records of a department that were not deleted since."""
+        if index >= len(self.snapshot.departments):
+            return
+        view = self.snapshot.departments[index]
+        ids = view._block('staff' if is_staff else 'patients')[0]
+        for position in range(view.staff_count if is_staff else view.patient_count):
+            if ids[position] not in self._deleted:
+                yield self._entry((index, is_staff, position))
+
+    def search(self, name: str, staff: bool = False, limit: int | None = None) -> list[dict]:
+        """
+        Finds patients, or staff members, whose name contains the given
+        text (case-insensitive), in department order like
+        Hospital.search_patients().
+
+        Args:
+            name: Text to look for.
+            staff: Search staff members instead of patients.
+            limit: Maximum number of results, or None for all.
+        """
+        query = name.lower()
+        string = self.snapshot.string
+        matches: dict[int, bool] = {}   # name string ID -> contains the text
+        found = []
+        for index, view in enumerate(self.snapshot.departments):
+            ids, _, names, _ = view._block('staff' if staff else 'patients')
+            for position, sid in enumerate(names):
+                match = matches.get(sid)
+                if match is None:
+                    match = matches[sid] = query in string(sid).lower()
+                if match and ids[position] not in self._deleted:
+                    found.append(self._entry((index, staff, position)))
+                    if len(found) == limit:
+                        break
+            if len(found) == limit:
+                break
+
+        added = [data for data in self._added.values()
+                 if ('position' in data) == staff and query in data['name'].lower()]
+        if added:
+            # Journaled records come after the snapshot's of their department
+            found = sorted(found + added, key=lambda data: data['department'])
+        return [self._as_record(data) for data in found[:limit]]
+
+    def records(self):
+        """Yields every record, department by department, patients before staff."""
+        added = {}
+        for data in self._added.values():
+            added.setdefault((data['department'], 'position' in data), []).append(data)
+        for index in range(len(self.departments)):
+            for is_staff in (False, True):
+                for data in self._entries(index, is_staff):
+                    yield self._as_record(data)
+                for data in added.get((index, is_staff), ()):
+                    yield self._as_record(data)
+
+    def _snapshot_statistics(self) -> tuple:
+        """Counts the aggregates of the snapshot from its age and position columns."""
+        from model import Statistics
+
+        total = Statistics()
+        departments = []
+        for view in self.snapshot.departments:
+            stats = Statistics()
+            ages = view._block('patients')[1]
+            stats.patient_count = view.patient_count
+            stats.age_total = sum(ages)
+            stats.age_counts = dict(Counter(ages))
+            stats.staff_count = view.staff_count
+            for sid, headcount in Counter(view._block('staff')[3]).items():
+                position = self.snapshot.string(sid)
+                stats.positions[position] = stats.positions.get(position, 0) + headcount
+            total.merge(stats)
+            departments.append(stats)
+        return total, departments
+
+    def close(self) -> None:
+        """Unmaps the snapshot."""
+        self.snapshot.close()
+
+
+class BinaryStorage(JsonStorage):
+    """
+    Journaled backend with a binary snapshot instead of JSON.
+
+    Changes are journaled exactly as in JsonStorage; only the snapshot
+    written by save() and read on startup uses the binary format.
+    open_lookup() maps the snapshot instead of loading it (see BinaryLookup).
+    """
+
+    @timed('load')
+    def load(self):
+        """Loads the binary snapshot and replays the journal on top of it."""
+        with BinarySnapshot(self.path) as snapshot:
+            hospital = snapshot.to_hospital()
+            journal_seq = snapshot.journal_seq
+        self._attach_search_index(hospital, journal_seq)
+        self.journal.replay(hospital, journal_seq)
+        return hospital
+
+    def open_lookup(self) -> BinaryLookup:
+        """Opens the snapshot as a read-only view with the journaled changes laid over it."""
+        return BinaryLookup(self.path, self.journal.path, self.blobs)
+
+    def open_snapshot(self) -> BinarySnapshot:
+        """Opens the last snapshot for lazy, read-only access."""
+        return BinarySnapshot(self.path)
+
+    def _write_snapshot(self, hospital, views, journal_seq: int, states: list[dict]) -> None:
+        """Writes the binary snapshot file; it has no lookup index."""
+        write_binary_snapshot(hospital, self.path, journal_seq, views, states)
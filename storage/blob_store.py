@@ -0,0 +1,164 @@
+import hashlib
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+
+from telemetry import count
+
+
+# sha256 digest of the text, stored payload length, flags
+ENTRY = struct.Struct('<32sIB')
+
+# Flag set when the payload is zlib-compressed
+COMPRESSED = 1
+
+
+class BlobStore:
+    """
+    Append-only, content-addressed store for large text values such as
+    medical records.
+
+    Each text is stored once, optionally compressed, and referenced by the
+    offset of its entry. Reads go through a bounded LRU cache of decoded
+    texts, so records that are looked at repeatedly are decoded once.
+    """
+
+    def __init__(self, path: str, compress: bool = True, cache_size: int = 1024,
+                 min_compress: int = 64) -> None:
+        """
+        Opens or creates a blob store.
+
+        Args:
+            path: Path of the blob file.
+            compress: Compress texts with zlib when that makes them smaller.
+            cache_size: Maximum number of decoded texts kept in memory.
+            min_compress: Texts shorter than this are never compressed.
+        """
+        # Input validation
+        if not isinstance(path, str):
+            raise TypeError("Blob file path must be a string!")
+        if not isinstance(cache_size, int) or cache_size < 0:
+            raise ValueError("cache_size must be a non-negative integer!")
+
+        self.path: str = path
+        self.compress: bool = compress
+        self.cache_size: int = cache_size
+        self.min_compress: int = min_compress
+        self._offsets: dict[bytes, int] | None = None    # digest -> offset, built on first put
+        self._cache: OrderedDict[int, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, 'a+b')
+        self._file.seek(0, os.SEEK_END)
+        self._size: int = self._file.tell()
+
+    def _index(self) -> dict[bytes, int]:
+        """
+        Returns the digest -> offset map, scanning the file on first use.
+        A torn last entry (e.g. after a crash mid-write) is cut off.
+        """
+        if self._offsets is None:
+            offsets = {}
+            offset = 0
+            while offset + ENTRY.size <= self._size:
+                self._file.seek(offset)
+                digest, length, _ = ENTRY.unpack(self._file.read(ENTRY.size))
+                end = offset + ENTRY.size + length
+                if end > self._size:
+                    break
+                offsets.setdefault(digest, offset)
+                offset = end
+            if offset < self._size:
+                self._file.truncate(offset)
+                self._size = offset
+            self._offsets = offsets
+        return self._offsets
+
+    def put(self, text: str) -> int:
+        """
+        Stores a text, unless it is already stored, and returns its offset.
+        The text is written to disk before the offset is returned.
+        """
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).digest()
+        with self._lock:
+            offsets = self._index()
+            offset = offsets.get(digest)
+            if offset is not None:
+                return offset
+
+            flags = 0
+            if self.compress and len(data) >= self.min_compress:
+                packed = zlib.compress(data)
+                if len(packed) < len(data):
+                    data, flags = packed, COMPRESSED
+
+            offset = self._size
+            self._file.write(ENTRY.pack(digest, len(data), flags) + data)
+            self._file.flush()
+            self._size += ENTRY.size + len(data)
+            offsets[digest] = offset
+        count('hospital_blob_bytes_written_total', ENTRY.size + len(data))
+        return offset
+
+    def get(self, offset: int) -> str:
+        """
+        Returns the text stored at the given offset.
+
+        Raises:
+            ValueError: If no entry starts at that offset.
+        """
+        with self._lock:
+            text = self._cache.get(offset)
+            if text is not None:
+                self._cache.move_to_end(offset)
+                count('hospital_blob_cache_total', result='hit')
+                return text
+
+            if not 0 <= offset <= self._size - ENTRY.size:
+                raise ValueError(f"No blob at offset {offset}!")
+            self._file.seek(offset)
+            _, length, flags = ENTRY.unpack(self._file.read(ENTRY.size))
+            data = self._file.read(length)
+            if len(data) != length:
+                raise ValueError(f"Blob at offset {offset} is truncated!")
+            if flags & COMPRESSED:
+                data = zlib.decompress(data)
+            text = data.decode('utf-8')
+
+            if self.cache_size:
+                self._cache[offset] = text
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        count('hospital_blob_cache_total', result='miss')
+        return text
+
+    @property
+    def size(self) -> int:
+        """Returns the size of the blob file in bytes."""
+        return self._size
+
+    def close(self) -> None:
+        """Closes the blob file."""
+        with self._lock:
+            self._file.close()
+
+
+def patient_from_entry(data: dict, blobs: BlobStore | None = None):
+    """
+    Builds a Patient from a snapshot or journal entry. The medical record is
+    either inline ('medical_record') or a blob store offset ('record_ref').
+
+    Raises:
+        ValueError: If the entry refers to a blob store that is not open.
+    """
+    from model import Patient
+
+    if 'record_ref' not in data:
+        return Patient(data['name'], data['age'], data['medical_record'], data.get('id'))
+    if blobs is None:
+        raise ValueError("Medical records are in a blob store, but none is open!")
+    return Patient.from_blob(data['name'], data['age'], blobs, data['record_ref'], data.get('id'))
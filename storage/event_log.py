@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+
+from telemetry import count, set_gauge
+
+from .atomic import atomic_write
+
+
+class EventLog:
+    """
+    Append-only file of a hospital's change events, one JSON line each.
+
+    Unlike the journal it is not folded into a snapshot, so followers that
+    fell behind can catch up from any sequence number it still holds. It
+    holds the last `keep` to 2 * `keep` events: once it reaches twice that
+    many, the older half is dropped. A follower further behind than that
+    copies the current state instead, as a new one does.
+    """
+
+    def __init__(self, path: str, keep: int = 100000) -> None:
+        """
+        Opens or creates an event log.
+
+        Args:
+            path: Path of the log file.
+            keep: Number of most recent events always kept for catch-up.
+        """
+        # Input validation
+        if not isinstance(path, str):
+            raise TypeError("Event log path must be a string!")
+        if not isinstance(keep, int) or keep < 1:
+            raise ValueError("keep must be a positive integer!")
+
+        self.path: str = path
+        self.keep: int = keep
+        self.first_seq: int = 0     # Sequence number of the oldest event held, 0 if empty
+        self.last_seq: int = 0      # Sequence number of the newest event held
+        self.count: int = 0         # Number of events held
+        self._file = None
+        self._lock = threading.Lock()
+        self._scan()
+
+    def _scan(self) -> None:
+        """
+        Reads the first and last sequence numbers held in the file, and cuts
+        off a torn last line (e.g. after a crash mid-write) so that new
+        events are not appended to it.
+        """
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            first = f.readline()
+            if not first:
+                return
+            f.seek(0)
+            self.count = sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b""))
+            # The last complete line is within the last few kilobytes
+            size = f.seek(0, os.SEEK_END)
+            start = f.seek(max(0, size - 65536))
+            tail = f.read()
+        if not tail.endswith(b"\n"):
+            os.truncate(self.path, start + tail.rfind(b"\n") + 1)
+            tail = tail[:tail.rfind(b"\n") + 1]
+            if not tail and start == 0:
+                return
+        lines = tail.split(b"\n")
+        try:
+            self.first_seq = json.loads(first)['seq']
+        except (ValueError, KeyError):
+            return
+        for line in reversed(lines):
+            try:
+                self.last_seq = json.loads(line)['seq']
+                return
+            except (ValueError, KeyError):
+                continue
+
+    def attach(self, hospital) -> None:
+        """
+        Logs every future change of the hospital. Its sequence numbers
+        continue after the last logged event, so they never repeat across
+        restarts.
+        """
+        with hospital._lock:
+            hospital.event_seq = max(hospital.event_seq, self.last_seq)
+            hospital.subscribe(self.append)
+
+    def append(self, event) -> None:
+        """Appends one ChangeEvent to the log."""
+        line = json.dumps(event.as_dict(), ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+            if not self.first_seq:
+                self.first_seq = event.seq
+            self.last_seq = event.seq
+            self.count += 1
+            if self.count >= 2 * self.keep:
+                self._prune()
+        count('hospital_events_logged_total')
+        set_gauge('hospital_event_seq', event.seq)
+
+    def _prune(self) -> None:
+        """
+        Drops all but the last `keep` events; the caller holds the lock.
+        The file is replaced atomically, and followers still reading the
+        old one finish reading it.
+        """
+        self._file.close()
+        self._file = None
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        start = 0
+        for _ in range(self.count - self.keep):
+            start = data.index(b"\n", start) + 1
+        with atomic_write(self.path, 'wb') as f:
+            f.write(data[start:])
+        self.first_seq = json.loads(data[start:data.index(b"\n", start)])['seq']
+        self.count = self.keep
+        count('hospital_event_log_prunes_total')
+
+    def covers(self, after: int) -> bool:
+        """Returns True if the log holds every event with a sequence number above `after`."""
+        if not self.first_seq:
+            return after == self.last_seq
+        return self.first_seq - 1 <= after <= self.last_seq
+
+    def events(self, after: int = 0):
+        """
+        Yields the logged ChangeEvents with a sequence number greater than
+        `after`. A torn last line (e.g. one being written) ends the scan.
+        """
+        from model import ChangeEvent
+
+        try:
+            f = open(self.path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if data['seq'] > after:
+                    yield ChangeEvent.from_dict(data)
+
+    def close(self) -> None:
+        """Closes the log file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
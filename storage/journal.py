@@ -0,0 +1,252 @@
+import json
+import os
+from datetime import time
+
+from telemetry import count, registry, set_gauge
+
+from .atomic import atomic_write
+from .blob_store import patient_from_entry
+
+
+# Journal operations that change a department's schedule or triage, not its records
+STATE_OPS = ('generate_shifts', 'book', 'cancel',
+             'set_beds', 'triage_arrive', 'triage_level', 'triage_admit', 'triage_discharge')
+
+
+class Journal:
+    """
+    Append-only write-ahead journal of hospital mutations.
+
+    Every change is appended as one JSON line instead of rewriting the whole
+    data file. On startup the journal is replayed on top of the last snapshot,
+    and it is compacted (folded into a new snapshot) periodically or on exit.
+    """
+
+    def __init__(self, path: str, compact_every: int = 1000) -> None:
+        """
+        Initializes the journal with its file path.
+
+        Args:
+            path: Path of the journal file.
+            compact_every: Number of appended records after which the
+                journal asks to be compacted into a new snapshot.
+        """
+        # Input validation
+        if not isinstance(path, str):
+            raise TypeError("Journal path must be a string!")
+        if not isinstance(compact_every, int) or compact_every < 1:
+            raise ValueError("compact_every must be a positive integer!")
+
+        self.path: str = path
+        self.compact_every: int = compact_every
+        self.seq: int = 0       # Sequence number of the last record written
+        self.pending: int = 0   # Records appended since the last snapshot
+        self._file = None
+
+    def append(self, op: str, **fields) -> None:
+        """
+        Appends one mutation record to the journal.
+
+        Args:
+            op: Name of the operation (e.g. 'add_patient').
+            **fields: JSON-serializable data describing the mutation.
+        """
+        self.append_many([(op, fields)])
+
+    def append_many(self, changes: list[tuple[str, dict]]) -> None:
+        """
+        Appends a batch of mutation records with a single write.
+
+        Args:
+            changes: (op, fields) pairs, as for append().
+        """
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._cut_torn_tail()
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+        lines = []
+        for op, fields in changes:
+            self.seq += 1
+            record = {'seq': self.seq, 'op': op}
+            record.update(fields)
+            lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+        data = "".join(lines)
+        self._file.write(data)
+        self._file.flush()
+        self.pending += len(lines)
+
+        if registry.enabled:
+            count('hospital_journal_records_total', len(lines))
+            count('hospital_bytes_written_total', len(data.encode('utf-8')), file='journal')
+            set_gauge('hospital_journal_pending_records', self.pending)
+
+    def _cut_torn_tail(self) -> None:
+        """
+        Cuts off a torn last line (e.g. after a crash mid-write), which
+        records() skips, so the next record starts on a line of its own
+        instead of being glued to the fragment.
+        """
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            if not end:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b"\n":
+                return
+            # Search backwards for the end of the last complete line
+            keep = pos = end
+            while pos:
+                start = max(0, pos - 65536)
+                f.seek(start)
+                newline = f.read(pos - start).rfind(b"\n")
+                if newline >= 0:
+                    keep = start + newline + 1
+                    break
+                pos = keep = start
+        os.truncate(self.path, keep)
+        count('hospital_journal_torn_tails_total')
+
+    def records(self, after: int = 0):
+        """
+        Yields the journal records with a sequence number greater than `after`.
+
+        A last line without its newline was torn by a crash mid-write and is
+        skipped: its change was never confirmed.
+
+        Raises:
+            ValueError: If any other line cannot be read.
+        """
+        try:
+            # Binary, so a multi-byte character cut in half at the end cannot fail the read
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+
+        with f:
+            for number, line in enumerate(f, 1):
+                if not line.endswith(b"\n"):
+                    return
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    raise ValueError(f"Journal {self.path} is corrupt at line {number}!") from None
+                if record['seq'] > after:
+                    yield record
+
+    def replay(self, hospital, after: int = 0, blobs=None) -> int:
+        """
+        Applies the journal records newer than the snapshot to the hospital.
+
+        Args:
+            hospital: Hospital loaded from the last snapshot.
+            after: Sequence number the snapshot already contains.
+            blobs: BlobStore holding medical records journaled by reference.
+
+        Returns:
+            The number of records applied.
+        """
+        # Imported here to keep the storage layer free of import cycles
+        from model import Department, Staff, from_minutes
+
+        self.seq = after
+        applied = 0
+        for record in self.records(after):
+            op = record['op']
+            if op == 'add_department':
+                hospital.add_department(Department(record['name']))
+            elif op == 'add_patient':
+                department = hospital.departments[record['department']]
+                department.add_patient(patient_from_entry(record, blobs), quiet=True)
+            elif op == 'add_staff':
+                department = hospital.departments[record['department']]
+                department.add_staff_member(
+                    Staff(record['name'], record['age'], record['position'],
+                          record.get('id')),
+                    quiet=True
+                )
+            elif op == 'delete_patient':
+                department, patient = self._target(hospital, record, 'patients')
+                department.remove_patient(patient)
+            elif op == 'delete_staff':
+                department, member = self._target(hospital, record, 'staff')
+                department.remove_staff_member(member)
+            elif op == 'generate_shifts':
+                shifts = [(time.fromisoformat(start), time.fromisoformat(end))
+                          for start, end in record['shifts']]
+                hospital.departments[record['department']].schedule.generate_month(
+                    record['year'], record['month'], shifts, record['days_off'])
+            elif op == 'book':
+                records = hospital.records
+                hospital.departments[record['department']].schedule.book(
+                    records[record['patient']][1], records[record['staff']][1],
+                    from_minutes(record['start']), record['end'] - record['start'],
+                    record['reason'], record['id'])
+            elif op == 'cancel':
+                hospital.departments[record['department']].schedule.cancel(record['id'])
+            elif op == 'set_beds':
+                hospital.departments[record['department']].triage.set_capacity(record['beds'])
+            elif op == 'triage_arrive':
+                hospital.departments[record['department']].triage.arrive(
+                    hospital.records[record['id']][1], record['level'], record['arrival'])
+            elif op == 'triage_level':
+                hospital.departments[record['department']].triage.retriage(
+                    hospital.records[record['id']][1], record['level'])
+            elif op == 'triage_admit':
+                hospital.departments[record['department']].triage.admit(
+                    hospital.records[record['id']][1], record['bed'])
+            elif op == 'triage_discharge':
+                hospital.departments[record['department']].triage.discharge(
+                    hospital.records[record['id']][1])
+            else:
+                raise ValueError(f"Unknown journal operation: {op}")
+
+            self.seq = record['seq']
+            applied += 1
+
+        self.pending = applied
+        return applied
+
+    @staticmethod
+    def _target(hospital, record: dict, kind: str):
+        """Finds the (department, record) a delete applies to."""
+        if 'id' in record:
+            return hospital.get_record(record['id'])
+        # Journals written before record IDs address records by position
+        department = hospital.departments[record['department']]
+        return department, list(getattr(department, kind))[record['index']]
+
+    def needs_compaction(self) -> bool:
+        """Returns True when enough records piled up to justify a new snapshot."""
+        return self.pending >= self.compact_every
+
+    def clear(self) -> None:
+        """Empties the journal once its records are part of a snapshot."""
+        self.truncate(self.seq)
+
+    def truncate(self, seq: int) -> None:
+        """
+        Drops the records up to `seq` once a snapshot contains them. Records
+        appended while that snapshot was being written are kept; the file
+        is replaced atomically, so a crash never loses them.
+        """
+        self.close()
+        kept = [json.dumps(record, ensure_ascii=False) + "\n" for record in self.records(seq)]
+        if kept:
+            with atomic_write(self.path) as f:
+                f.write("".join(kept))
+        else:
+            with open(self.path, 'w', encoding='utf-8'):
+                pass
+        self.pending = len(kept)
+        set_gauge('hospital_journal_pending_records', self.pending)
+
+    def close(self) -> None:
+        """Closes the journal file handle."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
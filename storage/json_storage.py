@@ -0,0 +1,457 @@
+import json
+import os
+import threading
+from array import array
+
+from telemetry import count, registry, set_gauge, timed
+
+from .atomic import atomic_write
+from .base import Repository
+from .journal import Journal
+from .lookup_index import LookupIndex, write_lookup_index
+from .persistence import PersistenceWorker
+from .search_index import read_search_index, write_search_index
+from .streaming import StreamingLoader, peak_rss_kb
+
+
+class JsonStorage(Repository):
+    """
+    JSON file backend.
+
+    The data file holds a full snapshot; changes made since are appended to
+    a journal and folded into a new snapshot on save(), or in the
+    background once start_worker() has been called.
+    """
+
+    def __init__(self, path: str, journal_path: str, compact_every: int = 1000,
+                 progress=None, large_file_bytes: int = 64 * 1024 * 1024, blobs=None,
+                 index_path: str | None = None, lookup_path: str | None = None) -> None:
+        """
+        Initializes the JSON backend.
+
+        Args:
+            path: Path of the JSON data file.
+            journal_path: Path of the change journal.
+            compact_every: Journal records after which a snapshot is written.
+            progress: Optional callback progress(bytes_read, total_bytes)
+                used while loading large files.
+            large_file_bytes: Size from which loading reports progress.
+            blobs: Optional BlobStore; medical records are then kept there
+                and the snapshot and journal only hold their offsets.
+            index_path: Optional file for the full-text index over medical
+                records, saved with every snapshot and loaded with it.
+            lookup_path: Optional sidecar lookup index, saved with every
+                snapshot, that answers one-off reads without a load (see
+                LookupIndex).
+        """
+        # Input validation
+        if not isinstance(path, str):
+            raise TypeError("Data file path must be a string!")
+
+        self.path: str = path
+        self.journal: Journal = Journal(journal_path, compact_every)
+        self.progress = progress
+        self.large_file_bytes: int = large_file_bytes
+        self.blobs = blobs
+        self.index_path: str | None = index_path
+        self.lookup_path: str | None = lookup_path
+        # Keeps each change and its journal record together, so a concurrent
+        # save() never snapshots a change without its journal sequence number
+        self._lock = threading.RLock()
+        # Serializes snapshot writes, which happen outside self._lock
+        self._save_lock = threading.Lock()
+        self.worker: PersistenceWorker | None = None
+
+    @timed('load')
+    def load(self):
+        """Streams the snapshot and replays the journal on top of it."""
+        large = os.path.getsize(self.path) >= self.large_file_bytes
+        loader = StreamingLoader(self.path, progress=self.progress if large else None,
+                                 blobs=self.blobs)
+        hospital = loader.load()
+
+        if large and self.progress is not None:
+            peak = peak_rss_kb()
+            print(f"\n  Peak memory: {peak // 1024 if peak else '?'} MiB")
+
+        # Replay changes made after the snapshot was written
+        journal_seq = loader.extra.get('journal_seq', 0)
+        self._attach_search_index(hospital, journal_seq)
+        self.journal.replay(hospital, journal_seq, self.blobs)
+        return hospital
+
+    def _attach_search_index(self, hospital, journal_seq: int) -> None:
+        """
+        Gives a freshly loaded hospital the full-text index saved with its
+        snapshot, if there is one. The journal replay then keeps it current.
+        """
+        if self.index_path is None:
+            return
+        index = read_search_index(self.index_path, journal_seq)
+        if index is not None and len(index) == hospital.stats.patient_count:
+            hospital.record_index = index
+
+    def exists(self) -> bool:
+        """Returns True if a snapshot has been written."""
+        return os.path.exists(self.path)
+
+    def open_lookup(self) -> LookupIndex | None:
+        """Opens the sidecar lookup index of the snapshot, if one is kept."""
+        if self.lookup_path is None:
+            return None
+        return LookupIndex(self.lookup_path, self.path, self.journal.path, self.blobs)
+
+    def create(self, name: str, location: str):
+        """Starts a new hospital, keeping any changes already journaled."""
+        from model import Hospital
+
+        hospital = Hospital(name, location)
+        self.journal.replay(hospital, blobs=self.blobs)
+        return hospital
+
+    def start_worker(self, hospital, delay: float = 2.0,
+                     max_delay: float | None = None) -> PersistenceWorker:
+        """
+        Moves snapshot writes to a background thread: changes are still
+        journaled right away, and a snapshot follows once they have quieted
+        down for `delay` seconds instead of on the changing thread.
+        close() stops the worker and writes pending changes.
+        """
+        self.worker = PersistenceWorker(self, hospital, delay, max_delay).start()
+        if self.journal.pending:
+            self.worker.schedule()
+        return self.worker
+
+    @timed('save')
+    def save(self, hospital) -> None:
+        """
+        Writes a full snapshot of the hospital and compacts the journal.
+        Changes are only held back while the snapshot views are taken, not
+        while they are written.
+        """
+        with self._save_lock:
+            self._save(hospital)
+
+    def _save(self, hospital) -> None:
+        """Writes the snapshot; the caller holds the save lock."""
+        # Views, journal position and index copy must describe the same state
+        with self._lock:
+            views = hospital.snapshot()
+            states = [dept.state() for dept, _, _ in views]
+            journal_seq = self.journal.seq
+            index = hospital.export_record_index() if self.index_path is not None else None
+
+        # Ensure data directory exists
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        offsets = self._write_snapshot(hospital, views, journal_seq, states)
+        if offsets is not None and self.lookup_path is not None:
+            write_lookup_index(hospital, self.lookup_path, self.path, views, offsets, journal_seq)
+        if index is not None:
+            write_search_index(hospital, self.index_path, journal_seq, index)
+
+        if registry.enabled:
+            size = os.path.getsize(self.path)
+            count('hospital_bytes_written_total', size, file='snapshot')
+            set_gauge('hospital_snapshot_bytes', size)
+
+        # The snapshot now contains every change journaled before it was taken
+        with self._lock:
+            self.journal.truncate(journal_seq)
+
+    def _write_snapshot(self, hospital, views, journal_seq: int, states: list[dict]) -> array | None:
+        """Writes the snapshot file and returns the offsets of its records, if it has any."""
+        return write_json_snapshot(hospital, self.path, journal_seq, self.blobs, views, states)
+
+    def _medical_record(self, patient) -> dict:
+        """Returns the journal fields holding a patient's medical record."""
+        if self.blobs is None:
+            return {'medical_record': patient.medical_record}
+        return {'record_ref': patient.record_offset(self.blobs)}
+
+    def _record(self, hospital, op: str, **fields) -> None:
+        """
+        Journals a change. A snapshot follows in the background if a worker
+        runs, else right away when the journal grows too long.
+        """
+        self._record_many(hospital, [(op, fields)])
+
+    def _record_many(self, hospital, changes: list[tuple[str, dict]]) -> None:
+        """Journals changes that belong together with one write, as _record() does one."""
+        self.journal.append_many(changes)
+        if self.worker is not None:
+            self.worker.schedule()
+        elif self.journal.needs_compaction() and self._save_lock.acquire(blocking=False):
+            # A save already in progress would leave this change in the journal anyway
+            try:
+                self._save(hospital)
+            finally:
+                self._save_lock.release()
+
+    @timed('add_department')
+    def add_department(self, hospital, department) -> None:
+        """Adds a department and journals it."""
+        with self._lock:
+            hospital.add_department(department)
+            self._record(hospital, 'add_department', name=department.name)
+
+    @timed('add_patient')
+    def add_patient(self, hospital, department, patient, quiet: bool = False) -> None:
+        """Adds a patient and journals it."""
+        with self._lock:
+            department.add_patient(patient, quiet)
+            self._record(hospital, 'add_patient',
+                         department=hospital.departments.index(department),
+                         id=patient.record_id, name=patient.name, age=patient.age,
+                         **self._medical_record(patient))
+
+    @timed('add_staff')
+    def add_staff_member(self, hospital, department, staff_member, quiet: bool = False) -> None:
+        """Adds a staff member and journals it."""
+        with self._lock:
+            department.add_staff_member(staff_member, quiet)
+            self._record(hospital, 'add_staff',
+                         department=hospital.departments.index(department),
+                         id=staff_member.record_id, name=staff_member.name, age=staff_member.age,
+                         position=staff_member.position)
+
+    @timed('add_many')
+    def add_many(self, hospital, entries: list) -> None:
+        """
+        Adds a batch of records and journals them with one write.
+        The journal is folded into a snapshot on the next save().
+        """
+        from model import Patient
+
+        with self._lock:
+            positions = {id(dept): i for i, dept in enumerate(hospital.departments)}
+            changes = []
+            for department, record in entries:
+                index = positions[id(department)]
+                if isinstance(record, Patient):
+                    department.add_patient(record, quiet=True)
+                    changes.append(('add_patient', dict(
+                        department=index, id=record.record_id, name=record.name,
+                        age=record.age, **self._medical_record(record))))
+                else:
+                    department.add_staff_member(record, quiet=True)
+                    changes.append(('add_staff', dict(
+                        department=index, id=record.record_id, name=record.name,
+                        age=record.age, position=record.position)))
+            self.journal.append_many(changes)
+            if self.worker is not None:
+                self.worker.schedule()
+
+    @timed('delete_patient')
+    def delete_patient(self, hospital, department, patient) -> None:
+        """Removes a patient and journals it."""
+        with self._lock:
+            department.remove_patient(patient)
+            self._record(hospital, 'delete_patient', id=patient.record_id)
+
+    @timed('delete_staff')
+    def delete_staff_member(self, hospital, department, staff_member) -> None:
+        """Removes a staff member and journals it."""
+        with self._lock:
+            department.remove_staff_member(staff_member)
+            self._record(hospital, 'delete_staff', id=staff_member.record_id)
+
+    @timed('transfer_patient')
+    def transfer_patient(self, hospital, patient, target) -> None:
+        """
+        Moves a patient to another department and journals the move as a
+        delete and an add of the same ID, which replay already handles.
+        """
+        with self._lock:
+            hospital.transfer_patient(patient, target)
+            index = hospital.departments.index(target)
+            changes = [
+                ('delete_patient', dict(id=patient.record_id)),
+                ('add_patient', dict(department=index, id=patient.record_id, name=patient.name,
+                                     age=patient.age, **self._medical_record(patient)))]
+            # The bed or place in the queue moved along with the patient
+            with target.lock.read():
+                bed = target.triage.ward.bed_of(patient)
+                level = target.triage.queue.level(patient)
+                arrival = target.triage.queue.arrival(patient)
+            if bed is not None:
+                changes.append(('triage_admit', dict(department=index, id=patient.record_id,
+                                                     bed=bed)))
+            elif level is not None:
+                changes.append(('triage_arrive', dict(department=index, id=patient.record_id,
+                                                      level=level, arrival=arrival)))
+            self._record_many(hospital, changes)
+
+    @timed('generate_shifts')
+    def generate_shifts(self, hospital, department, year: int, month: int,
+                        shifts=None, days_off: int = 2) -> int:
+        """
+        Generates a month of shifts and journals the request rather than
+        every shift: replaying it on the same state generates the same ones.
+        """
+        from model import DEFAULT_SHIFTS
+
+        shifts = DEFAULT_SHIFTS if shifts is None else shifts
+        with self._lock:
+            added = department.schedule.generate_month(year, month, shifts, days_off)
+            if added:
+                self._record(hospital, 'generate_shifts',
+                             department=hospital.departments.index(department),
+                             year=year, month=month, days_off=days_off,
+                             shifts=[[start.isoformat('minutes'), end.isoformat('minutes')]
+                                     for start, end in shifts])
+            return added
+
+    @timed('book_appointment')
+    def book_next_free(self, hospital, department, patient, position: str, after,
+                       minutes: int, reason: str = ""):
+        """Books the first free slot and journals the appointment."""
+        with self._lock:
+            appointment = department.schedule.book_next_free(patient, position, after,
+                                                             minutes, reason)
+            if appointment is not None:
+                self._record(hospital, 'book', department=hospital.departments.index(department),
+                             id=appointment.appointment_id, patient=patient.record_id,
+                             staff=appointment.staff.record_id, start=appointment.start,
+                             end=appointment.end, reason=reason)
+            return appointment
+
+    @timed('cancel_appointment')
+    def cancel_appointment(self, hospital, department, appointment_id: int):
+        """Cancels an appointment and journals it."""
+        with self._lock:
+            appointment = department.schedule.cancel(appointment_id)
+            self._record(hospital, 'cancel', department=hospital.departments.index(department),
+                         id=appointment_id)
+            return appointment
+
+    @timed('set_bed_capacity')
+    def set_bed_capacity(self, hospital, department, beds: int) -> None:
+        """Changes the number of beds and journals it."""
+        with self._lock:
+            department.triage.set_capacity(beds)
+            self._record(hospital, 'set_beds', department=hospital.departments.index(department),
+                         beds=beds)
+
+    @timed('triage_arrive')
+    def triage_arrive(self, hospital, department, patient, level: int) -> None:
+        """Queues an arriving patient and journals it with their arrival order."""
+        with self._lock:
+            arrival = department.triage.arrive(patient, level)
+            self._record(hospital, 'triage_arrive',
+                         department=hospital.departments.index(department),
+                         id=patient.record_id, level=level, arrival=arrival)
+
+    @timed('retriage')
+    def retriage(self, hospital, department, patient, level: int) -> int:
+        """Re-triages a waiting patient and journals it."""
+        with self._lock:
+            old = department.triage.retriage(patient, level)
+            self._record(hospital, 'triage_level',
+                         department=hospital.departments.index(department),
+                         id=patient.record_id, level=level)
+            return old
+
+    @timed('admit_next')
+    def admit_next(self, hospital, department):
+        """Admits the most urgent waiting patient and journals the bed they got."""
+        with self._lock:
+            admitted = department.triage.admit_next()
+            if admitted is not None:
+                patient, bed = admitted
+                self._record(hospital, 'triage_admit',
+                             department=hospital.departments.index(department),
+                             id=patient.record_id, bed=bed)
+            return admitted
+
+    @timed('discharge_patient')
+    def discharge_patient(self, hospital, department, patient) -> int:
+        """Discharges an admitted patient and journals it."""
+        with self._lock:
+            bed = department.triage.discharge(patient)
+            self._record(hospital, 'triage_discharge',
+                         department=hospital.departments.index(department),
+                         id=patient.record_id)
+            return bed
+
+    def close(self) -> None:
+        """Writes changes the worker has pending, then closes the journal and blob files."""
+        if self.worker is not None:
+            self.worker.close()
+            self.worker = None
+        self.journal.close()
+        if self.blobs is not None:
+            self.blobs.close()
+
+
+def write_json_snapshot(hospital, path: str, journal_seq: int = 0, blobs=None,
+                        views=None, states=None) -> array:
+    """
+    Writes a full JSON snapshot of the hospital. The file is replaced
+    atomically, so a crash mid-write leaves the previous snapshot intact.
+
+    Records are written one per line, in department order, patients before
+    staff, so a sidecar index can point at each of them.
+
+    Args:
+        hospital: Hospital to write.
+        path: Data file path.
+        journal_seq: Sequence number of the last journal record included.
+        blobs: Optional BlobStore; patients then reference their medical
+            record by offset ('record_ref') instead of holding it inline.
+        views: Departments as returned by hospital.snapshot() when the
+            journal was at `journal_seq`; taken now if None.
+        states: Department.state() of every department, taken with the
+            views; taken now if None.
+
+    Returns:
+        The byte offset of every record object in the file, in that order.
+    """
+    def patient_data(p) -> dict:
+        data = {'id': p.record_id, 'name': p.name, 'age': p.age}
+        if blobs is None:
+            data['medical_record'] = p.medical_record
+        else:
+            data['record_ref'] = p.record_offset(blobs)
+        return data
+
+    def staff_data(s) -> dict:
+        return {'id': s.record_id, 'name': s.name, 'age': s.age, 'position': s.position}
+
+    info = {'name': hospital.name, 'location': hospital.location, 'next_id': hospital.next_id}
+    offsets = array('Q')
+    parts = []
+    position = 0
+
+    def write(text: str) -> None:
+        nonlocal position
+        data = text.encode('utf-8')
+        parts.append(data)
+        position += len(data)
+
+    if views is None:
+        views = hospital.snapshot()
+    if states is None:
+        states = [dept.state() for dept, _, _ in views]
+    with atomic_write(path, 'wb') as f:
+        write('{\n    "hospital": ' + json.dumps(info, ensure_ascii=False)
+              + ',\n    "journal_seq": ' + str(journal_seq) + ',\n    "departments": [')
+        for d, (dept, patients, staff) in enumerate(views):
+            write((',' if d else '') + '\n        {\n            "name": '
+                  + json.dumps(dept.name, ensure_ascii=False))
+            for key, records, encode in (('patients', patients, patient_data),
+                                         ('staff', staff, staff_data)):
+                write(',\n            "' + key + '": [')
+                for i, record in enumerate(records):
+                    write((',' if i else '') + '\n                ')
+                    offsets.append(position)
+                    write(json.dumps(encode(record), ensure_ascii=False))
+                    if len(parts) >= 4096:
+                        f.write(b"".join(parts))
+                        parts.clear()
+                write('\n            ]' if records else ']')
+            for key, value in states[d].items():
+                write(',\n            "' + key + '": ' + json.dumps(value, ensure_ascii=False))
+            write('\n        }')
+        write('\n    ]\n}\n')
+        f.write(b"".join(parts))
+    return offsets
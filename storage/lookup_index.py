@@ -0,0 +1,403 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+
+from telemetry import count
+
+from .atomic import atomic_write
+from .journal import STATE_OPS, Journal
+
+
+LOOKUP_MAGIC = b"HOSPLKP\x00"
+LOOKUP_VERSION = 1
+
+# magic, version, metadata offset and length
+LOOKUP_HEADER = struct.Struct('<8sI4xQQ')
+
+# Columns, in file order: record IDs, byte offsets of the records in the
+# snapshot, start of every lower-cased name in the name block (plus its
+# end), department indexes, and record positions ordered by ID. Records are
+# held patients first, then staff, each in department order, so a search
+# only scans the names of the kind it looks for.
+LOOKUP_COLUMNS = (('ids', 'q'), ('offsets', 'Q'), ('name_starts', 'Q'), ('departments', 'I'),
+                  ('id_order', 'I'))
+
+
+def _write_column(f, typecode: str, values) -> tuple[int, int]:
+    """Writes one 8-byte aligned little-endian column and returns (offset, count)."""
+    padding = -f.tell() % 8
+    if padding:
+        f.write(b"\0" * padding)
+    offset = f.tell()
+    column = values if isinstance(values, array) else array(typecode, values)
+    if sys.byteorder != 'little':
+        column = array(typecode, column)
+        column.byteswap()
+    f.write(column.tobytes())
+    return offset, len(column)
+
+
+def write_lookup_index(hospital, path: str, data_path: str, views, offsets,
+                       journal_seq: int = 0) -> None:
+    """
+    Writes the sidecar lookup index of a JSON snapshot, which answers
+    searches, lookups by ID and statistics without loading the snapshot
+    (see LookupIndex). The file is replaced atomically.
+
+    Args:
+        hospital: Hospital the snapshot was written from.
+        path: Index file path.
+        data_path: Path of the snapshot, which must already be written.
+        views: Departments as returned by hospital.snapshot(), the same
+            ones the snapshot was written from.
+        offsets: Byte offsets of the records in the snapshot, as returned
+            by write_json_snapshot().
+        journal_seq: Sequence number of the snapshot.
+    """
+    from model import Statistics
+
+    if sum(len(patients) + len(staff) for _, patients, staff in views) != len(offsets):
+        raise ValueError("Record offsets do not match the snapshot views!")
+
+    # Position of every department's patients and staff among the offsets
+    starts = []
+    position = 0
+    for _, patients, staff in views:
+        starts.append((position, position + len(patients)))
+        position += len(patients) + len(staff)
+
+    ids = array('q')
+    record_offsets = array('Q')
+    dept_indexes = array('I')
+    name_starts = array('Q', [0])
+    names = []
+    staff_start = 0
+    for is_staff in (False, True):
+        if is_staff:
+            staff_start = len(ids)
+        for index, (_, patients, staff) in enumerate(views):
+            position = starts[index][is_staff]
+            for record in staff if is_staff else patients:
+                name = record.name.lower().encode('utf-8') + b"\n"
+                ids.append(record.record_id)
+                record_offsets.append(offsets[position])
+                dept_indexes.append(index)
+                names.append(name)
+                name_starts.append(name_starts[-1] + len(name))
+                position += 1
+    # Mostly sorted already: IDs grow within each department
+    id_order = array('I', sorted(range(len(ids)), key=ids.__getitem__))
+
+    departments = []
+    total = Statistics()
+    for dept, patients, staff in views:
+        stats = Statistics.recount(patients, staff)
+        total.merge(stats)
+        departments.append({'name': dept.name, 'stats': stats.state()})
+
+    info = os.stat(data_path)
+    meta = {
+        'version': LOOKUP_VERSION,
+        'journal_seq': journal_seq,
+        'snapshot_size': info.st_size,
+        'snapshot_mtime_ns': info.st_mtime_ns,
+        'hospital': {'name': hospital.name, 'location': hospital.location},
+        'departments': departments,
+        'stats': total.state(),
+        'staff_start': staff_start,
+        'columns': {},
+    }
+    with atomic_write(path, 'wb') as f:
+        f.write(b"\0" * LOOKUP_HEADER.size)
+        for name, typecode in LOOKUP_COLUMNS:
+            values = {'ids': ids, 'offsets': record_offsets, 'name_starts': name_starts,
+                      'departments': dept_indexes, 'id_order': id_order}[name]
+            meta['columns'][name] = _write_column(f, typecode, values)
+        meta['names'] = (f.tell(), name_starts[-1])
+        f.write(b"".join(names))
+        meta_offset = f.tell()
+        encoded = json.dumps(meta, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        f.write(encoded)
+        f.seek(0)
+        f.write(LOOKUP_HEADER.pack(LOOKUP_MAGIC, LOOKUP_VERSION, meta_offset, len(encoded)))
+        size = meta_offset + len(encoded)
+    count('hospital_bytes_written_total', size, file='lookup')
+
+
+class LookupIndex:
+    """
+    Memory-mapped sidecar index of a JSON snapshot, for one-off reads
+    without building the hospital.
+
+    Only the index header, its metadata and the journal are read on open.
+    Name searches scan the lower-cased name block, lookups by ID bisect an
+    ID-ordered column, and matching records are decoded straight from their
+    offset in the snapshot. Changes journaled since the snapshot are laid
+    over the results, so they match what a full load would return.
+    """
+
+    def __init__(self, path: str, data_path: str, journal_path: str | None = None,
+                 blobs=None) -> None:
+        """
+        Opens the index of a snapshot.
+
+        Args:
+            path: Index file path.
+            data_path: Snapshot the index was written with.
+            journal_path: Journal of changes made since the snapshot.
+            blobs: BlobStore holding medical records referenced by offset.
+
+        Raises:
+            FileNotFoundError: If the index or the snapshot does not exist.
+            ValueError: If the index is invalid or was written with another
+                snapshot, in which case the snapshot has to be loaded.
+        """
+        self.blobs = blobs
+        with open(path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"{path} is empty!") from None
+        self._views: list[memoryview] = []
+        self._data = None
+        try:
+            magic, version, meta_offset, meta_length = LOOKUP_HEADER.unpack_from(self._mmap)
+            if magic != LOOKUP_MAGIC or version != LOOKUP_VERSION:
+                raise ValueError(f"{path} is not a version {LOOKUP_VERSION} lookup index!")
+            meta = json.loads(self._mmap[meta_offset:meta_offset + meta_length])
+            info = os.stat(data_path)
+            if (meta['snapshot_size'], meta['snapshot_mtime_ns']) != (info.st_size, info.st_mtime_ns):
+                raise ValueError(f"{path} was written with another snapshot!")
+            columns = {name: self._column(typecode, *meta['columns'][name])
+                       for name, typecode in LOOKUP_COLUMNS}
+        except (struct.error, KeyError, IndexError) as e:
+            self.close()
+            raise ValueError(f"Corrupt lookup index {path}: {e}") from e
+        except (OSError, ValueError):
+            self.close()
+            raise
+
+        self.meta: dict = meta
+        self.name: str = meta['hospital']['name']
+        self.location: str = meta['hospital']['location']
+        self.journal_seq: int = meta['journal_seq']
+        self.departments: list[str] = [dept['name'] for dept in meta['departments']]
+        self._ids = columns['ids']
+        self._offsets = columns['offsets']
+        self._name_starts = columns['name_starts']
+        self._departments = columns['departments']
+        self._staff_start = meta['staff_start']
+        self._id_order = columns['id_order']
+        self._names_start = meta['names'][0]
+        with open(data_path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._decoder = json.JSONDecoder()
+
+        # Changes journaled since the snapshot
+        self._added: dict[int, dict] = {}    # ID -> record added since, in journal order
+        self._deleted: set[int] = set()      # IDs of indexed records deleted since
+        self._changes: list[tuple[str, dict]] = []
+        if journal_path is not None:
+            try:
+                self._read_journal(journal_path)
+            except (KeyError, IndexError, ValueError) as e:
+                self.close()
+                raise ValueError(f"Cannot apply the journal to the lookup index: {e}") from e
+
+    def _column(self, typecode: str, offset: int, count: int):
+        """Returns a column of the file, without copying it on little-endian hosts."""
+        size = count * array(typecode).itemsize
+        if offset + size > len(self._mmap):
+            raise IndexError("column extends past the end of the file")
+        raw = memoryview(self._mmap)[offset:offset + size]
+        if sys.byteorder != 'little':
+            column = array(typecode, raw.tobytes())
+            column.byteswap()
+            raw.release()
+            return column
+        column = raw.cast(typecode)
+        self._views += [column, raw]
+        return column
+
+    def _read_journal(self, journal_path: str) -> None:
+        """Collects the changes journaled after the snapshot."""
+        for record in Journal(journal_path).records(self.journal_seq):
+            op = record['op']
+            if op == 'add_department':
+                self.departments.append(record['name'])
+            elif op in ('add_patient', 'add_staff'):
+                self._added[record['id']] = record
+            elif op in ('delete_patient', 'delete_staff'):
+                if 'id' not in record:
+                    # Addressed by position: only a full load can resolve it
+                    raise ValueError("Journal deletes records by position!")
+                deleted = self._added.pop(record['id'], None)
+                if deleted is None:
+                    position = self._find(record['id'])
+                    if position is None:
+                        raise ValueError(f"Journal deletes unknown record {record['id']}!")
+                    deleted = self._entry(position)
+                    self._deleted.add(record['id'])
+                record = deleted
+            elif op in STATE_OPS:
+                continue    # Changes no record
+            else:
+                raise ValueError(f"Unknown journal operation: {op}")
+            self._changes.append((op, record))
+
+    def __len__(self) -> int:
+        """Returns the number of records."""
+        return len(self._ids) - len(self._deleted) + len(self._added)
+
+    def _find(self, record_id: int) -> int | None:
+        """Returns the position of the indexed record with the given ID, or None."""
+        i = bisect_left(self._id_order, record_id, key=self._ids.__getitem__)
+        if i == len(self._id_order) or self._ids[self._id_order[i]] != record_id:
+            return None
+        return self._id_order[i]
+
+    def _entry(self, position: int) -> dict:
+        """
+        Decodes the snapshot entry of the record at a position of the index,
+        with its department index under 'department' as in the journal.
+        """
+        offset = self._offsets[position]
+        end = self._data.find(b"\n", offset)
+        line = self._data[offset:end if end != -1 else len(self._data)].decode('utf-8')
+        data, _ = self._decoder.raw_decode(line)
+        if data.get('id') != self._ids[position]:
+            raise ValueError("Lookup index does not match the snapshot!")
+        data['department'] = self._departments[position]
+        return data
+
+    def _as_record(self, data: dict) -> dict:
+        """Returns a snapshot or journal entry in the API's record format."""
+        record = {'id': data['id'], 'name': data['name'], 'age': data['age'],
+                  'department': self.departments[data['department']]}
+        if 'position' in data:
+            record['position'] = data['position']
+        elif 'record_ref' in data:
+            if self.blobs is None:
+                raise ValueError("Medical records are in a blob store, but none is open!")
+            record['medical_record'] = self.blobs.get(data['record_ref'])
+        else:
+            record['medical_record'] = data['medical_record']
+        return record
+
+    def get(self, record_id: int) -> dict | None:
+        """Returns the record with the given ID, or None if there is none."""
+        if record_id in self._added:
+            return self._as_record(self._added[record_id])
+        if record_id in self._deleted:
+            return None
+        position = self._find(record_id)
+        return None if position is None else self._as_record(self._entry(position))
+
+    def search(self, name: str, staff: bool = False, limit: int | None = None) -> list[dict]:
+        """
+        Finds patients, or staff members, whose name contains the given
+        text (case-insensitive), in department order like
+        Hospital.search_patients().
+
+        Args:
+            name: Text to look for.
+            staff: Search staff members instead of patients.
+            limit: Maximum number of results, or None for all.
+        """
+        query = name.lower()
+        if "\n" in query:
+            return []
+        pattern = query.encode('utf-8')
+        starts = self._name_starts
+        base = self._names_start
+        first, last = (self._staff_start, len(self._ids)) if staff else (0, self._staff_start)
+        position = base + starts[first]
+        end = base + starts[last]
+        found = []
+        while len(found) != limit:
+            hit = self._mmap.find(pattern, position, end)
+            if hit == -1 or hit == end:
+                break
+            i = bisect_right(starts, hit - base) - 1
+            position = base + starts[i + 1]
+            if self._ids[i] not in self._deleted:
+                found.append(self._entry(i))
+
+        added = [data for data in self._added.values()
+                 if ('position' in data) == staff and query in data['name'].lower()]
+        if added:
+            # Journaled records come after the indexed ones of their department
+            found = sorted(found + added, key=lambda data: data['department'])
+        return [self._as_record(data) for data in found[:limit]]
+
+    def records(self):
+        """Yields every record, department by department, patients before staff."""
+        added = {}
+        for data in self._added.values():
+            added.setdefault((data['department'], 'position' in data), []).append(data)
+        departments = self._departments
+        # Next patient and next staff member, walking both halves of the index
+        cursors = [0, self._staff_start]
+        ends = [self._staff_start, len(self._ids)]
+        for index in range(len(self.departments)):
+            for is_staff in (False, True):
+                position = cursors[is_staff]
+                while position < ends[is_staff] and departments[position] == index:
+                    if self._ids[position] not in self._deleted:
+                        yield self._as_record(self._entry(position))
+                    position += 1
+                cursors[is_staff] = position
+                for data in added.get((index, is_staff), ()):
+                    yield self._as_record(data)
+
+    def _snapshot_statistics(self) -> tuple:
+        """Returns the aggregates of the snapshot, in total and per department."""
+        from model import Statistics
+
+        return (Statistics.from_state(self.meta['stats']),
+                [Statistics.from_state(dept['stats']) for dept in self.meta['departments']])
+
+    def statistics(self) -> dict:
+        """Returns the aggregates in the shape of Hospital.statistics()."""
+        from model import Patient, Staff, Statistics
+
+        total, departments = self._snapshot_statistics()
+        for op, data in self._changes:
+            if op == 'add_department':
+                departments.append(Statistics())
+                continue
+            if 'position' in data:
+                record = Staff(data['name'], data['age'], data['position'])
+            else:
+                record = Patient(data['name'], data['age'], "")
+            for stats in (total, departments[data['department']]):
+                if op.startswith('add'):
+                    stats.add(record)
+                else:
+                    stats.remove(record)
+
+        summary = total.as_dict()
+        summary['hospital'] = self.name
+        summary['location'] = self.location
+        summary['departments'] = [dict(name=name, **stats.as_dict())
+                                  for name, stats in zip(self.departments, departments)]
+        return summary
+
+    def close(self) -> None:
+        """Unmaps the index and the snapshot."""
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._mmap.close()
+        if self._data is not None:
+            self._data.close()
+
+    def __enter__(self) -> "LookupIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
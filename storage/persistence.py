@@ -0,0 +1,122 @@
+import threading
+import time
+
+from telemetry import count
+
+
+class PersistenceWorker:
+    """
+    Background thread that folds journaled changes into a new snapshot.
+
+    Every change is already in the journal when schedule() is called; the
+    worker waits until no change has come in for `delay` seconds, so a
+    burst of changes costs one snapshot, and callers never wait for
+    serialization. A steady stream of changes is still written at least
+    every `max_delay` seconds.
+    """
+
+    def __init__(self, storage, hospital, delay: float = 2.0, max_delay: float | None = None) -> None:
+        """
+        Initializes the worker; start() launches its thread.
+
+        Args:
+            storage: Storage whose save() writes the snapshot.
+            hospital: Hospital to save.
+            delay: Quiet seconds after the last change before saving.
+            max_delay: Most seconds a change waits for a snapshot; the
+                larger of 30 seconds and `delay` if None.
+        """
+        if max_delay is None:
+            max_delay = max(30.0, delay)
+        # Input validation
+        if delay < 0 or max_delay < delay:
+            raise ValueError("Delays must satisfy 0 <= delay <= max_delay!")
+
+        self.storage = storage
+        self.hospital = hospital
+        self.delay: float = delay
+        self.max_delay: float = max_delay
+        self.saves: int = 0
+        self.last_error: Exception | None = None
+        self._first: float | None = None    # time of the oldest unsaved change
+        self._last: float | None = None     # time of the newest unsaved change
+        self._stopping = False
+        self._condition = threading.Condition()
+        # Held for a whole save, so flush() returns only once data is on disk
+        self._flush_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def pending(self) -> bool:
+        """True if changes are waiting for a snapshot."""
+        return self._first is not None
+
+    def start(self) -> "PersistenceWorker":
+        """Starts the background thread."""
+        self._thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+        self._thread.start()
+        return self
+
+    def schedule(self) -> None:
+        """Notes a change; a snapshot follows once changes quiet down."""
+        now = time.monotonic()
+        with self._condition:
+            if self._first is None:
+                self._first = now
+            self._last = now
+            self._condition.notify()
+
+    def _wait_time(self) -> float | None:
+        """Returns the seconds until a save is due, or None if nothing is pending."""
+        if self._first is None:
+            return None
+        due = min(self._last + self.delay, self._first + self.max_delay)
+        return max(0.0, due - time.monotonic())
+
+    def _run(self) -> None:
+        """Saves whenever pending changes have quieted down, until close()."""
+        while True:
+            with self._condition:
+                while not self._stopping and self._wait_time() != 0:
+                    self._condition.wait(self._wait_time())
+                if self._stopping:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                # Kept pending by flush(), so it is retried after the delay
+                pass
+
+    def flush(self) -> bool:
+        """
+        Writes a snapshot now if changes are pending, and returns once it is
+        on disk, including when the background thread was already saving.
+
+        Returns:
+            True if a snapshot was written.
+        """
+        with self._flush_lock:
+            with self._condition:
+                if self._first is None:
+                    return False
+                self._first = self._last = None
+            try:
+                self.storage.save(self.hospital)
+            except Exception as e:
+                self.last_error = e
+                count('hospital_background_save_errors_total')
+                self.schedule()
+                raise
+            self.saves += 1
+            count('hospital_background_saves_total')
+            return True
+
+    def close(self) -> None:
+        """Stops the thread and writes any pending changes."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
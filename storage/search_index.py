@@ -0,0 +1,63 @@
+import json
+
+from telemetry import count
+
+from .atomic import atomic_write
+
+
+# Bumped whenever the tokenizer or the file layout changes
+INDEX_VERSION = 1
+
+
+def write_search_index(hospital, path: str, journal_seq: int = 0, data: dict | None = None) -> bool:
+    """
+    Saves the hospital's full-text index next to its snapshot, so the next
+    start can load it instead of indexing every medical record again.
+    The file is replaced atomically.
+
+    Args:
+        hospital: Hospital whose index is saved.
+        path: Index file path.
+        journal_seq: Sequence number of the snapshot written with it.
+        data: Index exported by hospital.export_record_index() together
+            with that snapshot; exported now if None.
+
+    Returns:
+        False if the index has not been built, so there was nothing to save.
+    """
+    if data is None:
+        data = hospital.export_record_index()
+    if data is None:
+        return False
+    data['version'] = INDEX_VERSION
+    data['journal_seq'] = journal_seq
+
+    with atomic_write(path) as f:
+        json.dump(data, f, separators=(',', ':'))
+        size = f.tell()
+    count('hospital_bytes_written_total', size, file='index')
+    return True
+
+
+def read_search_index(path: str, journal_seq: int = 0):
+    """
+    Loads a saved full-text index.
+
+    Args:
+        path: Index file path.
+        journal_seq: Sequence number of the snapshot that was loaded.
+
+    Returns:
+        The TextIndex, or None if the file is missing, unreadable, from an
+        older version or written with a different snapshot.
+    """
+    from model import TextIndex
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('version') != INDEX_VERSION or data.get('journal_seq') != journal_seq:
+        return None
+    return TextIndex.from_dict(data)
@@ -0,0 +1,660 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+from telemetry import timed
+
+from .base import Repository
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hospital (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    name TEXT NOT NULL,
+    location TEXT NOT NULL,
+    next_id INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS departments (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS patients (
+    id INTEGER PRIMARY KEY,
+    department_id INTEGER NOT NULL REFERENCES departments(id),
+    name TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    medical_record TEXT NOT NULL,
+    ordinal INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS staff (
+    id INTEGER PRIMARY KEY,
+    department_id INTEGER NOT NULL REFERENCES departments(id),
+    name TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    position TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shifts (
+    staff_id INTEGER NOT NULL REFERENCES staff(id) ON DELETE CASCADE,
+    start_minute INTEGER NOT NULL,
+    end_minute INTEGER NOT NULL,
+    PRIMARY KEY (staff_id, start_minute)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS appointments (
+    department_id INTEGER NOT NULL REFERENCES departments(id),
+    id INTEGER NOT NULL,
+    patient_id INTEGER NOT NULL REFERENCES patients(id) ON DELETE CASCADE,
+    staff_id INTEGER NOT NULL REFERENCES staff(id) ON DELETE CASCADE,
+    start_minute INTEGER NOT NULL,
+    end_minute INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    PRIMARY KEY (department_id, id)
+);
+CREATE TABLE IF NOT EXISTS triage (
+    patient_id INTEGER PRIMARY KEY REFERENCES patients(id) ON DELETE CASCADE,
+    level INTEGER,
+    arrival INTEGER,
+    bed INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_patients_name ON patients(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_staff_department ON staff(department_id, id);
+CREATE INDEX IF NOT EXISTS idx_staff_name ON staff(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_staff_position ON staff(position);
+CREATE INDEX IF NOT EXISTS idx_appointments_patient ON appointments(patient_id);
+CREATE INDEX IF NOT EXISTS idx_appointments_staff ON appointments(staff_id);
+"""
+
+# Patients are kept in the order they joined their department, which a
+# transfer does not keep in step with their IDs; created once the column exists
+ORDER_SCHEMA = """
+DROP INDEX IF EXISTS idx_patients_department;
+CREATE INDEX IF NOT EXISTS idx_patients_order ON patients(department_id, ordinal);
+"""
+
+# Next place in a department's patient order
+NEXT_ORDINAL = "(SELECT COALESCE(MAX(ordinal), 0) + 1 FROM patients WHERE department_id = ?)"
+
+# Trigram full-text tables give indexed substring search on names
+NAME_SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS {table}_names USING fts5(
+    name, content='{table}', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS {table}_names_insert AFTER INSERT ON {table} BEGIN
+    INSERT INTO {table}_names(rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_names_delete AFTER DELETE ON {table} BEGIN
+    INSERT INTO {table}_names({table}_names, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+"""
+
+
+class SqliteStorage(Repository):
+    """
+    SQLite backend.
+
+    The menu and the API work on the hospital built by load(), and every
+    change is a single-row statement committed together with it: if the
+    statement fails, the model change is undone. One-off commands use
+    open_lookup() instead, which answers from the tables with indexed
+    queries (the trigram tables for names) without loading the hospital.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Opens (and if needed creates) the database.
+
+        Args:
+            path: Path of the SQLite database file.
+        """
+        # Input validation
+        if not isinstance(path, str):
+            raise TypeError("Database path must be a string!")
+
+        self.path: str = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Shared with the API server's worker threads (SQLite serializes access)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self._upgrade_schema()
+        self.name_search = self._create_name_search()
+        self.conn.commit()
+
+        # Department object -> row id for the loaded hospital.
+        # Patients and staff rows use the record ID as their primary key.
+        self._department_ids: dict[int, int] = {}
+
+    def _upgrade_schema(self) -> None:
+        """Adds columns missing from databases created by older versions."""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(hospital)")}
+        if 'next_id' not in columns:
+            self.conn.execute("ALTER TABLE hospital ADD COLUMN next_id INTEGER NOT NULL DEFAULT 1")
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(departments)")}
+        if 'next_appointment' not in columns:
+            self.conn.execute("ALTER TABLE departments "
+                              "ADD COLUMN next_appointment INTEGER NOT NULL DEFAULT 1")
+        if 'beds' not in columns:
+            self.conn.execute("ALTER TABLE departments ADD COLUMN beds INTEGER NOT NULL DEFAULT 0")
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(patients)")}
+        if 'ordinal' not in columns:
+            # Older versions loaded patients in ID order
+            self.conn.execute("ALTER TABLE patients ADD COLUMN ordinal INTEGER NOT NULL DEFAULT 0")
+            self.conn.execute("UPDATE patients SET ordinal = id")
+        self.conn.executescript(ORDER_SCHEMA)
+
+    def _create_name_search(self) -> bool:
+        """Creates the trigram name tables, returning False if FTS5 is unavailable."""
+        try:
+            for table in ('patients', 'staff'):
+                self.conn.executescript(NAME_SEARCH_SCHEMA.format(table=table))
+        except sqlite3.OperationalError:
+            return False
+        return True
+
+    @timed('load')
+    def load(self):
+        """Builds the Hospital from the database tables."""
+        from model import Hospital, Department, Patient, Staff
+
+        try:
+            row = self.conn.execute(
+                "SELECT name, location, next_id FROM hospital WHERE id = 1").fetchone()
+            if row is None:
+                raise FileNotFoundError(f"No hospital stored in {self.path}")
+            hospital = Hospital(row[0], row[1])
+
+            departments = {}
+            for dept_id, name in self.conn.execute("SELECT id, name FROM departments ORDER BY id"):
+                department = Department(name)
+                hospital.add_department(department)
+                departments[dept_id] = department
+                self._department_ids[id(department)] = dept_id
+
+            for row_id, dept_id, name, age, record in self.conn.execute(
+                    "SELECT id, department_id, name, age, medical_record FROM patients "
+                    "ORDER BY department_id, ordinal"):
+                departments[dept_id].add_patient(Patient(name, age, record, row_id), quiet=True)
+
+            for row_id, dept_id, name, age, position in self.conn.execute(
+                    "SELECT id, department_id, name, age, position FROM staff ORDER BY id"):
+                departments[dept_id].add_staff_member(Staff(name, age, position, row_id), quiet=True)
+
+            for dept_id, state in self._load_states().items():
+                departments[dept_id].load_state(state)
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"Error reading database: {e}") from e
+
+        hospital.next_id = max(hospital.next_id, row[2])
+        return hospital
+
+    def exists(self) -> bool:
+        """Returns True if the database holds a hospital, or cannot be read."""
+        try:
+            return self.conn.execute("SELECT 1 FROM hospital WHERE id = 1").fetchone() is not None
+        except sqlite3.DatabaseError:
+            # Left for load() to report
+            return True
+
+    def _load_states(self) -> dict[int, dict]:
+        """
+        Reads every department's schedule and triage, as Department.state()
+        returns them, by row id.
+        """
+        states: dict[int, dict] = {}
+
+        def schedule(dept_id: int) -> dict:
+            state = states.setdefault(dept_id, {})
+            return state.setdefault('schedule', {'next_id': 1, 'shifts': [], 'appointments': []})
+
+        for dept_id, next_id in self.conn.execute(
+                "SELECT id, next_appointment FROM departments WHERE next_appointment > 1"):
+            schedule(dept_id)['next_id'] = next_id
+        times = None
+        for dept_id, staff_id, start, end in self.conn.execute(
+                "SELECT s.department_id, h.staff_id, h.start_minute, h.end_minute "
+                "FROM shifts h JOIN staff s ON s.id = h.staff_id "
+                "ORDER BY h.staff_id, h.start_minute"):
+            shifts = schedule(dept_id)['shifts']
+            if not shifts or shifts[-1][0] != staff_id:
+                times = []
+                shifts.append([staff_id, times])
+            times += (start, end)
+        for row in self.conn.execute(
+                "SELECT department_id, id, patient_id, staff_id, start_minute, end_minute, reason "
+                "FROM appointments"):
+            schedule(row[0])['appointments'].append(list(row[1:]))
+
+        def triage(dept_id: int) -> dict:
+            state = states.setdefault(dept_id, {})
+            return state.setdefault('triage', {'beds': 0, 'waiting': [], 'admitted': []})
+
+        for dept_id, beds in self.conn.execute("SELECT id, beds FROM departments WHERE beds > 0"):
+            triage(dept_id)['beds'] = beds
+        for dept_id, patient_id, level, arrival, bed in self.conn.execute(
+                "SELECT p.department_id, t.patient_id, t.level, t.arrival, t.bed "
+                "FROM triage t JOIN patients p ON p.id = t.patient_id"):
+            if bed is None:
+                triage(dept_id)['waiting'].append([patient_id, level, arrival])
+            else:
+                triage(dept_id)['admitted'].append([patient_id, bed])
+        return states
+
+    def create(self, name: str, location: str):
+        """Stores a new empty hospital."""
+        from model import Hospital
+
+        hospital = Hospital(name, location)
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO hospital (id, name, location) VALUES (1, ?, ?)",
+                              (name, location))
+        return hospital
+
+    @timed('save')
+    def save(self, hospital) -> None:
+        """Every change is already committed; just checkpoint the WAL."""
+        self.conn.commit()
+        self.conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def import_hospital(self, hospital) -> None:
+        """
+        Bulk-inserts a whole in-memory hospital into an empty database.
+
+        Raises:
+            ValueError: If the database already holds a hospital.
+        """
+        if self.conn.execute("SELECT 1 FROM hospital").fetchone() is not None:
+            raise ValueError(f"{self.path} already contains a hospital!")
+
+        with self.conn:
+            self.conn.execute("INSERT INTO hospital (id, name, location, next_id) VALUES (1, ?, ?, ?)",
+                              (hospital.name, hospital.location, hospital.next_id))
+            for department in hospital.departments:
+                cursor = self.conn.execute("INSERT INTO departments (name) VALUES (?)",
+                                           (department.name,))
+                dept_id = cursor.lastrowid
+                self.conn.executemany(
+                    "INSERT INTO patients (id, department_id, name, age, medical_record, ordinal) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    ((p.record_id, dept_id, p.name, p.age, p.medical_record, ordinal)
+                     for ordinal, p in enumerate(department.patients, 1)))
+                self.conn.executemany(
+                    "INSERT INTO staff (id, department_id, name, age, position) VALUES (?, ?, ?, ?, ?)",
+                    ((s.record_id, dept_id, s.name, s.age, s.position) for s in department.staff))
+                self._insert_state(dept_id, department.state())
+
+    def _insert_state(self, dept_id: int, state: dict) -> None:
+        """Inserts a department's schedule and triage, as Department.state() returns them."""
+        triage = state.get('triage')
+        if triage:
+            self.conn.execute("UPDATE departments SET beds = ? WHERE id = ?",
+                              (triage['beds'], dept_id))
+            self.conn.executemany(
+                "INSERT INTO triage (patient_id, level, arrival) VALUES (?, ?, ?)",
+                triage['waiting'])
+            self.conn.executemany("INSERT INTO triage (patient_id, bed) VALUES (?, ?)",
+                                  triage['admitted'])
+        schedule = state.get('schedule')
+        if not schedule:
+            return
+        self.conn.execute("UPDATE departments SET next_appointment = ? WHERE id = ?",
+                          (schedule['next_id'], dept_id))
+        self.conn.executemany(
+            "INSERT INTO shifts (staff_id, start_minute, end_minute) VALUES (?, ?, ?)",
+            ((staff_id, start, end) for staff_id, times in schedule['shifts']
+             for start, end in zip(times[::2], times[1::2])))
+        self.conn.executemany(
+            "INSERT INTO appointments (department_id, id, patient_id, staff_id, "
+            "start_minute, end_minute, reason) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((dept_id, *appointment) for appointment in schedule['appointments']))
+
+    @timed('add_department')
+    def add_department(self, hospital, department) -> None:
+        """Adds a department and inserts its row."""
+        with self.conn:
+            cursor = self.conn.execute("INSERT INTO departments (name) VALUES (?)",
+                                       (department.name,))
+            # Inside the transaction, so a rejected department is not stored
+            hospital.add_department(department)
+        self._department_ids[id(department)] = cursor.lastrowid
+
+    @timed('add_patient')
+    def add_patient(self, hospital, department, patient, quiet: bool = False) -> None:
+        """Adds a patient and inserts its row, taking the patient out again if that fails."""
+        department.add_patient(patient, quiet)
+        try:
+            with self.conn:
+                dept_id = self._department_ids[id(department)]
+                self.conn.execute(
+                    "INSERT INTO patients (id, department_id, name, age, medical_record, ordinal) "
+                    f"VALUES (?, ?, ?, ?, ?, {NEXT_ORDINAL})",
+                    (patient.record_id, dept_id, patient.name, patient.age,
+                     patient.medical_record, dept_id))
+                self._store_next_id(hospital)
+        except sqlite3.Error:
+            department.remove_patient(patient)
+            raise
+
+    @timed('add_staff')
+    def add_staff_member(self, hospital, department, staff_member, quiet: bool = False) -> None:
+        """Adds a staff member and inserts its row, taking them out again if that fails."""
+        department.add_staff_member(staff_member, quiet)
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO staff (id, department_id, name, age, position) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (staff_member.record_id, self._department_ids[id(department)],
+                     staff_member.name, staff_member.age, staff_member.position))
+                self._store_next_id(hospital)
+        except sqlite3.Error:
+            department.remove_staff_member(staff_member)
+            raise
+
+    @timed('add_many')
+    def add_many(self, hospital, entries: list) -> None:
+        """
+        Adds a batch of records and inserts them in one transaction; if any
+        of them fails, none is kept.
+        """
+        from model import Patient
+
+        patients = []
+        staff = []
+        added = []
+        try:
+            for department, record in entries:
+                dept_id = self._department_ids[id(department)]
+                if isinstance(record, Patient):
+                    department.add_patient(record, quiet=True)
+                    patients.append((record.record_id, dept_id, record.name, record.age,
+                                     record.medical_record, dept_id))
+                else:
+                    department.add_staff_member(record, quiet=True)
+                    staff.append((record.record_id, dept_id, record.name, record.age,
+                                  record.position))
+                added.append((department, record))
+
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO patients (id, department_id, name, age, medical_record, ordinal) "
+                    f"VALUES (?, ?, ?, ?, ?, {NEXT_ORDINAL})", patients)
+                self.conn.executemany(
+                    "INSERT INTO staff (id, department_id, name, age, position) "
+                    "VALUES (?, ?, ?, ?, ?)", staff)
+                self._store_next_id(hospital)
+        except (sqlite3.Error, TypeError, ValueError):
+            for department, record in added:
+                if isinstance(record, Patient):
+                    department.remove_patient(record)
+                else:
+                    department.remove_staff_member(record)
+            raise
+
+    def _store_next_id(self, hospital) -> None:
+        """Persists the ID counter so deleted IDs are never handed out again."""
+        self.conn.execute("UPDATE hospital SET next_id = ? WHERE id = 1", (hospital.next_id,))
+
+    @timed('delete_patient')
+    def delete_patient(self, hospital, department, patient) -> None:
+        """Deletes a patient's row and removes the patient in the same transaction."""
+        with self.conn:
+            self.conn.execute("DELETE FROM patients WHERE id = ?", (patient.record_id,))
+            # Last, so a failed statement leaves the patient in place; if the
+            # removal fails, the delete is rolled back
+            department.remove_patient(patient)
+
+    @timed('delete_staff')
+    def delete_staff_member(self, hospital, department, staff_member) -> None:
+        """Deletes a staff member's row and removes them in the same transaction."""
+        with self.conn:
+            self.conn.execute("DELETE FROM staff WHERE id = ?", (staff_member.record_id,))
+            department.remove_staff_member(staff_member)
+
+    @timed('transfer_patient')
+    def transfer_patient(self, hospital, patient, target) -> None:
+        """Moves a patient to another department and updates its row, or moves them back."""
+        source = hospital.transfer_patient(patient, target)
+        try:
+            with self.conn:
+                # Last in the target department, as in memory
+                dept_id = self._department_ids[id(target)]
+                self.conn.execute(
+                    f"UPDATE patients SET department_id = ?, ordinal = {NEXT_ORDINAL} WHERE id = ?",
+                    (dept_id, dept_id, patient.record_id))
+                # Cancelled by the move
+                self.conn.execute("DELETE FROM appointments WHERE patient_id = ?",
+                                  (patient.record_id,))
+                # The bed or place in the queue moved along with the patient
+                with target.lock.read():
+                    bed = target.triage.ward.bed_of(patient)
+                    level = target.triage.queue.level(patient)
+                    arrival = target.triage.queue.arrival(patient)
+                self._store_triage(patient, level, arrival, bed)
+        except sqlite3.Error:
+            hospital.transfer_patient(patient, source)
+            raise
+
+    def _store_triage(self, patient, level: int | None = None, arrival: int | None = None,
+                      bed: int | None = None) -> None:
+        """Replaces a patient's triage row, or deletes it if they are not in triage."""
+        if level is None and bed is None:
+            self.conn.execute("DELETE FROM triage WHERE patient_id = ?", (patient.record_id,))
+        else:
+            self.conn.execute("INSERT OR REPLACE INTO triage (patient_id, level, arrival, bed) "
+                              "VALUES (?, ?, ?, ?)", (patient.record_id, level, arrival, bed))
+
+    @timed('set_bed_capacity')
+    def set_bed_capacity(self, hospital, department, beds: int) -> None:
+        """Changes the number of beds and updates the department's row."""
+        department.triage.set_capacity(beds)
+        with self.conn:
+            self.conn.execute("UPDATE departments SET beds = ? WHERE id = ?",
+                              (beds, self._department_ids[id(department)]))
+
+    @timed('triage_arrive')
+    def triage_arrive(self, hospital, department, patient, level: int) -> None:
+        """Queues an arriving patient and stores their level and arrival order."""
+        arrival = department.triage.arrive(patient, level)
+        with self.conn:
+            self._store_triage(patient, level, arrival)
+
+    @timed('retriage')
+    def retriage(self, hospital, department, patient, level: int) -> int:
+        """Re-triages a waiting patient and updates their row."""
+        old = department.triage.retriage(patient, level)
+        with self.conn:
+            self.conn.execute("UPDATE triage SET level = ? WHERE patient_id = ?",
+                              (level, patient.record_id))
+        return old
+
+    @timed('admit_next')
+    def admit_next(self, hospital, department):
+        """Admits the most urgent waiting patient and stores the bed they got."""
+        admitted = department.triage.admit_next()
+        if admitted is not None:
+            with self.conn:
+                self._store_triage(admitted[0], bed=admitted[1])
+        return admitted
+
+    @timed('discharge_patient')
+    def discharge_patient(self, hospital, department, patient) -> int:
+        """Discharges an admitted patient and deletes their row."""
+        bed = department.triage.discharge(patient)
+        with self.conn:
+            self._store_triage(patient)
+        return bed
+
+    @timed('generate_shifts')
+    def generate_shifts(self, hospital, department, year: int, month: int,
+                        shifts=None, days_off: int = 2) -> int:
+        """Generates a month of shifts and inserts the staff's shifts of that month."""
+        from model import DEFAULT_SHIFTS, to_minutes
+
+        schedule = department.schedule
+        added = schedule.generate_month(year, month,
+                                        DEFAULT_SHIFTS if shifts is None else shifts, days_off)
+        if added:
+            # Night shifts end in the next month; shifts already stored are kept
+            start = datetime(year, month, 1)
+            end = datetime(year + month // 12, month % 12 + 1, 1) + timedelta(days=1)
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO shifts (staff_id, start_minute, end_minute) "
+                    "VALUES (?, ?, ?)",
+                    ((member.record_id, to_minutes(shift_start), to_minutes(shift_end))
+                     for member in department.staff
+                     for shift_start, shift_end in schedule.shifts(member, start, end)))
+        return added
+
+    @timed('book_appointment')
+    def book_next_free(self, hospital, department, patient, position: str, after,
+                       minutes: int, reason: str = ""):
+        """Books the first free slot and inserts the appointment."""
+        appointment = department.schedule.book_next_free(patient, position, after, minutes, reason)
+        if appointment is not None:
+            dept_id = self._department_ids[id(department)]
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO appointments (department_id, id, patient_id, staff_id, "
+                    "start_minute, end_minute, reason) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (dept_id, appointment.appointment_id, patient.record_id,
+                     appointment.staff.record_id, appointment.start, appointment.end, reason))
+                self.conn.execute("UPDATE departments SET next_appointment = ? WHERE id = ?",
+                                  (department.schedule.next_id, dept_id))
+        return appointment
+
+    @timed('cancel_appointment')
+    def cancel_appointment(self, hospital, department, appointment_id: int):
+        """Cancels an appointment and deletes its row."""
+        appointment = department.schedule.cancel(appointment_id)
+        with self.conn:
+            self.conn.execute("DELETE FROM appointments WHERE department_id = ? AND id = ?",
+                              (self._department_ids[id(department)], appointment_id))
+        return appointment
+
+    def open_lookup(self) -> "SqliteLookup":
+        """Opens a view answering lookups with queries on the tables."""
+        return SqliteLookup(self.conn, self.name_search)
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        self.conn.close()
+
+
+class SqliteLookup:
+    """
+    Read-only view of the SQLite tables for one-off commands, in the
+    record format of LookupIndex, without building the hospital.
+
+    Lookups by ID use the primary keys, name searches the trigram tables
+    (or a streamed scan of the names when FTS5 is missing or the text is
+    shorter than a trigram) and statistics are aggregated by the database.
+    """
+
+    PATIENTS = "SELECT id, name, age, department_id, medical_record FROM patients"
+    STAFF = "SELECT id, name, age, department_id, position FROM staff"
+
+    def __init__(self, conn: sqlite3.Connection, name_search: bool = True) -> None:
+        """
+        Initializes the view.
+
+        Args:
+            conn: Open connection of a SqliteStorage; close() leaves it open.
+            name_search: The trigram name tables exist.
+        """
+        self.conn = conn
+        self.name_search: bool = name_search
+        row = conn.execute("SELECT name, location FROM hospital WHERE id = 1").fetchone()
+        if row is None:
+            raise ValueError("No hospital stored in the database!")
+        self.name: str = row[0]
+        self.location: str = row[1]
+        # Department row id -> name, in department order
+        self.departments: dict[int, str] = dict(
+            conn.execute("SELECT id, name FROM departments ORDER BY id"))
+
+    def _as_record(self, row: tuple, staff: bool) -> dict:
+        """Returns a patients or staff row in the API's record format."""
+        record = {'id': row[0], 'name': row[1], 'age': row[2],
+                  'department': self.departments[row[3]]}
+        record['position' if staff else 'medical_record'] = row[4]
+        return record
+
+    def get(self, record_id: int) -> dict | None:
+        """Returns the record with the given ID, or None if there is none."""
+        for staff, query in ((False, self.PATIENTS), (True, self.STAFF)):
+            row = self.conn.execute(query + " WHERE id = ?", (record_id,)).fetchone()
+            if row is not None:
+                return self._as_record(row, staff)
+        return None
+
+    def search(self, name: str, staff: bool = False, limit: int | None = None) -> list[dict]:
+        """
+        Finds patients, or staff members, whose name contains the given
+        text (case-insensitive), in department order like
+        Hospital.search_patients().
+        """
+        query = name.lower()
+        table = 'staff' if staff else 'patients'
+        select = self.STAFF if staff else self.PATIENTS
+        order = "department_id, " + ('id' if staff else 'ordinal')
+        if self.name_search and len(query) >= 3:
+            rows = self.conn.execute(
+                select + f" WHERE id IN (SELECT rowid FROM {table}_names WHERE {table}_names "
+                f"MATCH ?) ORDER BY {order}", ('"' + query.replace('"', '""') + '"',))
+        else:
+            rows = self.conn.execute(select + f" ORDER BY {order}")
+        found = []
+        for row in rows:
+            if len(found) == limit:
+                break
+            # The tokenizer folds case slightly differently than str.lower()
+            if query in row[1].lower():
+                found.append(self._as_record(row, staff))
+        return found
+
+    def records(self):
+        """Yields every record, department by department, patients before staff."""
+        for dept_id in self.departments:
+            for staff, query, order in ((False, self.PATIENTS, 'ordinal'),
+                                        (True, self.STAFF, 'id')):
+                for row in self.conn.execute(query + f" WHERE department_id = ? ORDER BY {order}",
+                                             (dept_id,)):
+                    yield self._as_record(row, staff)
+
+    def statistics(self) -> dict:
+        """Returns the aggregates in the shape of Hospital.statistics()."""
+        from model import Statistics
+
+        departments = {dept_id: Statistics() for dept_id in self.departments}
+        for dept_id, age, count in self.conn.execute(
+                "SELECT department_id, age, COUNT(*) FROM patients GROUP BY department_id, age"):
+            stats = departments[dept_id]
+            stats.patient_count += count
+            stats.age_total += age * count
+            stats.age_counts[age] = count
+        for dept_id, position, count in self.conn.execute(
+                "SELECT department_id, position, COUNT(*) FROM staff "
+                "GROUP BY department_id, position"):
+            stats = departments[dept_id]
+            stats.staff_count += count
+            stats.positions[position] = count
+        total = Statistics()
+        for stats in departments.values():
+            total.merge(stats)
+
+        summary = total.as_dict()
+        summary['hospital'], summary['location'] = self.name, self.location
+        summary['departments'] = [dict(name=self.departments[dept_id], **stats.as_dict())
+                                  for dept_id, stats in departments.items()]
+        return summary
+
+    def close(self) -> None:
+        """Nothing to release: the connection belongs to the storage."""
+
+    def __enter__(self) -> "SqliteLookup":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,246 @@
+import codecs
+import json
+import os
+import sys
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from .blob_store import patient_from_entry
+
+
+# Members of a department object that hold parts of Department.state()
+STATE_KEYS = ('schedule', 'triage')
+
+
+def peak_rss_kb() -> int | None:
+    """Returns the peak resident set size of this process in KiB, if known."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports KiB
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+class JsonStream:
+    """
+    Minimal incremental JSON reader over a binary file.
+
+    Only the current chunk is held in memory. Containers can be walked one
+    member at a time with iter_object()/iter_array(), and small values are
+    decoded with value().
+    """
+
+    _WHITESPACE = " \t\n\r"
+
+    def __init__(self, f, chunk_size: int = 1 << 20, progress=None) -> None:
+        """
+        Initializes the stream.
+
+        Args:
+            f: File object opened in binary mode.
+            chunk_size: Number of bytes read from the file at once.
+            progress: Optional callback called as progress(bytes_read) after
+                every chunk.
+        """
+        self._file = f
+        self._chunk_size = chunk_size
+        self._progress = progress
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self.bytes_read = 0
+
+    def _fill(self) -> bool:
+        """Reads the next chunk, dropping what was already consumed."""
+        if self._eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        self.bytes_read += len(chunk)
+        if not chunk:
+            self._eof = True
+        self._buf = self._buf[self._pos:] + self._decoder.decode(chunk, final=not chunk)
+        self._pos = 0
+        if self._progress is not None:
+            self._progress(self.bytes_read)
+        return True
+
+    def _peek(self) -> str:
+        """Returns the next non-whitespace character without consuming it."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in self._WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        """Consumes the given structural character."""
+        if self._peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self._buf, self._pos)
+        self._pos += 1
+
+    def value(self):
+        """Decodes and returns the next complete JSON value."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                # The value may just be cut off by the end of the chunk
+                if not self._fill():
+                    raise
+                continue
+            # A number ending exactly at the chunk boundary may continue
+            if end == len(self._buf) and not self._eof:
+                self._fill()
+                continue
+            self._pos = end
+            return value
+
+    def iter_object(self):
+        """
+        Walks a JSON object, yielding each key.
+
+        The caller must consume the member's value before asking for the
+        next key.
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            self._expect(':')
+            yield key
+            if self._peek() == ',':
+                self._pos += 1
+            else:
+                self._expect('}')
+                return
+
+    def iter_array(self):
+        """
+        Walks a JSON array, yielding once per element.
+
+        The caller must consume the element before asking for the next one.
+        """
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield
+            if self._peek() == ',':
+                self._pos += 1
+            else:
+                self._expect(']')
+                return
+
+
+class StreamingLoader:
+    """
+    Builds a Hospital from a JSON data file department by department and
+    record by record, so the whole document is never held in memory.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 1 << 20, progress=None,
+                 blobs=None) -> None:
+        """
+        Initializes the loader.
+
+        Args:
+            path: Path of the JSON data file.
+            chunk_size: Number of bytes read from the file at once.
+            progress: Optional callback called as progress(bytes_read, total_bytes).
+            blobs: BlobStore holding medical records stored by reference.
+        """
+        # Input validation
+        if not isinstance(path, str):
+            raise TypeError("Data file path must be a string!")
+
+        self.path: str = path
+        self.chunk_size: int = chunk_size
+        self.progress = progress
+        self.blobs = blobs
+        self.total_bytes: int = 0
+        self.bytes_read: int = 0
+        self.extra: dict = {}   # Top-level keys other than hospital/departments
+
+    def _report(self, bytes_read: int) -> None:
+        """Forwards chunk progress to the user callback."""
+        self.bytes_read = bytes_read
+        if self.progress is not None:
+            self.progress(bytes_read, self.total_bytes)
+
+    def load(self):
+        """
+        Parses the data file and returns the Hospital object graph.
+
+        Raises:
+            FileNotFoundError: If the data file does not exist.
+            json.JSONDecodeError: If the data file is malformed.
+        """
+        # Imported here to keep the storage layer free of import cycles
+        from model import Hospital
+
+        self.total_bytes = os.path.getsize(self.path)
+        with open(self.path, 'rb') as f:
+            stream = JsonStream(f, self.chunk_size, self._report)
+            info = None
+            departments = []
+            for key in stream.iter_object():
+                if key == 'hospital':
+                    info = stream.value()
+                elif key == 'departments':
+                    for _ in stream.iter_array():
+                        departments.append(self._load_department(stream))
+                else:
+                    self.extra[key] = stream.value()
+
+        if info is None:
+            raise json.JSONDecodeError("Missing 'hospital' section", "", 0)
+
+        hospital = Hospital(info['name'], info['location'])
+        for department in departments:
+            hospital.add_department(department)
+        # Never hand out the ID of a record deleted before the snapshot
+        hospital.next_id = max(hospital.next_id, info.get('next_id', 1))
+        return hospital
+
+    def _load_department(self, stream: JsonStream):
+        """Streams one department object and returns the Department."""
+        from model import Department, Staff
+
+        name = None
+        patients = []
+        staff = []
+        state = {}
+        for key in stream.iter_object():
+            if key == 'patients':
+                for _ in stream.iter_array():
+                    patients.append(patient_from_entry(stream.value(), self.blobs))
+            elif key == 'staff':
+                for _ in stream.iter_array():
+                    data = stream.value()
+                    staff.append(Staff(data['name'], data['age'],
+                                       data['position'], data.get('id')))
+            elif key == 'name':
+                name = stream.value()
+            elif key in STATE_KEYS:
+                state[key] = stream.value()
+            else:
+                stream.value()  # Unknown member, skip it
+
+        department = Department(name)
+        for patient in patients:
+            department.add_patient(patient, quiet=True)
+        for member in staff:
+            department.add_staff_member(member, quiet=True)
+        department.load_state(state)
+        return department
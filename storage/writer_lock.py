@@ -0,0 +1,82 @@
+import os
+
+try:
+    import fcntl
+except ImportError:     # Not POSIX: advisory locks are not available
+    fcntl = None
+
+
+class WriterLock:
+    """
+    Advisory lock on a file in the data directory, held by the one process
+    allowed to change the data files.
+
+    The JSON and binary backends keep the journal's sequence number and the
+    next record ID in memory, so two processes writing the same files would
+    hand out the same numbers and one's changes would be lost when the
+    other compacts the journal. Every writer takes this lock before it
+    loads the data and keeps it until it exits; the operating system drops
+    it if the process dies.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Initializes the lock; acquire() takes it.
+
+        Args:
+            path: Lock file, created if missing. Its content is the
+                holder's process ID, for error messages.
+        """
+        # Input validation
+        if not isinstance(path, str):
+            raise TypeError("Lock file path must be a string!")
+
+        self.path: str = path
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        """True while this process holds the lock."""
+        return self._file is not None
+
+    def acquire(self) -> None:
+        """
+        Takes the lock without waiting.
+
+        Raises:
+            PermissionError: If another process holds it.
+        """
+        if self._file is not None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        f = open(self.path, 'a+', encoding='utf-8')
+        if fcntl is not None:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                f.seek(0)
+                holder = f.read().strip() or "?"
+                f.close()
+                raise PermissionError(f"The data files are being changed by another process "
+                                      f"(PID {holder})!") from None
+        f.seek(0)
+        f.truncate()
+        f.write(str(os.getpid()))
+        f.flush()
+        self._file = f
+
+    def release(self) -> None:
+        """Releases the lock if this process holds it."""
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self) -> "WriterLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
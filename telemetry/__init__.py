@@ -0,0 +1,2 @@
+from .metrics import *
+from .export import *
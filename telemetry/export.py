@@ -0,0 +1,58 @@
+import os
+
+from .metrics import Histogram, Registry, registry as default_registry
+
+
+def _labels(labels: dict, **extra) -> str:
+    """Formats labels as {key="value",...}, or '' without labels."""
+    labels = {**labels, **extra}
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value: float) -> str:
+    """Formats a sample value."""
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def to_prometheus(registry: Registry = default_registry) -> str:
+    """Returns every metric in the Prometheus text exposition format."""
+    lines = []
+    described = set()
+    for name, labels, metric in registry.collect():
+        if name not in described:
+            described.add(name)
+            if name in registry.help:
+                lines.append(f"# HELP {name} {registry.help[name]}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+
+        if isinstance(metric, Histogram):
+            cumulative = 0
+            bounds = list(metric.buckets) + [float('inf')]
+            for bound, bucket_count in zip(bounds, metric.bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(labels, le=_number(float(bound)))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(metric.sum)}")
+            lines.append(f"{name}_count{_labels(labels)} {metric.count}")
+        else:
+            lines.append(f"{name}{_labels(labels)} {_number(metric.value)}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def write_prometheus(path: str, registry: Registry = default_registry) -> None:
+    """
+    Writes the metrics to a file, e.g. for the node exporter textfile collector.
+    The file is replaced atomically so scrapers never see a partial write.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(to_prometheus(registry))
+    os.replace(temp_path, path)
@@ -0,0 +1,213 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from functools import wraps
+
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    """A value that only goes up, e.g. the number of bytes written."""
+
+    kind = 'counter'
+
+    def __init__(self) -> None:
+        """Initializes the counter at zero."""
+        self.value: float = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        """Increases the counter."""
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """A value that can go up and down, e.g. the size of a file."""
+
+    kind = 'gauge'
+
+    def __init__(self) -> None:
+        """Initializes the gauge at zero."""
+        self.value: float = 0
+
+    def set(self, value: float) -> None:
+        """Sets the gauge."""
+        self.value = value
+
+
+class Histogram:
+    """
+    Distribution of observed values, e.g. latencies.
+
+    Keeps cumulative bucket counts for export, plus the most recent samples
+    so percentiles reflect current behaviour rather than the whole run.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS, recent: int = 2048) -> None:
+        """
+        Initializes an empty histogram.
+
+        Args:
+            buckets: Sorted upper bounds of the buckets.
+            recent: Number of recent samples kept for percentiles.
+        """
+        self.buckets: tuple = buckets
+        self.bucket_counts: list[int] = [0] * (len(buckets) + 1)    # last one is +Inf
+        self.count: int = 0
+        self.sum: float = 0.0
+        self.recent: deque = deque(maxlen=recent)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Records one value."""
+        with self._lock:
+            self.bucket_counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.recent.append(value)
+
+    def percentile(self, q: float) -> float | None:
+        """Returns the q-th percentile (0-100) of the recent samples, or None."""
+        with self._lock:
+            samples = sorted(self.recent)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * q / 100))]
+
+    def max(self) -> float | None:
+        """Returns the largest recent sample, or None."""
+        with self._lock:
+            return max(self.recent, default=None)
+
+
+class Registry:
+    """
+    Named, labelled metrics of one process.
+
+    Metrics are created on first use. While the registry is disabled, the
+    recording helpers return immediately, so instrumentation left in hot
+    paths costs a single attribute check.
+    """
+
+    def __init__(self) -> None:
+        """Initializes an empty, disabled registry."""
+        self.enabled: bool = False
+        self.help: dict[str, str] = {}
+        self._metrics: dict[tuple[str, tuple], object] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind, name: str, labels: dict):
+        """Returns the metric with this name and labels, creating it if needed."""
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(key, kind())
+        if not isinstance(metric, kind):
+            raise TypeError(f"Metric {name} is a {metric.kind}, not a {kind.kind}!")
+        return metric
+
+    def counter(self, name: str, **labels) -> Counter:
+        """Returns a counter."""
+        return self._get(Counter, name, labels)
+
+    def gauge(self, name: str, **labels) -> Gauge:
+        """Returns a gauge."""
+        return self._get(Gauge, name, labels)
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        """Returns a histogram."""
+        return self._get(Histogram, name, labels)
+
+    def describe(self, name: str, text: str) -> None:
+        """Sets the help text exported with a metric."""
+        self.help[name] = text
+
+    def collect(self) -> list[tuple[str, dict, object]]:
+        """Returns (name, labels, metric) for every metric, sorted by name."""
+        with self._lock:
+            items = list(self._metrics.items())
+        return [(name, dict(labels), metric) for (name, labels), metric in sorted(
+            items, key=lambda item: item[0])]
+
+    def reset(self) -> None:
+        """Drops every recorded metric."""
+        with self._lock:
+            self._metrics = {}
+
+
+# The process-wide registry used by the instrumentation helpers
+registry = Registry()
+registry.describe('hospital_operation_seconds', "Latency of storage operations.")
+registry.describe('hospital_operation_errors_total', "Storage operations that raised an error.")
+registry.describe('hospital_bytes_written_total', "Bytes written to the snapshot and journal files.")
+registry.describe('hospital_snapshot_bytes', "Size of the last snapshot written.")
+registry.describe('hospital_journal_records_total', "Records appended to the change journal.")
+registry.describe('hospital_journal_torn_tails_total', "Torn last journal lines cut off before appending.")
+registry.describe('hospital_journal_pending_records', "Journal records not yet folded into a snapshot.")
+registry.describe('hospital_blob_bytes_written_total', "Bytes appended to the medical record blob store.")
+registry.describe('hospital_blob_cache_total', "Medical record reads served from the cache (hit) or the blob file (miss).")
+registry.describe('hospital_render_cache_total', "Blob-backed record views served from the render cache (hit) or formatted (miss).")
+
+
+def enable() -> None:
+    """Starts recording metrics."""
+    registry.enabled = True
+
+
+def disable() -> None:
+    """Stops recording metrics; instrumented code runs at full speed."""
+    registry.enabled = False
+
+
+def count(name: str, amount: float = 1, **labels) -> None:
+    """Increases a counter if metrics are enabled."""
+    if registry.enabled:
+        registry.counter(name, **labels).inc(amount)
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    """Sets a gauge if metrics are enabled."""
+    if registry.enabled:
+        registry.gauge(name, **labels).set(value)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """Records a histogram value if metrics are enabled."""
+    if registry.enabled:
+        registry.histogram(name, **labels).observe(value)
+
+
+def timed(operation: str, name: str = 'hospital_operation_seconds'):
+    """
+    Decorator recording the duration of every call in a latency histogram,
+    labelled with the operation. Calls that raise are counted in
+    hospital_operation_errors_total instead.
+    """
+    key = (name, (('operation', operation),))
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            except Exception:
+                registry.counter('hospital_operation_errors_total', operation=operation).inc()
+                raise
+            elapsed = time.perf_counter() - start
+            # Skip the label handling once the histogram exists
+            histogram = registry._metrics.get(key) or registry.histogram(name, operation=operation)
+            histogram.observe(elapsed)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,13 @@
+"""
+Runs the multithreaded stress test (tools/stress_concurrency.py) with a
+bounded number of threads and changes, so it fits in the test suite.
+"""
+from tools.stress_concurrency import run
+
+
+def test_concurrent_changes_stay_consistent():
+    result = run(writers=3, readers=3, operations=1000)
+    assert result['problems'] == []
+    assert result['kept'] == result['in_hospital']
+    # The readers really ran alongside the writers
+    assert sum(result['counts'].values()) > 0
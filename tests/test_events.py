@@ -0,0 +1,68 @@
+"""
+Checks that change subscribers run outside the department locks, so they
+can read and change the hospital, and still see every change in order.
+"""
+import threading
+
+import pytest
+
+from model import Department, Hospital, Patient, Staff
+
+
+@pytest.fixture
+def hospital() -> Hospital:
+    """A hospital with two empty departments."""
+    hospital = Hospital("General", "Cairo")
+    for name in ("Cardiology", "Neurology"):
+        hospital.add_department(Department(name))
+    return hospital
+
+
+def run_with_timeout(target, timeout: float = 5.0) -> None:
+    """Runs target on a thread and fails if it does not finish in time."""
+    errors = []
+
+    def run():
+        try:
+            target()
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "deadlocked"
+    if errors:
+        raise errors[0]
+
+
+def test_subscriber_reads_the_hospital(hospital):
+    seen = []
+    hospital.subscribe(lambda event: seen.append(
+        (event.op, sum(len(patients) for _, patients, _ in hospital.snapshot()))))
+    cardiology, neurology = hospital.departments
+
+    def change():
+        patient = Patient("Ali", 40, "Flu")
+        cardiology.add_patient(patient, quiet=True)
+        hospital.transfer_patient(patient, neurology)
+        neurology.remove_patient(patient)
+
+    run_with_timeout(change)
+    assert seen == [('add_patient', 1), ('delete_patient', 1), ('add_patient', 1),
+                    ('delete_patient', 0)]
+
+
+def test_subscriber_changes_are_delivered_in_order(hospital):
+    seen = []
+    cardiology = hospital.departments[0]
+
+    def on_change(event):
+        seen.append(event.seq)
+        if event.op == 'add_patient':
+            cardiology.add_staff_member(Staff("Mona", 35, "Nurse"), quiet=True)
+
+    hospital.subscribe(on_change)
+    run_with_timeout(lambda: cardiology.add_patient(Patient("Ali", 40, "Flu"), quiet=True))
+    assert seen == sorted(seen) and len(seen) == 2
+    assert len(cardiology.staff) == 1
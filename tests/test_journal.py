@@ -0,0 +1,75 @@
+"""
+Checks that a journal torn by a crash mid-write keeps every confirmed
+change, and that corruption elsewhere is reported instead of hidden.
+"""
+import os
+
+import pytest
+
+from model import Department, Patient
+from storage import JsonStorage
+
+
+def open_storage(tmp_path) -> JsonStorage:
+    """Journaled JSON storage in the test's directory."""
+    path = str(tmp_path / "hospital.json")
+    return JsonStorage(path, path + ".journal")
+
+
+def make_hospital(tmp_path, patients: int):
+    """Journals a department and some patients, then closes the storage."""
+    storage = open_storage(tmp_path)
+    hospital = storage.create("General", "Cairo")
+    storage.add_department(hospital, Department("Cardiology"))
+    for i in range(patients):
+        storage.add_patient(hospital, hospital.departments[0],
+                            Patient(f"Patient {i}", 30 + i, "notes"), quiet=True)
+    storage.close()
+    return storage.journal.path
+
+
+def reload(tmp_path):
+    """Loads the hospital back from the journal alone."""
+    storage = open_storage(tmp_path)
+    return storage, storage.create("General", "Cairo")
+
+
+def test_append_after_torn_tail_survives_reload(tmp_path):
+    journal = make_hospital(tmp_path, 3)
+    with open(journal, 'ab') as f:
+        f.write(b'{"seq": 5, "op": "add_patient", "depart')    # crash mid-write
+
+    storage, hospital = reload(tmp_path)
+    assert len(hospital.records) == 3
+    patient = Patient("After the crash", 50, "notes")
+    storage.add_patient(hospital, hospital.departments[0], patient, quiet=True)
+    storage.close()
+
+    storage, reloaded = reload(tmp_path)
+    storage.close()
+    assert reloaded.get_record(patient.record_id)[1].name == "After the crash"
+    assert sorted(reloaded.records) == sorted(hospital.records)
+    assert reloaded.next_id == hospital.next_id
+
+
+def test_torn_multibyte_character_is_skipped(tmp_path):
+    journal = make_hospital(tmp_path, 2)
+    with open(journal, 'ab') as f:
+        f.write('{"seq": 4, "name": "Yousé'.encode('utf-8')[:-1])
+
+    storage, hospital = reload(tmp_path)
+    storage.close()
+    assert len(hospital.records) == 2
+
+
+def test_corrupt_line_in_the_middle_raises(tmp_path):
+    journal = make_hospital(tmp_path, 3)
+    with open(journal, 'rb') as f:
+        lines = f.readlines()
+    lines[1] = lines[1][:10] + b"\n"
+    with open(journal, 'wb') as f:
+        f.writelines(lines)
+
+    with pytest.raises(ValueError, match="corrupt at line 2"):
+        reload(tmp_path)
+    assert os.path.getsize(journal) == sum(map(len, lines))
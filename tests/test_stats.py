@@ -0,0 +1,88 @@
+"""
+Checks that the incrementally maintained statistics always equal a full
+recount while a hospital is changed.
+"""
+import random
+
+import pytest
+
+from model import Department, Hospital, Patient, Staff, Statistics, verify_statistics
+
+POSITIONS = ["Cardiologist", "Nurse", "Surgeon", "Pediatrician"]
+
+
+def recount_dict(patients, staff) -> dict:
+    """Returns what Statistics.as_dict() should hold for these records."""
+    return Statistics.recount(patients, staff).as_dict()
+
+
+def assert_matches_recount(hospital: Hospital) -> None:
+    """Compares every department's and the hospital's aggregates with a recount."""
+    assert verify_statistics(hospital) == []
+    for dept in hospital.departments:
+        assert dept.stats.as_dict() == recount_dict(dept.patients, dept.staff)
+    expected = recount_dict([p for dept in hospital.departments for p in dept.patients],
+                            [s for dept in hospital.departments for s in dept.staff])
+    summary = hospital.statistics()
+    assert {key: summary[key] for key in expected} == expected
+
+
+@pytest.fixture
+def hospital() -> Hospital:
+    """A hospital with three empty departments."""
+    hospital = Hospital("General", "Cairo")
+    for name in ("Cardiology", "Neurology", "Pediatrics"):
+        hospital.add_department(Department(name))
+    return hospital
+
+
+def test_empty_hospital(hospital):
+    assert_matches_recount(hospital)
+    assert hospital.stats.mean_age() is None
+    assert hospital.stats.median_age() is None
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_random_changes_match_recount(hospital, seed):
+    rng = random.Random(seed)
+    for step in range(600):
+        dept = rng.choice(hospital.departments)
+        action = rng.random()
+        if action < 0.4:
+            dept.add_patient(Patient(f"Patient {step}", rng.randrange(0, 100), "notes"),
+                             quiet=True)
+        elif action < 0.6:
+            dept.add_staff_member(Staff(f"Staff {step}", rng.randrange(20, 70),
+                                        rng.choice(POSITIONS)), quiet=True)
+        elif action < 0.75 and len(dept.patients):
+            dept.remove_patient(rng.choice(list(dept.patients)))
+        elif action < 0.85 and len(dept.staff):
+            dept.remove_staff_member(rng.choice(list(dept.staff)))
+        elif len(dept.patients):
+            target = rng.choice([d for d in hospital.departments if d is not dept])
+            hospital.transfer_patient(rng.choice(list(dept.patients)), target)
+        if step % 50 == 0:
+            assert_matches_recount(hospital)
+    assert_matches_recount(hospital)
+
+
+def test_removing_everything_clears_aggregates(hospital):
+    dept = hospital.departments[0]
+    patients = [Patient(f"Patient {i}", age, "notes") for i, age in enumerate([30, 30, 41, 7])]
+    staff = [Staff(f"Staff {i}", 40, position) for i, position in enumerate(POSITIONS)]
+    for patient in patients:
+        dept.add_patient(patient, quiet=True)
+    for member in staff:
+        dept.add_staff_member(member, quiet=True)
+    assert dept.stats.median_age() == 30
+    assert dept.stats.age_histogram() == {'0-9': 1, '30-39': 2, '40-49': 1}
+    assert_matches_recount(hospital)
+
+    for patient in patients:
+        dept.remove_patient(patient)
+    for member in staff:
+        dept.remove_staff_member(member)
+    assert dept.stats.age_counts == {}
+    assert dept.stats.positions == {}
+    assert dept.stats.matches(Statistics())
+    assert_matches_recount(hospital)
@@ -0,0 +1,151 @@
+"""
+Benchmark suite for the hospital system.
+
+Generates a reproducible data file, then times loading, saving, search,
+delete, statistics and SystemManager listings through the JSON storage.
+Results are printed as a table and compared against the stored baseline
+(tools/benchmark_baseline.json) so regressions are visible.
+
+Usage:
+    python tools/benchmark.py [--departments 8] [--patients 25000] [--repeat 5]
+                              [--threshold 1.5] [--save-baseline] [--check]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import SystemManager  # noqa: E402
+from storage import JsonStorage  # noqa: E402
+from generate_data import generate  # noqa: E402
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+
+class NullOutput:
+    """Discards listing output."""
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def measure(function, repeat: int) -> float:
+    """Returns the median seconds of `repeat` calls."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def run(directory: str, departments: int, patients: int, repeat: int) -> tuple[int, dict]:
+    """
+    Runs every benchmark on a freshly generated data file.
+
+    Returns:
+        (number of records, {benchmark name: seconds})
+    """
+    path = os.path.join(directory, "hospital.json")
+    records = generate(path, departments, patients)
+    storage = JsonStorage(path, os.path.join(directory, "hospital.journal"))
+    results = {}
+    out = NullOutput()
+
+    results['load_data'] = measure(storage.load, repeat)
+    hospital = storage.load()
+    manager = SystemManager(hospital)
+    results['save_data'] = measure(lambda: storage.save(hospital), repeat)
+
+    queries = ["layla ali", "mostafa", "ahmed hassan", "nour z"]
+    results['search'] = measure(
+        lambda: [storage.search_patients(hospital, query) for query in queries], repeat) / len(queries)
+    results['search_short'] = measure(lambda: storage.search_patients(hospital, "ra"), repeat)
+
+    victims = [patient for dept in hospital.departments
+               for patient in list(dept.patients)[:100 // departments + 1]][:100]
+    start = time.perf_counter()
+    for patient in victims:
+        found = hospital.get_record(patient.record_id)
+        storage.delete_patient(hospital, found[0], patient)
+    results['delete'] = (time.perf_counter() - start) / len(victims)
+
+    results['statistics'] = measure(manager.get_statistics, repeat)
+    middle = manager.count_patients() // 2
+    results['list_page'] = measure(
+        lambda: manager.display_all_patients(offset=middle, limit=20, out=out), repeat)
+    results['list_sorted_page'] = measure(
+        lambda: manager.display_all_patients(sort_by='name', limit=20, out=out), repeat)
+    results['list_all'] = measure(lambda: manager.display_all_patients(out=out), repeat)
+    storage.close()
+    return records, results
+
+
+def format_seconds(seconds: float) -> str:
+    """Formats a duration with a readable unit."""
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--departments', type=int, default=8)
+    parser.add_argument('--patients', type=int, default=25000, help="Patients per department")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per benchmark (median)")
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help="Slowdown against the baseline reported as a regression")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Store these results as the new baseline")
+    parser.add_argument('--check', action='store_true',
+                        help="Exit with status 1 if any benchmark regressed")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        records, results = run(tmp, args.departments, args.patients, args.repeat)
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+        if stored.get('records') == records:
+            baseline = stored['results']
+        else:
+            print(f" Baseline was recorded with {stored.get('records'):,} records; not comparing.")
+
+    print(f"\n Benchmarks over {records:,} records (median of {args.repeat})\n")
+    print(f" {'benchmark':<18}{'time':>12}{'baseline':>12}{'change':>10}")
+    regressions = []
+    for name, seconds in results.items():
+        line = f" {name:<18}{format_seconds(seconds):>12}"
+        if name in baseline:
+            ratio = seconds / baseline[name]
+            line += f"{format_seconds(baseline[name]):>12}{ratio:>9.2f}x"
+            if ratio > args.threshold:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'records': records,
+                       'results': {name: round(seconds, 7) for name, seconds in results.items()}},
+                      f, indent=4)
+            f.write("\n")
+        print(f"\n Baseline saved to {BASELINE_FILE}")
+    if regressions:
+        print(f"\n {len(regressions)} regression(s): {', '.join(regressions)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
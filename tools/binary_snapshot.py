@@ -0,0 +1,130 @@
+"""
+Converts between JSON and binary snapshots and compares their startup time.
+
+Usage:
+    python tools/binary_snapshot.py [--blobs BLOB_FILE] to-binary JSON_FILE BINARY_FILE
+    python tools/binary_snapshot.py [--blobs BLOB_FILE] to-json BINARY_FILE JSON_FILE
+    python tools/binary_snapshot.py [--blobs BLOB_FILE] verify JSON_FILE
+    python tools/binary_snapshot.py compare JSON_FILE
+
+`verify` converts to binary and back and checks that the JSON data is
+unchanged. `compare` times a full JSON load against opening the binary
+snapshot, reading one record of every department and a full binary load.
+Pass --blobs when the JSON
+file keeps its medical records in a blob store (HOSPITAL_BLOBS=1); binary
+snapshots always hold them inline. Generate a large file first with tools/generate_data.py, e.g.
+`--departments 10 --patients 455000` for ~5M records.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import (BinarySnapshot, BlobStore, StreamingLoader, peak_rss_kb,  # noqa: E402
+                     write_binary_snapshot, write_json_snapshot)
+
+
+def to_binary(json_path: str, binary_path: str, blobs=None) -> None:
+    """Converts a JSON snapshot to a binary snapshot."""
+    loader = StreamingLoader(json_path, blobs=blobs)
+    hospital = loader.load()
+    write_binary_snapshot(hospital, binary_path, loader.extra.get('journal_seq', 0))
+
+
+def to_json(binary_path: str, json_path: str, blobs=None) -> None:
+    """Converts a binary snapshot to a JSON snapshot."""
+    with BinarySnapshot(binary_path) as snapshot:
+        hospital = snapshot.to_hospital()
+        journal_seq = snapshot.journal_seq
+    write_json_snapshot(hospital, json_path, journal_seq, blobs)
+
+
+def verify(json_path: str, blobs=None) -> bool:
+    """Returns True if JSON -> binary -> JSON leaves the data unchanged."""
+    with tempfile.TemporaryDirectory() as tmp:
+        binary_path = os.path.join(tmp, "snapshot.bin")
+        round_trip = os.path.join(tmp, "snapshot.json")
+        to_binary(json_path, binary_path, blobs)
+        to_json(binary_path, round_trip, blobs)
+        with open(json_path, 'r', encoding='utf-8') as f:
+            original = json.load(f)
+        with open(round_trip, 'r', encoding='utf-8') as f:
+            converted = json.load(f)
+    return original == converted
+
+
+def timed(function):
+    """Returns (result, seconds) of one call."""
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def compare(json_path: str) -> None:
+    """Prints startup times of the JSON and binary snapshots."""
+    with tempfile.TemporaryDirectory() as tmp:
+        binary_path = os.path.join(tmp, "snapshot.bin")
+        _, convert = timed(lambda: to_binary(json_path, binary_path))
+        print(f" JSON:   {os.path.getsize(json_path) / 2 ** 20:,.1f} MiB")
+        print(f" Binary: {os.path.getsize(binary_path) / 2 ** 20:,.1f} MiB "
+              f"(converted in {convert:.1f}s)\n")
+
+        hospital, json_load = timed(lambda: StreamingLoader(json_path).load())
+        records = hospital.stats.patient_count + hospital.stats.staff_count
+        del hospital
+
+        snapshot, binary_open = timed(lambda: BinarySnapshot(binary_path))
+        _, first_access = timed(lambda: [view.patient(0) for view in snapshot.departments
+                                         if view.patient_count])
+        _, binary_load = timed(snapshot.to_hospital)
+        snapshot.close()
+
+    print(f" Startup over {records:,} records")
+    print(f"   JSON full load:               {json_load:10.3f} s")
+    print(f"   Binary open (header only):    {binary_open * 1000:10.3f} ms")
+    print(f"   Binary first record per dept: {first_access * 1000:10.3f} ms")
+    print(f"   Binary full load:             {binary_load:10.3f} s")
+    peak = peak_rss_kb()
+    if peak:
+        print(f"\n Peak memory: {peak // 1024} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip(),
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blobs', help="Blob store holding the JSON file's medical records")
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('to-binary', help="Convert a JSON snapshot to binary")
+    command.add_argument('source')
+    command.add_argument('target')
+    command = commands.add_parser('to-json', help="Convert a binary snapshot to JSON")
+    command.add_argument('source')
+    command.add_argument('target')
+    command = commands.add_parser('verify', help="Check an exact JSON -> binary -> JSON round trip")
+    command.add_argument('source')
+    command = commands.add_parser('compare', help="Compare JSON and binary startup time")
+    command.add_argument('source')
+    args = parser.parse_args()
+    blobs = BlobStore(args.blobs) if args.blobs else None
+
+    if args.command == 'to-binary':
+        to_binary(args.source, args.target, blobs)
+        print(f" Wrote {args.target}")
+    elif args.command == 'to-json':
+        to_json(args.source, args.target, blobs)
+        print(f" Wrote {args.target}")
+    elif args.command == 'verify':
+        if not verify(args.source, blobs):
+            print(" Round trip changed the data!")
+            sys.exit(1)
+        print(" Round trip is exact.")
+    else:
+        compare(args.source)
+
+
+if __name__ == '__main__':
+    main()
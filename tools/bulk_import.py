@@ -0,0 +1,44 @@
+"""
+Non-interactive bulk import of a nightly admission feed.
+
+Usage:
+    python tools/bulk_import.py FEED [--format csv|jsonl] [--create-departments]
+                                     [--batch-size N] [--rejects rejects.csv]
+
+Uses the same storage backend as the CLI (HOSPITAL_STORAGE).
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as app  # noqa: E402
+from core import BulkImporter, write_rejects  # noqa: E402
+
+
+def main():
+    """Imports the feed and prints the report."""
+    parser = argparse.ArgumentParser(description="Bulk import patients and staff.")
+    parser.add_argument("feed", help="CSV or JSONL file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="defaults to the file extension")
+    parser.add_argument("--create-departments", action="store_true",
+                        help="create unknown departments instead of rejecting their rows")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--rejects", help="write rejected rows to this CSV file")
+    args = parser.parse_args()
+
+    hospital = app.load_data()
+    importer = BulkImporter(hospital, app.storage, batch_size=args.batch_size,
+                            create_departments=args.create_departments)
+    report = importer.import_file(args.feed, args.format)
+    app.storage.close()
+
+    print(f" {report.summary()}")
+    if args.rejects and report.rejected:
+        write_rejects(report, args.rejects)
+        print(f" Rejected rows written to {args.rejects}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Cold-start benchmark for the non-interactive CLI subcommands.
+
+Every run is a fresh `python main.py COMMAND` process, so the times include
+interpreter startup, imports and opening the data files, the way a script
+or cron job sees them. The data file (about 1M records by default) is
+generated once and indexed with `main.py reindex`; results are compared
+against the stored baseline (tools/cold_start_baseline.json) so regressions
+are visible.
+
+Usage:
+    python tools/cold_start.py [--departments 20] [--patients 45455] [--repeat 5]
+                               [--data-dir DIR] [--full-load] [--threshold 1.5]
+                               [--save-baseline] [--check]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from storage import LookupIndex  # noqa: E402
+from benchmark import format_seconds, measure  # noqa: E402
+from generate_data import generate  # noqa: E402
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cold_start_baseline.json")
+
+
+def run_cli(directory: str, *args: str) -> str:
+    """Runs one main.py subcommand on the data in `directory` and returns its output."""
+    env = dict(os.environ, HOSPITAL_DATA_DIR=directory, HOSPITAL_STORAGE="json",
+               HOSPITAL_METRICS="0")
+    result = subprocess.run([sys.executable, os.path.join(ROOT, "main.py"), *args], env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+    return result.stdout.decode('utf-8')
+
+
+def run(directory: str, departments: int, patients: int, repeat: int,
+        full_load: bool) -> tuple[int, dict]:
+    """
+    Times every subcommand on the data in `directory`, generating and
+    indexing it first if needed.
+
+    Returns:
+        (number of records, {benchmark name: seconds})
+    """
+    results = {}
+    data_file = os.path.join(directory, "hospital_data.json")
+    lookup_file = os.path.join(directory, "hospital_data.lookup")
+    if not os.path.exists(data_file):
+        print(" Generating the data file...")
+        generate(data_file, departments, patients)
+
+    try:
+        LookupIndex(lookup_file, data_file).close()
+    except (OSError, ValueError):
+        print(" Writing the sidecar index...")
+        start = time.perf_counter()
+        run_cli(directory, "reindex")
+        results['reindex'] = time.perf_counter() - start
+    stats = json.loads(run_cli(directory, "stats"))
+    records = stats['patients'] + stats['staff']
+    middle = records // 2
+
+    benchmarks = {
+        'startup': ("--help",),
+        'get': ("get", str(middle)),
+        'search': ("search-patient", "layla ali", "--limit", "10"),
+        'search_all': ("search-patient", "layla ali"),
+        'search_staff': ("search-staff", "nour"),
+        'stats': ("stats",),
+    }
+    for name, args in benchmarks.items():
+        results[name] = measure(lambda: run_cli(directory, *args), repeat)
+
+    if full_load:
+        # The same lookup without the sidecar index loads the whole hospital
+        os.rename(lookup_file, lookup_file + ".off")
+        try:
+            results['get_full_load'] = measure(lambda: run_cli(directory, "get", str(middle)), 1)
+        finally:
+            os.rename(lookup_file + ".off", lookup_file)
+    return records, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--departments', type=int, default=20)
+    parser.add_argument('--patients', type=int, default=45455, help="Patients per department")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per benchmark (median)")
+    parser.add_argument('--data-dir', help="Keep the generated data here and reuse it on later runs")
+    parser.add_argument('--full-load', action='store_true',
+                        help="Also time one lookup without the sidecar index (slow)")
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help="Slowdown against the baseline reported as a regression")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Store these results as the new baseline")
+    parser.add_argument('--check', action='store_true',
+                        help="Exit with status 1 if any benchmark regressed")
+    args = parser.parse_args()
+
+    if args.data_dir:
+        os.makedirs(args.data_dir, exist_ok=True)
+        records, results = run(args.data_dir, args.departments, args.patients, args.repeat,
+                               args.full_load)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            records, results = run(tmp, args.departments, args.patients, args.repeat,
+                                   args.full_load)
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+        if stored.get('records') == records:
+            baseline = stored['results']
+        else:
+            print(f" Baseline was recorded with {stored.get('records'):,} records; not comparing.")
+
+    print(f"\n Cold start over {records:,} records (median of {args.repeat} processes)\n")
+    print(f" {'benchmark':<18}{'time':>12}{'baseline':>12}{'change':>10}")
+    regressions = []
+    for name, seconds in results.items():
+        line = f" {name:<18}{format_seconds(seconds):>12}"
+        if name in baseline:
+            ratio = seconds / baseline[name]
+            line += f"{format_seconds(baseline[name]):>12}{ratio:>9.2f}x"
+            # One-off steps are shown for reference only
+            if ratio > args.threshold and name not in ('reindex', 'get_full_load'):
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'records': records,
+                       'results': {name: round(seconds, 7) for name, seconds in results.items()}},
+                      f, indent=4)
+            f.write("\n")
+        print(f"\n Baseline saved to {BASELINE_FILE}")
+    if regressions:
+        print(f"\n {len(regressions)} regression(s): {', '.join(regressions)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Scaling benchmark for the federated multi-hospital manager.
+
+Writes a synthetic network of hospitals, one JSON data file each, then
+loads it, searches it and aggregates statistics with an increasing number
+of worker processes and reports the speedup over a single worker.
+
+Usage:
+    python tools/federation_benchmark.py [--hospitals 50] [--patients 10000]
+                                         [--workers 1 2 4 8] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.federation import FederatedManager, journal_path  # noqa: E402
+from model import Department, Hospital, Patient, Staff  # noqa: E402
+from storage import JsonStorage  # noqa: E402
+
+FIRST_NAMES = ["Ahmed", "Sara", "Mohamed", "Layla", "Omar", "Youssef", "Mariam", "Karim", "Hoda"]
+LAST_NAMES = ["Ali", "Hassan", "Khaled", "Tarek", "Nasser", "Samir", "Mostafa", "Ahmed"]
+SPECIALTIES = ["Cardiology", "Neurology", "Pediatrics", "Emergency", "Oncology", "Orthopedics"]
+POSITIONS = ["Doctor", "Nurse", "Surgeon", "Technician"]
+
+
+def write_network(directory: str, hospitals: int, patients: int) -> list[str]:
+    """Writes the synthetic hospitals and returns their data file paths."""
+    paths = []
+    for number in range(hospitals):
+        rng = random.Random(number)
+        hospital = Hospital(f"Hospital {number}", f"City {number % 7}")
+        for name in rng.sample(SPECIALTIES, 4):
+            hospital.add_department(Department(name))
+        for i in range(patients):
+            dept = hospital.departments[i % len(hospital.departments)]
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {number}-{i}"
+            dept.add_patient(Patient(name, rng.randint(0, 95), "Routine checkup"), quiet=True)
+            if i % 20 == 0:
+                dept.add_staff_member(Staff(f"Staff {number}-{i}", rng.randint(22, 65),
+                                            rng.choice(POSITIONS)), quiet=True)
+
+        path = os.path.join(directory, f"hospital_{number:03}.json")
+        storage = JsonStorage(path, journal_path(path))
+        storage.save(hospital)
+        storage.close()
+        paths.append(path)
+    return paths
+
+
+def timed(function, repeat: int = 1) -> float:
+    """Returns the mean seconds per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hospitals', type=int, default=50, help="Number of shards")
+    parser.add_argument('--patients', type=int, default=10000, help="Patients per hospital")
+    parser.add_argument('--workers', type=int, nargs='+',
+                        help="Worker counts to compare (default: 1, 2, 4, ... up to the CPUs)")
+    parser.add_argument('--repeat', type=int, default=20, help="Queries per measurement")
+    args = parser.parse_args()
+
+    if args.workers is None:
+        cpus = os.cpu_count() or 1
+        args.workers = sorted({1, cpus} | {2 ** i for i in range(1, cpus.bit_length()) if 2 ** i <= cpus})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f" Writing {args.hospitals} hospitals x {args.patients:,} patients...")
+        start = time.perf_counter()
+        paths = write_network(tmp, args.hospitals, args.patients)
+        print(f" Written in {time.perf_counter() - start:.1f}s ({os.cpu_count()} CPUs)\n")
+
+        print(f" {'workers':>7}  {'load':>8}  {'search':>8}  {'stats':>8}  {'speedup':>7}")
+        baseline = None
+        for workers in args.workers:
+            with FederatedManager(paths, workers) as manager:
+                load = timed(manager.load)
+                search = timed(lambda: manager.search_patients("layla ali"), args.repeat)
+                stats = timed(manager.get_statistics, args.repeat)
+            total = load + search + stats
+            baseline = baseline or total
+            print(f" {workers:>7}  {load:>7.2f}s  {search * 1000:>6.1f}ms  "
+                  f"{stats * 1000:>6.1f}ms  {baseline / total:>6.2f}x")
+
+
+if __name__ == '__main__':
+    main()
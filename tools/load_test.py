@@ -0,0 +1,148 @@
+"""
+Load test for the HTTP/JSON API.
+
+Drives the server with concurrent keep-alive clients and reports p50/p99
+latency and requests/second. Without --port it starts an in-process server
+on a synthetic hospital stored in a temporary directory.
+
+Usage:
+    python tools/load_test.py [--clients 50] [--requests 200] [--write-ratio 0.1]
+                              [--patients 100000] [--host H --port P]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import ApiServer, SystemManager  # noqa: E402
+from model import Department, Hospital, Patient, Staff  # noqa: E402
+from storage import JsonStorage  # noqa: E402
+
+FIRST_NAMES = ["Ahmed", "Sara", "Mohamed", "Layla", "Omar", "Youssef", "Mariam", "Karim", "Hoda"]
+LAST_NAMES = ["Ali", "Hassan", "Khaled", "Tarek", "Nasser", "Samir", "Mostafa", "Ahmed"]
+DEPARTMENTS = ["Cardiology", "Neurology", "Pediatrics", "Emergency"]
+
+
+def build_hospital(patients: int) -> Hospital:
+    """Creates a synthetic hospital with the given number of patients."""
+    rng = random.Random(42)
+    hospital = Hospital("Load Test Hospital", "Cairo, Egypt")
+    for name in DEPARTMENTS:
+        hospital.add_department(Department(name))
+    for i in range(patients):
+        dept = hospital.departments[i % len(DEPARTMENTS)]
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+        dept.add_patient(Patient(name, rng.randint(0, 95), "Routine checkup"), quiet=True)
+        if i % 20 == 0:
+            dept.add_staff_member(Staff(f"Staff {i}", rng.randint(22, 65), "Nurse"), quiet=True)
+    return hospital
+
+
+async def request(reader, writer, method: str, path: str, body: dict | None = None):
+    """Sends one keep-alive request and returns (status, payload)."""
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: load-test\r\n"
+                 f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode('latin-1').split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    length = 0
+    for line in lines[1:]:
+        if line.lower().startswith("content-length:"):
+            length = int(line.split(":", 1)[1])
+    payload = json.loads(await reader.readexactly(length)) if length else None
+    return status, payload
+
+
+async def client(host: str, port: int, count: int, write_ratio: float, seed: int,
+                 latencies: list, errors: list) -> None:
+    """Runs one client issuing a mix of reads and writes."""
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    created = []
+    try:
+        for _ in range(count):
+            if rng.random() < write_ratio:
+                if created and rng.random() < 0.5:
+                    method, path, body = "DELETE", f"/patients/{created.pop()}", None
+                else:
+                    method, path, body = "POST", "/patients", {
+                        'department': rng.choice(DEPARTMENTS), 'name': f"Load Client {seed}",
+                        'age': rng.randint(0, 95), 'medical_record': "Load test"}
+            else:
+                method, body = "GET", None
+                path = rng.choice([
+                    f"/patients/search?q={rng.choice(FIRST_NAMES).lower()}%20{rng.choice(LAST_NAMES).lower()}%201",
+                    f"/patients?offset={rng.randint(0, 1000)}&limit=20",
+                    "/statistics",
+                    "/departments",
+                ])
+            start = time.perf_counter()
+            status, payload = await request(reader, writer, method, path, body)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append((method, path, status))
+            elif method == "POST":
+                created.append(payload['id'])
+    finally:
+        writer.close()
+
+
+def percentile(values: list, pct: float) -> float:
+    """Returns the given percentile of a list of values."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(args) -> None:
+    """Runs the load test and prints the report."""
+    server = None
+    host, port = args.host, args.port
+    if port is None:
+        tmp = tempfile.mkdtemp()
+        storage = JsonStorage(os.path.join(tmp, "data.json"), os.path.join(tmp, "data.journal"))
+        hospital = build_hospital(args.patients)
+        storage.save(hospital)
+        server = ApiServer(SystemManager(hospital), storage)
+        await server.start(host, 0)
+        port = server.port
+        print(f" In-process server with {args.patients} patients on port {port}")
+
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, args.requests, args.write_ratio, i, latencies, errors)
+                           for i in range(args.clients)))
+    elapsed = time.perf_counter() - start
+
+    if server is not None:
+        server.server.close()
+        await server.server.wait_closed()
+
+    print(f" {len(latencies)} requests from {args.clients} clients in {elapsed:.2f}s")
+    print(f" Throughput: {len(latencies) / elapsed:,.0f} requests/s")
+    print(f" Latency p50: {percentile(latencies, 50) * 1000:.2f} ms, "
+          f"p99: {percentile(latencies, 99) * 1000:.2f} ms")
+    print(f" Errors: {len(errors)}")
+
+
+def main():
+    """Parses arguments and runs the load test."""
+    parser = argparse.ArgumentParser(description="Load test the hospital HTTP API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="test a running server instead")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--patients", type=int, default=100000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
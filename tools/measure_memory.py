@@ -0,0 +1,78 @@
+"""
+Measures the memory cost per record of the model classes.
+
+Compares the current (slotted, interned) Patient/Staff classes against the
+original dict-based ones by building N records with freshly allocated strings,
+as a JSON loader would.
+
+Usage:
+    python tools/measure_memory.py [N]
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import Patient, Staff  # noqa: E402
+
+
+class LegacyPerson:
+    """The original Person class, with a per-instance __dict__."""
+    def __init__(self, name: str, age: int) -> None:
+        self.name = name
+        self.age = age
+
+
+class LegacyPatient(LegacyPerson):
+    """The original Patient class."""
+    def __init__(self, name: str, age: int, medical_record: str) -> None:
+        super().__init__(name, age)
+        self.medical_record = medical_record
+
+
+class LegacyStaff(LegacyPerson):
+    """The original Staff class, without position interning."""
+    def __init__(self, name: str, age: int, position: str) -> None:
+        super().__init__(name, age)
+        self.position = position
+
+
+POSITIONS = ["Nurse", "Doctor", "Cardiologist", "Neurologist", "Pediatrician"]
+
+
+def fresh(text: str) -> str:
+    """Returns a new string object equal to text, like json.loads would."""
+    return "".join(list(text))
+
+
+def measure(factory, count: int) -> float:
+    """Returns the bytes allocated per record to build `count` records."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return (after - before) / count
+
+
+def main():
+    """Prints a bytes-per-record comparison table."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    cases = [
+        ("Patient (legacy)", lambda i: LegacyPatient(f"Patient {i}", i % 90, fresh("Stable"))),
+        ("Patient (compact)", lambda i: Patient(f"Patient {i}", i % 90, fresh("Stable"))),
+        ("Staff (legacy)", lambda i: LegacyStaff(f"Staff {i}", i % 60, fresh(POSITIONS[i % 5]))),
+        ("Staff (compact)", lambda i: Staff(f"Staff {i}", i % 60, fresh(POSITIONS[i % 5]))),
+    ]
+
+    print(f"{'Records':<20}{'Count':>12}{'Bytes/record':>16}")
+    print("-" * 48)
+    for label, factory in cases:
+        print(f"{label:<20}{count:>12,}{measure(factory, count):>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
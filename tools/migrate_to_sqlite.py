@@ -0,0 +1,47 @@
+"""
+One-shot migration of the JSON data file (and its journal) to SQLite.
+
+Usage:
+    python tools/migrate_to_sqlite.py [data.json] [data.db]
+
+Afterwards run the CLI with HOSPITAL_STORAGE=sqlite.
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from storage import JsonStorage, SqliteStorage  # noqa: E402
+
+
+def main():
+    """Loads the JSON data and bulk-inserts it into a new SQLite database."""
+    data_dir = os.path.join(ROOT, "data")
+    json_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(data_dir, "hospital_data.json")
+    db_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(data_dir, "hospital_data.db")
+    journal_path = os.path.splitext(json_path)[0] + ".journal"
+
+    start = time.perf_counter()
+    source = JsonStorage(json_path, journal_path)
+    hospital = source.load()
+    source.close()
+
+    target = SqliteStorage(db_path)
+    try:
+        target.import_hospital(hospital)
+    except ValueError as e:
+        print(f" {e}")
+        sys.exit(1)
+    finally:
+        target.close()
+
+    patients = sum(len(dept.patients) for dept in hospital.departments)
+    staff = sum(len(dept.staff) for dept in hospital.departments)
+    print(f" Migrated {len(hospital.departments)} departments, {patients} patients "
+          f"and {staff} staff to {db_path} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
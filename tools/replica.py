@@ -0,0 +1,73 @@
+"""
+Runs a read-only replica that follows a primary's change events.
+
+Start the primary with HOSPITAL_PUBLISH_PORT set (main.py or tools/serve.py),
+then:
+
+    python tools/replica.py --port 9000 [--host 127.0.0.1] [--serve 8081]
+
+The replica copies the primary's current state, then applies every change
+as it happens, and reconnects after interruptions, resuming from the last
+event it applied. Lag is printed periodically; with --serve the replica
+also answers the read-only routes of the HTTP/JSON API.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import telemetry  # noqa: E402
+from core import ApiServer, Replica, ReplicaStorage, SystemManager  # noqa: E402
+
+
+def report(replica: Replica, interval: float, stop: threading.Event) -> None:
+    """Prints the replica's size and lag every `interval` seconds."""
+    while not stop.wait(interval):
+        print(f" seq {replica.applied_seq:,} / {replica.head_seq:,}"
+              f" | lag {replica.lag_events:,} events, {replica.lag_seconds * 1000:.1f} ms"
+              f" | {replica.hospital.stats.patient_count:,} patients,"
+              f" {replica.hospital.stats.staff_count:,} staff", flush=True)
+
+
+def main():
+    """Follows the primary until interrupted."""
+    parser = argparse.ArgumentParser(description="Follow a primary's change events.")
+    parser.add_argument("--host", default="127.0.0.1", help="Primary host")
+    parser.add_argument("--port", type=int, required=True, help="Primary's HOSPITAL_PUBLISH_PORT")
+    parser.add_argument("--after", type=int, default=0,
+                        help="Last sequence number already applied (0: copy the current state)")
+    parser.add_argument("--serve", type=int, help="Serve the replica read-only on this HTTP port")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between lag reports")
+    args = parser.parse_args()
+
+    telemetry.enable()
+    replica = Replica(args.host, args.port, args.after).start()
+    start = time.perf_counter()
+    print(f" Following {args.host}:{args.port}...")
+    while not replica.wait_synced(1.0):
+        print(f"  copying... {replica.hospital.stats.patient_count:,} patients", flush=True)
+    print(f" Synced {replica.hospital.name} at seq {replica.applied_seq:,}"
+          f" in {time.perf_counter() - start:.2f} s")
+
+    stop = threading.Event()
+    threading.Thread(target=report, args=(replica, args.interval, stop), daemon=True).start()
+    try:
+        if args.serve:
+            server = ApiServer(SystemManager(replica.hospital), ReplicaStorage())
+            print(f" Serving the replica on http://127.0.0.1:{args.serve}")
+            asyncio.run(server.serve_forever("127.0.0.1", args.serve))
+        else:
+            stop.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        replica.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Scaling benchmark for staff scheduling and appointment booking.
+
+Builds departments with tens of thousands of staff members in total,
+generates a month of shifts for all of them, books millions of
+appointments, then times conflict detection, "next free slot for any
+Cardiologist" queries, booking and cancelling against the full schedule.
+
+Usage:
+    python tools/schedule_benchmark.py [--departments 10] [--staff 2000]
+                                       [--appointments 2000000] [--queries 2000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import Department, Patient, Staff  # noqa: E402
+from benchmark import format_seconds  # noqa: E402
+
+POSITIONS = ["Cardiologist", "Nurse", "Surgeon", "Technician", "Radiologist"]
+SLOT = 30   # Appointment length in minutes
+
+
+def build(departments: int, staff: int, patients: int) -> list[Department]:
+    """Creates departments with staff members and patients."""
+    result = []
+    for number in range(departments):
+        dept = Department(f"Department {number}")
+        for i in range(staff):
+            dept.add_staff_member(Staff(f"Staff {number}-{i}", 40, POSITIONS[i % len(POSITIONS)]),
+                                  quiet=True)
+        for i in range(patients):
+            dept.add_patient(Patient(f"Patient {number}-{i}", 50, ""), quiet=True)
+        result.append(dept)
+    return result
+
+
+def fill(dept: Department, appointments: int) -> int:
+    """
+    Books appointments back to back through every shift of the month,
+    rotating through the patients, and returns the number booked.
+    """
+    patients = list(dept.patients)
+    schedule = dept.schedule
+    booked = 0
+    for number, member in enumerate(dept.staff):
+        for shift_start, shift_end in schedule.shifts(member, datetime.min, datetime.max):
+            moment = shift_start
+            while moment + timedelta(minutes=SLOT) <= shift_end and booked < appointments:
+                # Every staff member starts from a different patient, so
+                # no patient is booked twice at the same time
+                patient = patients[(number * 7 + booked) % len(patients)]
+                try:
+                    schedule.book(patient, member, moment, SLOT)
+                    booked += 1
+                except ValueError:
+                    pass
+                moment += timedelta(minutes=SLOT * 2)
+        if booked >= appointments:
+            break
+    return booked
+
+
+def timed_each(function, arguments) -> tuple[float, float]:
+    """Calls function(*args) for every argument tuple and returns the median and p99 seconds."""
+    times = []
+    for args in arguments:
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.99)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--departments', type=int, default=10)
+    parser.add_argument('--staff', type=int, default=2000, help="Staff members per department")
+    parser.add_argument('--patients', type=int, default=20000, help="Patients per department")
+    parser.add_argument('--appointments', type=int, default=2000000, help="Appointments in total")
+    parser.add_argument('--queries', type=int, default=2000, help="Timed operations of each kind")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    start = time.perf_counter()
+    departments = build(args.departments, args.staff, args.patients)
+    print(f" Built {args.departments * args.staff:,} staff members and "
+          f"{args.departments * args.patients:,} patients in {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    shifts = sum(dept.schedule.generate_month(2026, 11) for dept in departments)
+    print(f" Generated {shifts:,} shifts for November 2026 in {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    booked = sum(fill(dept, args.appointments // len(departments)) for dept in departments)
+    elapsed = time.perf_counter() - start
+    print(f" Booked {booked:,} appointments in {elapsed:.1f} s "
+          f"({booked / elapsed:,.0f} per second)\n")
+
+    month = datetime(2026, 11, 1)
+
+    def random_moment() -> datetime:
+        return month + timedelta(minutes=rng.randrange(0, 29 * 24 * 60, 15))
+
+    def random_booking():
+        dept = rng.choice(departments)
+        return (dept, rng.choice(list(dept.patients.snapshot())[:1000]),
+                rng.choice(list(dept.staff.snapshot())[:1000]), random_moment())
+
+    def try_book(dept, patient, member, moment):
+        try:
+            dept.schedule.book(patient, member, moment, SLOT)
+        except ValueError:
+            pass
+
+    results = {}
+    bookings = [random_booking() for _ in range(args.queries)]
+    results['book or conflict'] = timed_each(try_book, bookings)
+    results['next free slot'] = timed_each(
+        lambda dept, moment: dept.schedule.next_free_slot("Cardiologist", moment, SLOT),
+        [(rng.choice(departments), random_moment()) for _ in range(args.queries)])
+    results['book next free'] = timed_each(
+        lambda dept, patient, moment: dept.schedule.book_next_free(patient, "Cardiologist",
+                                                                   moment, SLOT),
+        [(dept, patient, moment) for dept, patient, _, moment in bookings])
+    victims = [(dept, appointment_id) for dept in departments
+               for appointment_id in rng.sample(list(dept.schedule.appointments),
+                                                args.queries // len(departments))]
+    results['cancel'] = timed_each(lambda dept, appointment_id: dept.schedule.cancel(appointment_id),
+                                   victims)
+    results['appointments of'] = timed_each(
+        lambda dept, member: dept.schedule.appointments_of(member, month, month + timedelta(days=1)),
+        [(dept, member) for dept, _, member, _ in bookings])
+
+    print(f" {'operation':<20}{'median':>12}{'p99':>12}")
+    for name, (median, p99) in results.items():
+        print(f" {name:<20}{format_seconds(median):>12}{format_seconds(p99):>12}")
+
+
+if __name__ == '__main__':
+    main()
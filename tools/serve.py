@@ -0,0 +1,43 @@
+"""
+Runs the HTTP/JSON API over the hospital data.
+
+Usage:
+    python tools/serve.py [--host 127.0.0.1] [--port 8080]
+
+Uses the same storage backend as the CLI (HOSPITAL_STORAGE), and publishes
+changes to replicas if HOSPITAL_PUBLISH_PORT is set.
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as app  # noqa: E402
+from core import ApiServer, SystemManager  # noqa: E402
+
+
+def main():
+    """Loads the hospital and serves it until interrupted."""
+    parser = argparse.ArgumentParser(description="Serve the hospital over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    hospital = app.load_data()
+    publisher = app.start_change_feed(hospital)
+    server = ApiServer(SystemManager(hospital), app.storage)
+    print(f" Serving {hospital.name} on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.save_data(hospital)
+        app.storage.close()
+        app.stop_change_feed(publisher)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Multithreaded stress test for concurrent hospital access.
+
+Writer threads add and delete patients and staff through the JSON storage
+while reader threads list, search and save snapshots. Afterwards the
+hospital is checked for lost or duplicated records, the ID map, indexes
+and statistics are verified, and the last snapshot plus the journal is
+reloaded and compared.
+
+Usage:
+    python tools/stress_concurrency.py [--writers 4] [--readers 4] [--operations 5000]
+
+tests/test_concurrency.py runs a smaller configuration under pytest.
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import SystemManager  # noqa: E402
+from model import Department, Hospital, Patient, Staff, verify_statistics  # noqa: E402
+from storage import JsonStorage  # noqa: E402
+
+DEPARTMENTS = ["Cardiology", "Neurology", "Pediatrics", "Emergency"]
+
+
+class NullOutput:
+    """Discards listing output."""
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def writer(storage: JsonStorage, hospital: Hospital, number: int, operations: int,
+           kept: list, errors: list) -> None:
+    """Adds records and deletes some of its own again, remembering the survivors."""
+    rng = random.Random(number)
+    own = []
+    try:
+        for i in range(operations):
+            dept = hospital.departments[rng.randrange(len(hospital.departments))]
+            if own and rng.random() < 0.3:
+                dept, record = own.pop(rng.randrange(len(own)))
+                if isinstance(record, Patient):
+                    storage.delete_patient(hospital, dept, record)
+                else:
+                    storage.delete_staff_member(hospital, dept, record)
+            elif rng.random() < 0.8:
+                record = Patient(f"Writer{number} Patient{i}", rng.randint(0, 95), "Stress")
+                storage.add_patient(hospital, dept, record)
+                own.append((dept, record))
+            else:
+                record = Staff(f"Writer{number} Staff{i}", rng.randint(22, 65), "Nurse")
+                storage.add_staff_member(hospital, dept, record)
+                own.append((dept, record))
+    except Exception as e:
+        errors.append(f"writer {number}: {e!r}")
+    kept.extend(own)
+
+
+def reader(manager: SystemManager, storage: JsonStorage, number: int,
+           stop: threading.Event, counts: Counter, errors: list) -> None:
+    """Lists, searches, reads statistics and saves until told to stop."""
+    rng = random.Random(1000 + number)
+    out = NullOutput()
+    try:
+        while not stop.is_set():
+            action = rng.randrange(4)
+            if action == 0:
+                manager.display_all_patients(sort_by=rng.choice([None, 'name', 'age']),
+                                             limit=100, out=out)
+            elif action == 1:
+                storage.search_patients(manager.hospital, f"writer{rng.randrange(8)}")
+            elif action == 2:
+                manager.get_statistics()
+            else:
+                storage.save(manager.hospital)
+            counts[action] += 1
+    except Exception as e:
+        errors.append(f"reader {number}: {e!r}")
+
+
+def check(hospital: Hospital, kept: list) -> list[str]:
+    """Returns every inconsistency between the hospital and the surviving records."""
+    problems = []
+    listed = [(dept, record) for dept in hospital.departments
+              for record in list(dept.patients) + list(dept.staff)]
+    ids = Counter(record.record_id for _, record in listed)
+    duplicates = [record_id for record_id, n in ids.items() if n > 1]
+    if duplicates:
+        problems.append(f"duplicated IDs: {duplicates[:10]}")
+
+    expected = {id(record) for _, record in kept}
+    present = {id(record) for _, record in listed}
+    if expected - present:
+        problems.append(f"{len(expected - present)} records lost")
+    if present - expected:
+        problems.append(f"{len(present - expected)} deleted records still present")
+    if len(hospital.records) != len(listed):
+        problems.append(f"ID map holds {len(hospital.records)} records, departments {len(listed)}")
+
+    for dept, record in listed:
+        found = hospital.get_record(record.record_id)
+        if found is None or found[1] is not record or found[0] is not dept:
+            problems.append(f"ID map is wrong for record {record.record_id}")
+            break
+        index = dept.patient_index if isinstance(record, Patient) else dept.staff_index
+        if record not in index.search(record.name.lower()):
+            problems.append(f"name index misses record {record.record_id}")
+            break
+
+    problems.extend(verify_statistics(hospital))
+    return problems
+
+
+def run(writers: int = 4, readers: int = 4, operations: int = 5000) -> dict:
+    """
+    Runs the stress test and returns its results.
+
+    Returns:
+        'problems' (empty when consistent), 'elapsed' seconds, read 'counts'
+        by kind, and the number of records 'kept' by the writers and left
+        'in_hospital'.
+    """
+    # Switch threads often to provoke interleavings
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "hospital.json")
+            storage = JsonStorage(path, path + ".journal", compact_every=2000)
+            hospital = Hospital("Stress Test Hospital", "Cairo, Egypt")
+            for name in DEPARTMENTS:
+                storage.add_department(hospital, Department(name))
+            manager = SystemManager(hospital)
+
+            kept, errors, counts = [], [], Counter()
+            stop = threading.Event()
+            writer_threads = [threading.Thread(target=writer,
+                                               args=(storage, hospital, n, operations, kept,
+                                                     errors))
+                              for n in range(writers)]
+            reader_threads = [threading.Thread(target=reader,
+                                               args=(manager, storage, n, stop, counts, errors))
+                              for n in range(readers)]
+
+            start = time.perf_counter()
+            # The storage reports every change; keep that out of the summary
+            with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(quiet):
+                for thread in reader_threads + writer_threads:
+                    thread.start()
+                for thread in writer_threads:
+                    thread.join()
+                stop.set()
+                for thread in reader_threads:
+                    thread.join()
+            elapsed = time.perf_counter() - start
+
+            problems = errors + check(hospital, kept)
+
+            # The last snapshot plus the journal must reload to exactly the same records
+            storage.close()
+            reloaded = JsonStorage(path, path + ".journal").load()
+            saved = {record_id: (record.name, record.age) for record_id, (_, record)
+                     in reloaded.records.items()}
+            live = {record_id: (record.name, record.age) for record_id, (_, record)
+                    in hospital.records.items()}
+            if saved != live:
+                problems.append("reloaded data differs from the live hospital")
+    finally:
+        sys.setswitchinterval(interval)
+
+    return {'problems': problems, 'elapsed': elapsed, 'counts': counts,
+            'kept': len(kept), 'in_hospital': len(hospital.records)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=4, help="Writer threads")
+    parser.add_argument('--readers', type=int, default=4, help="Reader threads")
+    parser.add_argument('--operations', type=int, default=5000,
+                        help="Changes made by each writer")
+    args = parser.parse_args()
+
+    result = run(args.writers, args.readers, args.operations)
+    counts = result['counts']
+    print(f"{args.writers} writers x {args.operations} changes, {args.readers} readers "
+          f"in {result['elapsed']:.2f}s")
+    print(f"  reads: {counts[0]} listings, {counts[1]} searches, "
+          f"{counts[2]} statistics, {counts[3]} saves")
+    print(f"  records: {result['kept']} kept, {result['in_hospital']} in hospital")
+    if result['problems']:
+        print("FAILED")
+        for problem in result['problems']:
+            print(f"  - {problem}")
+        sys.exit(1)
+    print("OK: no records lost or duplicated; IDs, indexes and statistics consistent")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+Day-long simulation of triage, admission and bed occupancy.
+
+Registers one patient per arrival, then replays 24 hours of synthetic
+arrivals in simulated time: patients arrive with Emergency Severity Index
+levels at rates that peak in the afternoon, some deteriorate while waiting
+and are re-triaged, the most urgent waiting patient is admitted whenever a
+bed is free, some admitted patients are transferred to another department,
+and everyone is discharged after a stay that depends on their level.
+Prints the wall-clock throughput of every operation and how long each
+level waited.
+
+Usage:
+    python tools/triage_simulator.py [--departments 10] [--beds 1500]
+                                     [--arrivals 100000] [--seed 42]
+"""
+import argparse
+import heapq
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import Department, Hospital, Patient, TRIAGE_LEVELS  # noqa: E402
+from benchmark import format_seconds  # noqa: E402
+
+DAY = 24 * 60                                       # Simulated minutes
+LEVEL_SHARES = {1: 0.01, 2: 0.10, 3: 0.40, 4: 0.35, 5: 0.14}
+MEAN_STAY = {1: 600, 2: 360, 3: 240, 4: 90, 5: 45}  # Minutes in a bed by level
+# Relative arrival rate for every hour of the day
+HOURLY_RATE = [3, 2, 2, 2, 2, 3, 4, 6, 8, 9, 10, 10, 10, 10, 10, 10, 9, 9, 8, 7, 6, 5, 4, 3]
+DETERIORATE = 0.10      # Share of arrivals re-triaged one level up while waiting
+TRANSFER = 0.05         # Share of admissions moved to another department
+
+
+def build(departments: int, beds: int, arrivals: int, rng: random.Random) -> Hospital:
+    """Creates a hospital with `beds` beds per department and a patient per arrival."""
+    hospital = Hospital("Simulated Hospital", "Nowhere")
+    for number in range(departments):
+        dept = Department(f"Department {number}")
+        dept.triage.set_capacity(beds)
+        hospital.add_department(dept)
+    for i in range(arrivals):
+        dept = hospital.departments[i % departments]
+        dept.add_patient(Patient(f"Patient {i}", rng.randint(0, 99), ""), quiet=True)
+    return hospital
+
+
+def arrival_events(hospital: Hospital, rng: random.Random) -> list:
+    """Returns (minute, order, 'arrive', patient, level) events for every registered patient."""
+    events = []
+    levels = list(LEVEL_SHARES)
+    weights = list(LEVEL_SHARES.values())
+    for dept in hospital.departments:
+        for patient in dept.patients:
+            hour = rng.choices(range(24), HOURLY_RATE)[0]
+            minute = hour * 60 + rng.random() * 60
+            level = rng.choices(levels, weights)[0]
+            events.append((minute, len(events), 'arrive', patient, level))
+    heapq.heapify(events)
+    return events
+
+
+class Simulation:
+    """Replays events in time order and times every triage operation."""
+
+    def __init__(self, hospital: Hospital, rng: random.Random) -> None:
+        self.hospital = hospital
+        self.rng = rng
+        self.events: list = []
+        self.order = 0
+        self.level: dict[int, int] = {}             # id(patient) -> current level
+        self.arrived: dict[int, float] = {}         # id(patient) -> arrival minute
+        self.waits: dict[int, list[float]] = defaultdict(list)
+        self.seconds: dict[str, float] = defaultdict(float)
+        self.calls: dict[str, int] = defaultdict(int)
+        self.refused_transfers = 0
+        self.peak_waiting = 0
+        self.peak_occupied = 0
+
+    def schedule(self, minute: float, kind: str, patient: Patient, level: int = 0) -> None:
+        """Adds an event."""
+        self.order += 1
+        heapq.heappush(self.events, (minute, self.order, kind, patient, level))
+
+    def timed(self, name: str, function, *args):
+        """Calls function(*args), adding its wall-clock time to the operation's total."""
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+            self.calls[name] += 1
+
+    def admit_waiting(self, dept: Department, now: float) -> None:
+        """Fills the department's free beds with its most urgent waiting patients."""
+        while True:
+            admitted = self.timed('admit next', dept.triage.admit_next)
+            if admitted is None:
+                return
+            patient = admitted[0]
+            level = self.level[id(patient)]
+            self.waits[level].append(now - self.arrived.pop(id(patient)))
+            stay = self.rng.expovariate(1 / MEAN_STAY[level])
+            self.schedule(now + stay, 'discharge', patient)
+            if self.rng.random() < TRANSFER:
+                self.schedule(now + stay * self.rng.random(), 'transfer', patient)
+
+    def run(self, events: list) -> int:
+        """Replays the arrivals and everything they cause; returns the number of events."""
+        self.events = events
+        self.order = len(events)
+        departments = self.hospital.departments
+        handled = 0
+        while self.events and self.events[0][0] < DAY:
+            now, _, kind, patient, level = heapq.heappop(self.events)
+            handled += 1
+            dept = self.hospital.get_record(patient.record_id)[0]
+            if kind == 'arrive':
+                self.timed('arrive', dept.triage.arrive, patient, level)
+                self.level[id(patient)] = level
+                self.arrived[id(patient)] = now
+                if level > 1 and self.rng.random() < DETERIORATE:
+                    self.schedule(now + self.rng.expovariate(1 / 60), 'retriage', patient, level - 1)
+            elif kind == 'retriage':
+                # Only patients still waiting are re-triaged
+                if patient in dept.triage.queue:
+                    self.timed('retriage', dept.triage.retriage, patient, level)
+                    self.level[id(patient)] = level
+                continue
+            elif kind == 'transfer':
+                target = self.rng.choice(departments)
+                if target is dept or patient not in dept.triage.ward:
+                    continue
+                if self.timed('is full', target.triage.is_full):
+                    self.refused_transfers += 1
+                    continue
+                self.timed('transfer', self.hospital.transfer_patient, patient, target)
+            elif kind == 'discharge':
+                self.timed('discharge', dept.triage.discharge, patient)
+            self.admit_waiting(dept, now)
+            status = dept.triage.status()
+            self.peak_waiting = max(self.peak_waiting, status['waiting'])
+            self.peak_occupied = max(self.peak_occupied, status['occupied'])
+        return handled
+
+
+def percentile(values: list[float], share: float) -> float:
+    """Returns the value below which `share` of the sorted values fall."""
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--departments', type=int, default=10)
+    parser.add_argument('--beds', type=int, default=1500, help="Beds per department")
+    parser.add_argument('--arrivals', type=int, default=100000, help="Arrivals over the day")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    start = time.perf_counter()
+    hospital = build(args.departments, args.beds, args.arrivals, rng)
+    print(f" Registered {args.arrivals:,} patients in {args.departments} departments of "
+          f"{args.beds:,} beds in {time.perf_counter() - start:.1f} s")
+
+    simulation = Simulation(hospital, rng)
+    events = arrival_events(hospital, rng)
+    start = time.perf_counter()
+    handled = simulation.run(events)
+    elapsed = time.perf_counter() - start
+    operations = sum(simulation.calls.values())
+    print(f" Replayed 24 h: {handled:,} events, {operations:,} triage operations in "
+          f"{elapsed:.2f} s ({handled / elapsed:,.0f} events/s, "
+          f"{operations / elapsed:,.0f} operations/s)\n")
+
+    print(f" {'operation':<14}{'calls':>10}{'mean':>12}{'per second':>14}")
+    for name, seconds in sorted(simulation.seconds.items()):
+        calls = simulation.calls[name]
+        print(f" {name:<14}{calls:>10,}{format_seconds(seconds / calls):>12}"
+              f"{calls / seconds:>14,.0f}")
+
+    status = [dept.triage.status() for dept in hospital.departments]
+    print(f"\n Peak queue {simulation.peak_waiting:,} and peak occupancy "
+          f"{simulation.peak_occupied:,}/{args.beds:,} beds in one department; "
+          f"{sum(s['waiting'] for s in status):,} waiting and "
+          f"{sum(s['occupied'] for s in status):,} in beds at midnight; "
+          f"{simulation.refused_transfers:,} transfers refused for lack of a bed\n")
+
+    print(f" {'level':<18}{'admitted':>10}{'median wait':>14}{'p95 wait':>12}")
+    for level, name in TRIAGE_LEVELS.items():
+        waits = sorted(simulation.waits[level])
+        if waits:
+            print(f" {level} {name:<16}{len(waits):>10,}{statistics.median(waits):>10.0f} min"
+                  f"{percentile(waits, 0.95):>8.0f} min")
+
+
+if __name__ == '__main__':
+    main()